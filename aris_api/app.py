@@ -1,11 +1,21 @@
 from http import HTTPStatus
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 
+from aris_api import metrics
+from aris_api.instrumentation import MetricsMiddleware
+from aris_api.lifespan import lifespan
+from aris_api.profiling import ProfilingMiddleware
 from aris_api.routers import auth, users  # ✅ importa os módulos corretamente
-from aris_api.schemas import Message
+from aris_api.schemas import HealthStatus, Message
+from aris_api.security import get_key_ring
+from aris_api.settings import settings
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+# o último adicionado é o mais externo: o profiling roda dentro das métricas
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 # registra os routers na app principal
 app.include_router(auth.router)
@@ -15,3 +25,42 @@ app.include_router(users.router)
 @app.get('/', status_code=HTTPStatus.OK, response_model=Message)
 def read_root():
     return {'message': 'Olá. Mundo!'}
+
+
+@app.get('/metrics', include_in_schema=False)
+def read_metrics():
+    return PlainTextResponse(
+        metrics.render(), media_type='text/plain; version=0.0.4'
+    )
+
+
+@app.get('/.well-known/jwks.json', include_in_schema=False)
+def read_jwks():
+    # 🔑 chaves públicas para outros serviços validarem tokens sem nos chamar
+    return JSONResponse(
+        get_key_ring().jwks,
+        headers={
+            'Cache-Control': f'public, max-age={settings.JWKS_MAX_AGE_SECONDS}'
+        },
+    )
+
+
+@app.get(
+    '/health/live', status_code=HTTPStatus.OK, response_model=HealthStatus
+)
+def read_liveness():
+    return {'status': 'ok'}
+
+
+@app.get(
+    '/health/ready',
+    status_code=HTTPStatus.OK,
+    response_model=HealthStatus,
+    responses={HTTPStatus.SERVICE_UNAVAILABLE: {'model': HealthStatus}},
+)
+def read_readiness(request: Request):
+    if not getattr(request.app.state, 'ready', False):
+        return JSONResponse(
+            {'status': 'starting'}, status_code=HTTPStatus.SERVICE_UNAVAILABLE
+        )
+    return {'status': 'ready'}
@@ -0,0 +1,76 @@
+"""Single-flight: chamadas simultâneas com a mesma chave dividem uma execução.
+
+A primeira chamada (a "líder") executa a função; as que chegam com a mesma
+chave enquanto ela está em andamento esperam o mesmo resultado, ou a mesma
+exceção. Nada fica guardado depois que a líder termina: isto não é um
+cache, só evita rajadas da mesma consulta.
+
+O resultado é compartilhado entre requisições, então a função deve devolver
+valores imutáveis (tuplas, registros congelados, bytes), nunca objetos
+presos à sessão da líder.
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import TypeVar
+from weakref import WeakKeyDictionary
+
+from aris_api.metrics import single_flight_shared_total
+
+T = TypeVar('T')
+
+
+class _LeaderCancelled(Exception):
+    """A líder foi cancelada; quem esperava executa a própria chamada."""
+
+
+class SingleFlight:
+    def __init__(self, name: str, timeout: float | None = None):
+        self.name = name
+        self.timeout = timeout
+        # futures só valem no loop em que foram criados (vários loops nos
+        # testes, um por worker em produção)
+        self._calls: WeakKeyDictionary[
+            asyncio.AbstractEventLoop, dict[Hashable, asyncio.Future]
+        ] = WeakKeyDictionary()
+
+    async def do(
+        self,
+        key: Hashable,
+        call: Callable[[], Awaitable[T]],
+        timeout: float | None = None,
+    ) -> T:
+        """Executa `call()` ou espera a execução em andamento para `key`.
+
+        `timeout` (padrão: o da instância) limita tanto a execução da líder
+        quanto a espera das demais; estourado, levanta `TimeoutError`.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        calls = self._calls.setdefault(loop, {})
+
+        future = calls.get(key)
+        if future is not None:
+            single_flight_shared_total.labels(self.name).inc()
+            try:
+                # shield: o cancelamento de quem espera não afeta a líder
+                return await asyncio.wait_for(asyncio.shield(future), timeout)
+            except _LeaderCancelled:
+                return await call()
+
+        future = calls[key] = loop.create_future()
+        try:
+            async with asyncio.timeout(timeout):
+                result = await call()
+        except Exception as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del calls[key]
+            if not future.done():  # líder cancelada
+                future.set_exception(_LeaderCancelled())
+            # sem ninguém esperando, evita o aviso de exceção não lida
+            future.exception()
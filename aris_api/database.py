@@ -1,10 +1,186 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from functools import cache
+from time import monotonic, perf_counter
 
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    create_async_engine,
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from aris_api.instrumentation import instrument_engine
+from aris_api.metrics import (
+    db_pool_checkout_seconds,
+    db_pool_connections_in_use,
+    db_pool_timeouts_total,
+)
 from aris_api.settings import settings
 
-engine = create_async_engine(settings.DATABASE_URL)
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Pool padrão do SQLAlchemy que mede a espera por conexão."""
+
+    def _do_get(self):
+        start = perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            db_pool_timeouts_total.inc()
+            raise
+        finally:
+            db_pool_checkout_seconds.observe(perf_counter() - start)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    pragmas = {
+        'journal_mode': settings.DB_SQLITE_JOURNAL_MODE,
+        'synchronous': settings.DB_SQLITE_SYNCHRONOUS,
+        'busy_timeout': settings.DB_SQLITE_BUSY_TIMEOUT_MS,
+        'mmap_size': settings.DB_SQLITE_MMAP_SIZE,
+    }
+    cursor = dbapi_connection.cursor()
+    for name, value in pragmas.items():
+        if value is not None:
+            cursor.execute(f'PRAGMA {name} = {value}')
+    cursor.close()
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    db_pool_connections_in_use.inc()
+
+
+def _on_checkin(dbapi_connection, connection_record):
+    db_pool_connections_in_use.dec()
+
+
+def engine_options(url: str) -> dict:
+    """Argumentos de `create_async_engine` conforme o dialeto da URL."""
+    database_url = make_url(url)
+    backend = database_url.get_backend_name()
+    options = {}
+
+    if backend == 'sqlite':
+        options['connect_args'] = {
+            'cached_statements': settings.DB_STATEMENT_CACHE_SIZE
+        }
+    elif backend == 'postgresql' and database_url.get_driver_name() == (
+        'asyncpg'
+    ):
+        # ⚡ cada conexão do pool guarda os comandos já preparados no
+        # servidor; 0 desliga (necessário atrás do pgbouncer em modo
+        # transaction)
+        options['connect_args'] = {
+            'prepared_statement_cache_size': settings.DB_STATEMENT_CACHE_SIZE,
+            'statement_cache_size': settings.DB_STATEMENT_CACHE_SIZE,
+            'server_settings': {'application_name': 'aris_api'},
+        }
+
+    # SQLite em memória usa StaticPool (uma única conexão); não há pool
+    if backend != 'sqlite' or database_url.database not in {
+        None,
+        '',
+        ':memory:',
+    }:
+        options.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+    return options
+
+
+def build_engine(url: str) -> AsyncEngine:
+    """Cria a engine assíncrona com o pool e os ajustes de `Settings`."""
+    options = engine_options(url)
+    async_engine = create_async_engine(url, **options)
+
+    if async_engine.dialect.name == 'sqlite':
+        event.listen(async_engine.sync_engine, 'connect', _set_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, 'checkout', _on_checkout)
+    event.listen(async_engine.sync_engine, 'checkin', _on_checkin)
+    instrument_engine(async_engine)
+    return async_engine
+
+
+class ReplicaRouter:
+    """Distribui leituras entre réplicas em round-robin.
+
+    Uma réplica que falha ao conectar fica fora da rodada por `cooldown`
+    segundos; sem réplicas saudáveis as leituras voltam para o primário.
+    """
+
+    def __init__(self, engines: list[AsyncEngine], cooldown: float):
+        self.engines = engines
+        self.cooldown = cooldown
+        self._down_until = [0.0] * len(engines)
+        self._next = 0
+
+    def candidates(self) -> list[AsyncEngine]:
+        """Réplicas saudáveis, começando pela próxima da rodada."""
+        total = len(self.engines)
+        if not total:
+            return []
+
+        start = self._next
+        self._next = (start + 1) % total
+        now = monotonic()
+        return [
+            self.engines[index]
+            for index in ((start + i) % total for i in range(total))
+            if self._down_until[index] <= now
+        ]
+
+    def mark_down(self, replica: AsyncEngine):
+        index = self.engines.index(replica)
+        self._down_until[index] = monotonic() + self.cooldown
+
+
+# ⚡ engines criadas no primeiro uso: importar a app não carrega o driver
+# nem lê a URL do banco
+@cache
+def get_engine() -> AsyncEngine:
+    return build_engine(settings.DATABASE_URL)
+
+
+@cache
+def get_read_router() -> ReplicaRouter:
+    return ReplicaRouter(
+        [build_engine(url) for url in settings.READ_DATABASE_URLS],
+        cooldown=settings.READ_REPLICA_COOLDOWN_SECONDS,
+    )
 
 
 async def get_session():
-    async with AsyncSession(engine, expire_on_commit=False) as session:
+    async with AsyncSession(get_engine(), expire_on_commit=False) as session:
+        yield session
+
+
+async def get_read_session():
+    """Sessão para consultas somente-leitura, servida por uma réplica.
+
+    Réplicas podem estar atrasadas em relação ao primário: use apenas onde
+    ler um dado alguns instantes desatualizado é aceitável.
+    """
+    read_router = get_read_router()
+    for replica in read_router.candidates():
+        session = AsyncSession(replica, expire_on_commit=False)
+        try:
+            await session.connection()  # health check: falha aqui, não na rota
+        except (DBAPIError, OSError, PoolTimeoutError):
+            await session.close()
+            read_router.mark_down(replica)
+            continue
+
+        async with session:
+            yield session
+        return
+
+    async with AsyncSession(get_engine(), expire_on_commit=False) as session:
         yield session
@@ -0,0 +1,66 @@
+"""ETags de GET /users/ e cache das páginas já serializadas.
+
+A versão vem de `table_versions` (incrementada a cada escrita em `users`),
+então todos os workers geram o mesmo ETag para a mesma página.
+"""
+
+import hashlib
+from collections import OrderedDict
+
+from aris_api.settings import settings
+
+
+def make_etag(version: int, key: str) -> str:
+    """ETag fraco: versão da tabela + resumo dos parâmetros da página."""
+    digest = hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+    return f'W/"{version}-{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Comparação fraca com o If-None-Match (lista separada por vírgulas)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+
+    opaque = etag.removeprefix('W/')
+    return any(
+        tag.strip().removeprefix('W/') == opaque
+        for tag in if_none_match.split(',')
+    )
+
+
+class PageCache:
+    """LRU de corpos de resposta indexado por (versão, parâmetros).
+
+    Uma escrita muda a versão; as páginas antigas deixam de ser pedidas e
+    saem pelo LRU.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[tuple[int, str], bytes] = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: tuple[int, str]) -> bytes | None:
+        body = self._entries.get(key)
+        if body is not None:
+            self._entries.move_to_end(key)
+        return body
+
+    def set(self, key: tuple[int, str], body: bytes):
+        if self.max_size <= 0:
+            return
+
+        self._entries[key] = body
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+users_page_cache = PageCache(max_size=settings.USERS_PAGE_CACHE_SIZE)
@@ -0,0 +1,217 @@
+import logging
+from collections import Counter
+from contextvars import ContextVar
+from time import perf_counter
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from aris_api.metrics import (
+    db_query_seconds,
+    db_repeated_statements_total,
+    db_slow_queries_total,
+    http_request_db_queries,
+    http_request_db_seconds,
+    http_request_duration_seconds,
+    http_request_password_hash_seconds,
+    http_requests_in_flight,
+    http_requests_total,
+)
+from aris_api.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RequestStats:
+    """Acumuladores da requisição atual (SQL e hash de senha)."""
+
+    __slots__ = (
+        'queries',
+        'db_seconds',
+        'hash_seconds',
+        'scope',
+        'statements',
+    )
+
+    def __init__(self, scope=None):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.hash_seconds = 0.0
+        self.scope = scope
+        # (comando, repr dos parâmetros) -> execuções
+        self.statements: Counter[tuple[str, str]] = Counter()
+
+    @property
+    def route(self) -> str:
+        return route_label(self.scope) if self.scope else '-'
+
+    def repeated(self) -> dict[tuple[str, str], int]:
+        """Comandos executados mais de uma vez com os mesmos parâmetros."""
+        return {key: n for key, n in self.statements.items() if n > 1}
+
+    def fan_out(self, threshold: int) -> dict[str, int]:
+        """Comandos repetidos com parâmetros diferentes (suspeita de N+1)."""
+        variants = Counter(statement for statement, _ in self.statements)
+        return {
+            statement: n for statement, n in variants.items() if n >= threshold
+        }
+
+
+request_stats: ContextVar[RequestStats | None] = ContextVar(
+    'request_stats', default=None
+)
+
+
+def route_label(scope) -> str:
+    """`GET /users/{user_id}`: o template da rota, não a URL."""
+    route = scope.get('route')
+    return f'{scope["method"]} {route.path if route else "unmatched"}'
+
+
+def parameter_shape(parameters, executemany=False) -> str:
+    """Tipos dos parâmetros, sem os valores (que podem ser e-mails, hashes
+    de senha...)."""
+    if executemany:
+        rows = list(parameters)
+        first = parameter_shape(rows[0]) if rows else '()'
+        return f'{len(rows)} x {first}'
+    if isinstance(parameters, dict):
+        items = (f'{k}: {type(v).__name__}' for k, v in parameters.items())
+        return '{' + ', '.join(items) + '}'
+    return '(' + ', '.join(type(v).__name__ for v in parameters) + ')'
+
+
+def record_hash_time(elapsed: float):
+    stats = request_stats.get()
+    if stats is not None:
+        stats.hash_seconds += elapsed
+
+
+# --- Eventos da engine ---
+def _before_cursor_execute(conn, **kw):
+    conn.info.setdefault('query_start', []).append(perf_counter())
+
+
+def _is_read(context) -> bool:
+    return not (context.isinsert or context.isupdate or context.isdelete)
+
+
+def _after_cursor_execute(
+    conn, statement, parameters, context, executemany, **kw
+):
+    elapsed = perf_counter() - conn.info['query_start'].pop()
+    db_query_seconds.observe(elapsed)
+
+    stats = request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+        # só leituras: repetir uma escrita costuma ser intencional (ex.: a
+        # versão da tabela a cada lote confirmado do POST /users/bulk)
+        if not executemany and _is_read(context):
+            stats.statements[statement, repr(parameters)] += 1
+
+    slow_ms = settings.DB_SLOW_QUERY_MS
+    if slow_ms is not None and elapsed * 1000 >= slow_ms:
+        db_slow_queries_total.inc()
+        logger.warning(
+            '🐢 consulta lenta (%.1f ms) em %s: %s | parâmetros: %s',
+            elapsed * 1000,
+            stats.route if stats is not None else '-',
+            ' '.join(statement.split()),
+            parameter_shape(parameters, executemany),
+        )
+
+
+def report_statements(stats: RequestStats, method: str, path: str):
+    """Avisa sobre comandos repetidos na requisição que terminou."""
+    route = f'{method} {path}'
+    for (statement, _), n in stats.repeated().items():
+        db_repeated_statements_total.labels(method, path).inc(n - 1)
+        logger.warning(
+            '🔁 comando SQL idêntico executado %d vezes em %s: %s',
+            n,
+            route,
+            ' '.join(statement.split()),
+        )
+    for statement, n in stats.fan_out(
+        settings.DB_N_PLUS_ONE_THRESHOLD
+    ).items():
+        logger.warning(
+            '⚠️ possível N+1 em %s: %d execuções de %s',
+            route,
+            n,
+            ' '.join(statement.split()),
+        )
+
+
+def _handle_error(exception_context):
+    # comando que falhou não dispara after_cursor_execute
+    conn = exception_context.connection
+    if conn is not None and conn.info.get('query_start'):
+        conn.info['query_start'].pop()
+
+
+def instrument_engine(engine: AsyncEngine):
+    """Registra os eventos que medem cada comando SQL da engine."""
+    sync_engine = engine.sync_engine
+    event.listen(
+        sync_engine,
+        'before_cursor_execute',
+        _before_cursor_execute,
+        named=True,
+    )
+    event.listen(
+        sync_engine, 'after_cursor_execute', _after_cursor_execute, named=True
+    )
+    event.listen(sync_engine, 'handle_error', _handle_error)
+
+
+# --- Middleware HTTP ---
+class MetricsMiddleware:
+    """Middleware ASGI que mede latência, status, SQL e hash por rota.
+
+    A rota é o template do FastAPI (ex.: `/users/{user_id}`), para que o
+    número de séries não cresça com os valores dos parâmetros.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        stats = RequestStats(scope)
+        token = request_stats.set(stats)
+        http_requests_in_flight.inc()
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = perf_counter() - start
+            http_requests_in_flight.dec()
+            request_stats.reset(token)
+
+            route = scope.get('route')
+            method = scope['method']
+            path = route.path if route is not None else 'unmatched'
+            http_requests_total.labels(method, path, status).inc()
+            http_request_duration_seconds.labels(method, path).observe(elapsed)
+            http_request_db_queries.labels(method, path).observe(stats.queries)
+            http_request_db_seconds.labels(method, path).observe(
+                stats.db_seconds
+            )
+            http_request_password_hash_seconds.labels(method, path).observe(
+                stats.hash_seconds
+            )
+            report_statements(stats, method, path)
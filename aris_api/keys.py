@@ -0,0 +1,206 @@
+"""Chaves de assinatura dos tokens de acesso.
+
+Com `ALGORITHM` simétrico (HS256, o padrão) o token é assinado com a
+`SECRET_KEY` e só esta API consegue validá-lo. Com uma chave privada em
+`JWT_SIGNING_KEY_FILE` (RS256, ES256, EdDSA...) o token leva o `kid` da
+chave no cabeçalho e qualquer serviço valida localmente com a chave pública
+publicada em `/.well-known/jwks.json`.
+
+Rotação: publique a chave nova em `JWT_VERIFICATION_KEY_FILES` (pelo menos
+`JWKS_MAX_AGE_SECONDS` antes de usá-la para assinar) e mantenha a antiga lá
+até os tokens emitidos com ela expirarem. Assim nenhum token em circulação
+é invalidado.
+
+Na troca do `SECRET_KEY` pela primeira chave privada, os tokens já emitidos
+não têm `kid`. Eles continuam válidos até `JWT_SECRET_TOKENS_VALID_UNTIL`
+(o horário da troca mais `ACCESS_TOKEN_EXPIRE_MINUTES`), validados com o
+`SECRET_KEY` em `JWT_SECRET_ALGORITHM`. Sem esse prazo, a troca encerra a
+sessão de todo mundo.
+"""
+
+import base64
+import hashlib
+import json
+import time
+from datetime import UTC
+from pathlib import Path
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import ec, ed448, ed25519, rsa
+from cryptography.hazmat.primitives.serialization import (
+    load_pem_private_key,
+    load_pem_public_key,
+)
+from jwt.algorithms import get_default_algorithms
+
+# membros obrigatórios de cada tipo de chave no thumbprint (RFC 7638)
+_THUMBPRINT_MEMBERS = {
+    'RSA': ('e', 'kty', 'n'),
+    'EC': ('crv', 'kty', 'x', 'y'),
+    'OKP': ('crv', 'kty', 'x'),
+}
+# token sem `exp` nunca expiraria: é recusado
+_REQUIRED_CLAIMS = {'require': ['exp']}
+_EC_ALGORITHMS = {
+    'secp256r1': 'ES256',
+    'secp384r1': 'ES384',
+    'secp521r1': 'ES512',
+    'secp256k1': 'ES256K',
+}
+
+
+def load_public_key(path: str):
+    """Chave pública de um PEM, que pode conter a chave pública ou a
+    privada (caso de uma chave de assinatura aposentada)."""
+    data = Path(path).read_bytes()
+    try:
+        return load_pem_public_key(data)
+    except ValueError:
+        return load_pem_private_key(data, password=None).public_key()
+
+
+def key_algorithm(public_key, preferred: str) -> str:
+    """Algoritmo JWS compatível com a chave; `preferred` vale se servir."""
+    if isinstance(public_key, rsa.RSAPublicKey):
+        return preferred if preferred[:2] in {'RS', 'PS'} else 'RS256'
+    if isinstance(public_key, ec.EllipticCurvePublicKey):
+        return _EC_ALGORITHMS[public_key.curve.name]
+    if isinstance(public_key, ed25519.Ed25519PublicKey | ed448.Ed448PublicKey):
+        return 'EdDSA'
+    raise ValueError(f'tipo de chave não suportado: {type(public_key)}')
+
+
+def thumbprint(jwk: dict) -> str:
+    """`kid` determinístico: SHA-256 do JWK canônico (RFC 7638)."""
+    members = {name: jwk[name] for name in _THUMBPRINT_MEMBERS[jwk['kty']]}
+    canonical = json.dumps(members, separators=(',', ':'), sort_keys=True)
+    digest = hashlib.sha256(canonical.encode()).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b'=').decode()
+
+
+class KeyRing:
+    """Assina com a chave ativa e valida com qualquer chave do anel.
+
+    As chaves são carregadas e convertidas uma única vez; a validação só
+    escolhe a chave pelo `kid` do cabeçalho, sem I/O nem parse de PEM.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        algorithm: str,
+        secret: str,
+        signing_key=None,
+        verification_keys=(),
+        *,
+        secret_algorithm: str = 'HS256',
+        secret_tokens_valid_until: float | None = None,
+    ):
+        self.algorithm = algorithm
+        self.signing_kid = None
+        self.secret_tokens_valid_until = secret_tokens_valid_until
+        self._secret = secret
+        self._secret_algorithm = (
+            algorithm if signing_key is None else secret_algorithm
+        )
+        self._signing_key = secret
+        # kid -> (chave pública, algoritmo)
+        self._keys: dict[str, tuple[object, str]] = {}
+        jwks = []
+
+        if signing_key is not None:
+            public_keys = [signing_key.public_key(), *verification_keys]
+        else:
+            public_keys = list(verification_keys)
+
+        for public_key in public_keys:
+            key_alg = key_algorithm(public_key, algorithm)
+            jwk = get_default_algorithms()[key_alg].to_jwk(
+                public_key, as_dict=True
+            )
+            kid = thumbprint(jwk)
+            if kid not in self._keys:
+                self._keys[kid] = (public_key, key_alg)
+                jwks.append({**jwk, 'kid': kid, 'alg': key_alg, 'use': 'sig'})
+
+        if signing_key is not None:
+            self.signing_kid = next(iter(self._keys))
+            self._signing_key = signing_key
+            if self._keys[self.signing_kid][1] != algorithm:
+                raise ValueError(
+                    f'ALGORITHM={algorithm} não combina com a chave de '
+                    f'assinatura ({self._keys[self.signing_kid][1]})'
+                )
+            if not secret_algorithm.startswith('HS'):
+                raise ValueError(
+                    f'JWT_SECRET_ALGORITHM={secret_algorithm} não é simétrico'
+                )
+
+        self.jwks = {'keys': jwks}
+
+    @classmethod
+    def from_settings(cls, settings) -> 'KeyRing':
+        signing_key = None
+        valid_until = settings.JWT_SECRET_TOKENS_VALID_UNTIL
+        if settings.JWT_SIGNING_KEY_FILE:
+            signing_key = load_pem_private_key(
+                Path(settings.JWT_SIGNING_KEY_FILE).read_bytes(),
+                password=None,
+            )
+        return cls(
+            algorithm=settings.ALGORITHM,
+            secret=settings.SECRET_KEY,
+            signing_key=signing_key,
+            verification_keys=[
+                load_public_key(path)
+                for path in settings.JWT_VERIFICATION_KEY_FILES
+            ],
+            secret_algorithm=settings.JWT_SECRET_ALGORITHM,
+            # sem fuso, o horário é UTC
+            secret_tokens_valid_until=(
+                valid_until.replace(
+                    tzinfo=valid_until.tzinfo or UTC
+                ).timestamp()
+                if valid_until
+                else None
+            ),
+        )
+
+    def _accepts_secret_tokens(self) -> bool:
+        """Tokens sem `kid` valem sem chave privada ou durante a troca."""
+        if self.signing_kid is None:
+            return True
+        return (
+            self.secret_tokens_valid_until is not None
+            and time.time() < self.secret_tokens_valid_until
+        )
+
+    def encode(self, payload: dict) -> str:
+        headers = {'kid': self.signing_kid} if self.signing_kid else None
+        return jwt.encode(
+            payload,
+            self._signing_key,
+            algorithm=self.algorithm,
+            headers=headers,
+        )
+
+    def decode(self, token: str) -> dict:
+        """Valida assinatura e `exp` (obrigatório); erros são
+        `jwt.InvalidTokenError`."""
+        kid = jwt.get_unverified_header(token).get('kid')
+        if kid is None and self._accepts_secret_tokens():
+            return jwt.decode(
+                token,
+                self._secret,
+                algorithms=[self._secret_algorithm],
+                options=_REQUIRED_CLAIMS,
+            )
+
+        entry = self._keys.get(kid) if isinstance(kid, str) else None
+        if entry is None:
+            raise jwt.InvalidTokenError('kid desconhecido')
+
+        # o algoritmo vem da chave, nunca do cabeçalho do token
+        public_key, key_alg = entry
+        return jwt.decode(
+            token, public_key, algorithms=[key_alg], options=_REQUIRED_CLAIMS
+        )
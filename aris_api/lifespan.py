@@ -0,0 +1,90 @@
+import asyncio
+import contextlib
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from aris_api import database
+from aris_api.revocation import logger, revocation_store, run_sync
+from aris_api.security import (
+    create_access_token,
+    decode_access_token,
+    hash_executor,
+    hash_password_async,
+)
+from aris_api.settings import settings
+
+
+async def _warm_engine(engine, connections: int):
+    """Abre `connections` conexões em paralelo e as devolve ao pool."""
+
+    async def ping():
+        async with engine.connect() as conn:
+            await conn.execute(text('SELECT 1'))
+
+    await asyncio.gather(*(ping() for _ in range(connections)))
+
+
+async def warmup():
+    """Paga o custo de partida antes de a instância receber tráfego."""
+    connections = min(
+        settings.DB_POOL_WARMUP_CONNECTIONS, settings.DB_POOL_SIZE
+    )
+    engines = [database.get_engine(), *database.get_read_router().engines]
+    await asyncio.gather(
+        *(_warm_engine(engine, connections) for engine in engines)
+    )
+
+    # sobe as threads/processos do executor e inicializa o argon2
+    await hash_password_async('aquecimento')
+
+    # primeira assinatura/verificação de JWT carrega o backend do algoritmo
+    decode_access_token(create_access_token({'sub': 'aquecimento'}))
+
+
+async def shutdown():
+    await database.get_engine().dispose()
+    for replica in database.get_read_router().engines:
+        await replica.dispose()
+    hash_executor.shutdown()
+
+
+def _primary_session():
+    return AsyncSession(database.get_engine(), expire_on_commit=False)
+
+
+async def start_revocation_sync() -> asyncio.Task | None:
+    """Carrega os tokens revogados e agenda a sincronização periódica."""
+    interval = settings.REVOCATION_SYNC_SECONDS
+    if interval <= 0:
+        return None
+
+    try:
+        async with _primary_session() as session:
+            await revocation_store.sync(session)
+    except Exception:
+        logger.exception('falha ao carregar tokens revogados')
+    return asyncio.create_task(
+        run_sync(revocation_store, _primary_session, interval)
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ready = False
+    if settings.WARMUP_ON_STARTUP:
+        await warmup()
+    sync_task = await start_revocation_sync()
+    app.state.ready = True
+
+    yield
+
+    # ✅ para de receber tráfego (readiness) antes de fechar as conexões
+    app.state.ready = False
+    if sync_task is not None:
+        sync_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await sync_task
+    await shutdown()
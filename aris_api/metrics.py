@@ -0,0 +1,281 @@
+from bisect import bisect_left
+
+# ✅ buckets em segundos, pré-alocados uma única vez por histograma
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# todas as métricas criadas neste módulo, na ordem de exposição em /metrics
+REGISTRY: list = []
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value))
+
+
+def _braces(labels: str) -> str:
+    return f'{{{labels}}}' if labels else ''
+
+
+def _escape(value) -> str:
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\n', '\\n')
+        .replace('"', '\\"')
+    )
+
+
+class Counter:
+    """Contador monotônico em memória."""
+
+    __slots__ = ('name', 'documentation', 'value')
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.value = 0
+        if registry is not None:
+            registry.append(self)
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def samples(self, labels: str = ''):
+        yield f'{self.name}{_braces(labels)} {_format_value(self.value)}'
+
+
+class Gauge:
+    """Valor instantâneo que pode subir e descer."""
+
+    __slots__ = ('name', 'documentation', 'value')
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.value = 0
+        if registry is not None:
+            registry.append(self)
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+    def samples(self, labels: str = ''):
+        yield f'{self.name}{_braces(labels)} {_format_value(self.value)}'
+
+
+class Histogram:
+    """Histograma com buckets fixos (semântica `le` do Prometheus)."""
+
+    __slots__ = ('name', 'documentation', 'buckets', 'counts', 'sum', 'count')
+    kind = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+        registry=REGISTRY,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        # último slot guarda as observações acima do maior bucket (+Inf)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        if registry is not None:
+            registry.append(self)
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, labels: str = ''):
+        prefix = f'{labels},' if labels else ''
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield (
+                f'{self.name}_bucket{{{prefix}le="{_format_value(bound)}"}} '
+                f'{cumulative}'
+            )
+        yield f'{self.name}_bucket{{{prefix}le="+Inf"}} {self.count}'
+        yield f'{self.name}_sum{_braces(labels)} {_format_value(self.sum)}'
+        yield f'{self.name}_count{_braces(labels)} {self.count}'
+
+
+class Family:
+    """Métrica com rótulos: cada combinação de valores é criada uma vez e
+    reaproveitada nas chamadas seguintes a `labels()`."""
+
+    __slots__ = (
+        'name',
+        'documentation',
+        'kind',
+        'labelnames',
+        'children',
+        '_metric_class',
+        '_options',
+    )
+
+    def __init__(
+        self,
+        metric_class,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...],
+        registry=REGISTRY,
+        **options,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.kind = metric_class.kind
+        self.labelnames = labelnames
+        self.children = {}
+        self._metric_class = metric_class
+        self._options = options
+        if registry is not None:
+            registry.append(self)
+
+    def labels(self, *values):
+        child = self.children.get(values)
+        if child is None:
+            child = self.children[values] = self._metric_class(
+                self.name, self.documentation, registry=None, **self._options
+            )
+        return child
+
+    def samples(self):
+        for values, child in list(self.children.items()):
+            labels = ','.join(
+                f'{name}="{_escape(value)}"'
+                for name, value in zip(self.labelnames, values)
+            )
+            yield from child.samples(labels)
+
+
+def render(registry=REGISTRY) -> str:
+    """Exporta as métricas no formato texto do Prometheus (0.0.4)."""
+    lines = []
+    for metric in registry:
+        help_text = metric.documentation.replace('\\', '\\\\').replace(
+            '\n', '\\n'
+        )
+        lines.append(f'# HELP {metric.name} {help_text}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        lines.extend(metric.samples())
+    return '\n'.join(lines) + '\n'
+
+
+# --- Hash de senhas ---
+password_hash_queue_depth = Gauge(
+    'password_hash_queue_depth',
+    'Operações de hash/verificação aguardando ou em execução no executor.',
+)
+password_hash_seconds = Histogram(
+    'password_hash_seconds',
+    'Latência das operações de hash/verificação de senha (fila + execução).',
+)
+password_hash_rejected_total = Counter(
+    'password_hash_rejected_total',
+    'Operações recusadas porque a fila do executor estava cheia.',
+)
+
+# --- Pool de conexões ---
+db_pool_checkout_seconds = Histogram(
+    'db_pool_checkout_seconds',
+    'Tempo de espera para obter uma conexão do pool.',
+)
+db_pool_connections_in_use = Gauge(
+    'db_pool_connections_in_use',
+    'Conexões emprestadas do pool neste momento.',
+)
+db_pool_timeouts_total = Counter(
+    'db_pool_timeouts_total',
+    'Requisições de conexão que estouraram DB_POOL_TIMEOUT.',
+)
+
+# --- SQL ---
+db_query_seconds = Histogram(
+    'db_query_seconds',
+    'Duração de cada comando SQL enviado ao banco.',
+)
+db_slow_queries_total = Counter(
+    'db_slow_queries_total',
+    'Comandos SQL que passaram de DB_SLOW_QUERY_MS.',
+)
+db_repeated_statements_total = Family(
+    Counter,
+    'db_repeated_statements_total',
+    'Execuções repetidas de um comando idêntico na mesma requisição.',
+    ('method', 'route'),
+)
+
+# --- Single-flight (aris_api.coalesce) ---
+single_flight_shared_total = Family(
+    Counter,
+    'single_flight_shared_total',
+    'Chamadas atendidas pelo resultado de outra idêntica em andamento.',
+    ('name',),
+)
+
+# --- HTTP ---
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+http_requests_in_flight = Gauge(
+    'http_requests_in_flight',
+    'Requisições HTTP sendo processadas neste momento.',
+)
+http_requests_total = Family(
+    Counter,
+    'http_requests_total',
+    'Requisições HTTP atendidas, por rota e status.',
+    ('method', 'route', 'status'),
+)
+http_request_duration_seconds = Family(
+    Histogram,
+    'http_request_duration_seconds',
+    'Latência das requisições HTTP, por rota.',
+    ('method', 'route'),
+)
+http_request_db_queries = Family(
+    Histogram,
+    'http_request_db_queries',
+    'Comandos SQL executados por requisição.',
+    ('method', 'route'),
+    buckets=COUNT_BUCKETS,
+)
+http_request_db_seconds = Family(
+    Histogram,
+    'http_request_db_seconds',
+    'Tempo total em SQL por requisição.',
+    ('method', 'route'),
+)
+http_request_password_hash_seconds = Family(
+    Histogram,
+    'http_request_password_hash_seconds',
+    'Tempo total em hash/verificação de senha por requisição.',
+    ('method', 'route'),
+)
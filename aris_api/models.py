@@ -1,20 +1,117 @@
 from datetime import datetime
 
-from sqlalchemy import func
+from sqlalchemy import DDL, ForeignKey, Index, String, event, func
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import Mapped, mapped_column, registry
+from sqlalchemy.sql.functions import FunctionElement
 
 table_registry = registry()
 
 
+class EmailDomain(FunctionElement):
+    """Domínio do email (o que vem depois do @), em minúsculas.
+
+    A mesma expressão é usada no índice e nas consultas, para que o banco
+    reconheça o índice funcional `ix_users_email_domain`.
+    """
+
+    type = String()
+    inherit_cache = True
+
+
+@compiles(EmailDomain)
+def _email_domain(element, compiler, **kw):
+    email = compiler.process(element.clauses, **kw)
+    return f"lower(split_part({email}, '@', 2))"
+
+
+@compiles(EmailDomain, 'sqlite')
+def _email_domain_sqlite(element, compiler, **kw):
+    email = compiler.process(element.clauses, **kw)
+    return f"lower(substr({email}, instr({email}, '@') + 1))"
+
+
 @table_registry.mapped_as_dataclass
 class User:
     __tablename__ = 'users'
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
-    username: Mapped[str]
+    # ordem binária nos dois bancos (BINARY no SQLite, "C" no PostgreSQL):
+    # ordenação, cursores e busca por prefixo não dependem do locale
+    username: Mapped[str] = mapped_column(
+        String().with_variant(String(collation='C'), 'postgresql'),
+        unique=True,
+        index=True,
+    )
     email: Mapped[str] = mapped_column(unique=True)
     password: Mapped[str]
     created_at: Mapped[datetime] = mapped_column(
         init=False,
         server_default=func.now(),
     )
+
+    # ⚡ filtros da listagem: (created_at, id) também serve de chave para
+    # paginar por data de cadastro
+    __table_args__ = (
+        Index('ix_users_created_at', 'created_at', 'id'),
+        Index('ix_users_email_domain', EmailDomain(email)),
+    )
+
+
+@table_registry.mapped_as_dataclass
+class RefreshToken:
+    __tablename__ = 'refresh_tokens'
+
+    id: Mapped[int] = mapped_column(init=False, primary_key=True)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey('users.id', ondelete='CASCADE'), index=True
+    )
+    # 🔐 só o SHA-256 (hex) do token é guardado, nunca o valor em si
+    token_hash: Mapped[str] = mapped_column(String(64), unique=True)
+    # tokens gerados por rotação a partir do mesmo login
+    family_id: Mapped[str] = mapped_column(String(32), index=True)
+    expires_at: Mapped[datetime]
+    revoked_at: Mapped[datetime | None] = mapped_column(default=None)
+    created_at: Mapped[datetime] = mapped_column(
+        init=False,
+        server_default=func.now(),
+    )
+
+
+@table_registry.mapped_as_dataclass
+class RevokedToken:
+    __tablename__ = 'revoked_tokens'
+
+    id: Mapped[int] = mapped_column(init=False, primary_key=True)
+    jti: Mapped[str] = mapped_column(String(32), unique=True)
+    # a linha pode ser apagada quando o próprio token expira
+    expires_at: Mapped[datetime] = mapped_column(index=True)
+    # cada worker sincroniza o que entrou desde a última leitura (com folga
+    # para commits atrasados; ver aris_api/revocation.py)
+    revoked_at: Mapped[datetime] = mapped_column(
+        init=False,
+        server_default=func.now(),
+        index=True,
+    )
+
+
+@table_registry.mapped_as_dataclass
+class TableVersion:
+    """Contador incrementado a cada escrita na tabela `name`.
+
+    Fica no banco para todos os workers enxergarem o mesmo valor; é dele
+    que saem os ETags de GET /users/.
+    """
+
+    __tablename__ = 'table_versions'
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    version: Mapped[int] = mapped_column(default=0)
+
+
+# a linha de `users` precisa existir para o UPDATE de incremento ter efeito
+event.listen(
+    TableVersion.__table__,
+    'after_create',
+    DDL("INSERT INTO table_versions (name, version) VALUES ('users', 0)"),
+)
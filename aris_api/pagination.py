@@ -0,0 +1,24 @@
+import base64
+import json
+
+
+def encode_cursor(*values) -> str:
+    """Gera um cursor opaco a partir da chave da última linha da página."""
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode()
+
+
+def decode_cursor(cursor: str) -> list:
+    """Decodifica um cursor gerado por `encode_cursor`.
+
+    Levanta `ValueError` quando o cursor foi adulterado ou é inválido.
+    """
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError('cursor inválido') from exc
+
+    if not isinstance(values, list) or not values:
+        raise ValueError('cursor inválido')
+    return values
@@ -0,0 +1,296 @@
+"""Profiling sob demanda de requisições, para investigar rotas lentas.
+
+Com `PROFILING_ENABLED`, uma requisição é perfilada quando traz o cabeçalho
+`X-Debug-Profile` assinado com `PROFILING_SECRET` (ver `sign_profile_token`
+ou `python -m aris_api.profiling`) ou quando o sorteio de
+`PROFILING_SAMPLE_RATE` cai nela. Fora disso o custo é o de ler uma
+configuração por requisição.
+
+Cada requisição perfilada gera, em `PROFILING_DIR`:
+
+- `.prof` (modo `cprofile`): estatísticas do pstats, para snakeviz ou
+  `python -m pstats`;
+- `.collapsed` (modo `sampling`): pilhas amostradas da thread do event
+  loop, no formato do flamegraph.pl/speedscope;
+- `.txt`: resumo com o tempo da rota, o SQL e o argon2 da requisição
+  (`RequestStats`) e o tempo das dependências, do JWT, do argon2 e do SQL
+  vistos pelo profiler.
+
+Só uma requisição é perfilada por vez em cada processo. As outras
+requisições que rodarem no mesmo event loop nesse intervalo também
+aparecem no perfil. O argon2 roda no executor, fora da thread do loop: no
+perfil ele aparece como espera em `hash_password_async`/`verify_*`, e o
+tempo real vem do `RequestStats`.
+"""
+
+import argparse
+import asyncio
+import cProfile
+import hashlib
+import hmac
+import io
+import itertools
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from time import perf_counter
+
+from aris_api.instrumentation import request_stats
+from aris_api.settings import settings
+
+PROFILE_HEADER = b'x-debug-profile'
+
+# funções que o resumo destaca: regex sobre "arquivo:linha(nome)" no pstats
+# e sobre "modulo/caminho(nome)" nas pilhas amostradas
+FOCUS = {
+    'dependências': r'\((get_session|get_read_session|'
+    r'get_current_user|get_current_token)\)',
+    'jwt': r'(jwt/.*\((encode|decode)|\((create|decode)_access_token)\)',
+    'argon2': r'\((hash_password_async|hash_passwords_async|'
+    r'verify_password_async|verify_and_update_password_async)\)',
+    'sql': r'sqlalchemy/ext/asyncio/.*'
+    r'\((execute|scalar|scalars|stream|commit)\)',
+}
+
+_sequence = itertools.count()
+
+
+def sign_profile_token(secret: str, ttl_seconds: float = 300) -> str:
+    """Valor do cabeçalho X-Debug-Profile válido por `ttl_seconds`."""
+    expires = str(int(time.time() + ttl_seconds))
+    signature = hmac.new(secret.encode(), expires.encode(), hashlib.sha256)
+    return f'{expires}.{signature.hexdigest()}'
+
+
+def verify_profile_token(secret: str | None, token: str) -> bool:
+    if not secret:
+        return False
+
+    expires, _, signature = token.partition('.')
+    # isdigit() sozinho aceita '²' (o cabeçalho chega como latin-1)
+    if not (expires.isascii() and expires.isdigit()):
+        return False
+    if int(expires) < time.time():
+        return False
+    expected = hmac.new(secret.encode(), expires.encode(), hashlib.sha256)
+    return hmac.compare_digest(signature, expected.hexdigest())
+
+
+def _frame_name(frame) -> str:
+    module = frame.f_globals.get('__name__', '?')
+    return f'{module}:{frame.f_code.co_qualname}'
+
+
+def _focus_name(frame_name: str) -> str:
+    """`aris_api.security:get_current_user` -> `aris_api/security(get_...)`,
+    comparável com os padrões de FOCUS."""
+    module, _, qualname = frame_name.partition(':')
+    return f'{module.replace(".", "/")}({qualname.rpartition(".")[2]})'
+
+
+class StackSampler:
+    """Amostra a pilha de uma thread a cada `interval` segundos."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name='stack-sampler', daemon=True
+        )
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        return ''.join(
+            f'{stack} {count}\n' for stack, count in self.stacks.most_common()
+        )
+
+    def share(self, pattern: str) -> float:
+        """Fração das amostras com alguma função que casa com `pattern`."""
+        total = sum(self.stacks.values())
+        if not total:
+            return 0.0
+        regex = re.compile(pattern)
+        hits = sum(
+            count
+            for stack, count in self.stacks.items()
+            if any(
+                regex.search(_focus_name(name)) for name in stack.split(';')
+            )
+        )
+        return hits / total
+
+
+def _wanted(scope) -> bool:
+    if settings.PROFILING_SECRET:
+        for name, value in scope['headers']:
+            if name == PROFILE_HEADER:
+                return verify_profile_token(
+                    settings.PROFILING_SECRET, value.decode('latin-1')
+                )
+    return random.random() < settings.PROFILING_SAMPLE_RATE
+
+
+class ProfilingMiddleware:
+    """Middleware ASGI que perfila requisições sorteadas ou assinadas.
+
+    Deve ficar dentro do `MetricsMiddleware`, para ler o `RequestStats`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._busy = False
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope['type'] != 'http'
+            or not settings.PROFILING_ENABLED
+            or self._busy
+            or not _wanted(scope)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        self._busy = True
+        profiler = sampler = None
+        if settings.PROFILING_MODE == 'sampling':
+            sampler = StackSampler(
+                threading.get_ident(), settings.PROFILING_INTERVAL_MS / 1000
+            )
+            sampler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+            if sampler is not None:
+                sampler.stop()
+            self._busy = False
+
+            route = scope.get('route')
+            header = {
+                'rota': f'{scope["method"]} '
+                f'{route.path if route else scope["path"]}',
+                'status': status,
+                'tempo total (ms)': f'{elapsed * 1000:.2f}',
+            }
+            stats = request_stats.get()
+            if stats is not None:
+                header |= {
+                    'comandos SQL': stats.queries,
+                    'tempo em SQL (ms)': f'{stats.db_seconds * 1000:.2f}',
+                    'tempo em argon2 (ms)': f'{stats.hash_seconds * 1000:.2f}',
+                }
+            await asyncio.to_thread(
+                write_profile,
+                Path(settings.PROFILING_DIR),
+                _profile_name(scope, route),
+                header,
+                profiler,
+                sampler,
+            )
+
+
+def _profile_name(scope, route) -> str:
+    path = route.path if route is not None else scope['path']
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', path).strip('_') or 'root'
+    return (
+        f'profile-{time.strftime("%Y%m%dT%H%M%S")}-{os.getpid()}-'
+        f'{next(_sequence):06d}-{scope["method"]}-{slug}'
+    )
+
+
+def _summary(header: dict, profiler, sampler) -> str:
+    out = io.StringIO()
+    for key, value in header.items():
+        print(f'{key}: {value}', file=out)
+
+    if sampler is not None:
+        print(
+            f'\namostras: {sum(sampler.stacks.values())} '
+            f'(a cada {sampler.interval * 1000:g} ms)',
+            file=out,
+        )
+        for name, pattern in FOCUS.items():
+            print(f'{name:<14} {sampler.share(pattern):>7.1%}', file=out)
+        return out.getvalue()
+
+    stats = pstats.Stats(profiler, stream=out)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE)
+    for name, pattern in FOCUS.items():
+        print(f'\n=== {name} ===', file=out)
+        stats.print_stats(pattern)
+    print('\n=== top 30 (tempo acumulado) ===', file=out)
+    stats.print_stats(30)
+    return out.getvalue()
+
+
+def write_profile(directory: Path, name: str, header: dict, profiler, sampler):
+    """Grava o perfil e o resumo; mantém só os PROFILING_MAX_FILES
+    perfis mais recentes."""
+    directory.mkdir(parents=True, exist_ok=True)
+    if profiler is not None:
+        profiler.dump_stats(directory / f'{name}.prof')
+    if sampler is not None:
+        (directory / f'{name}.collapsed').write_text(sampler.collapsed())
+    (directory / f'{name}.txt').write_text(_summary(header, profiler, sampler))
+
+    # os nomes começam pelo horário: a ordem alfabética é a cronológica
+    profiles = sorted(path.stem for path in directory.glob('profile-*.txt'))
+    for stem in profiles[
+        : max(len(profiles) - settings.PROFILING_MAX_FILES, 0)
+    ]:
+        for path in directory.glob(f'{stem}.*'):
+            path.unlink(missing_ok=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Gera o valor do cabeçalho X-Debug-Profile.'
+    )
+    parser.add_argument('--ttl', type=float, default=300, help='segundos')
+    args = parser.parse_args()
+    if not settings.PROFILING_SECRET:
+        parser.error('defina PROFILING_SECRET')
+    print(sign_profile_token(settings.PROFILING_SECRET, args.ttl))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from time import monotonic
+
+from aris_api.settings import settings
+
+
+class RateLimitBackend(ABC):
+    """Armazenamento dos baldes de fichas (token bucket).
+
+    A implementação em memória vale por processo; um backend compartilhado
+    (ex.: Redis) só precisa implementar estes dois métodos; sem algum deles
+    a classe não pode ser instanciada.
+    """
+
+    @abstractmethod
+    async def consume(
+        self, key: str, capacity: float, refill_per_second: float
+    ) -> float:
+        """Consome uma ficha do balde `key`.
+
+        Retorna 0 quando a ficha foi concedida ou, caso contrário, quantos
+        segundos faltam para a próxima ficha.
+        """
+
+    @abstractmethod
+    async def reset(self, key: str):
+        """Esvazia o registro do balde `key` (volta a ficar cheio)."""
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Baldes em um dict LRU limitado a `max_keys` chaves.
+
+    Ao passar do limite, sai o balde mais antigo que não esteja bloqueado:
+    girar por nomes ou IPs descartáveis não apaga o balde de quem já foi
+    barrado. Só `EVICTION_SCAN` baldes são examinados por vez; se todos
+    estiverem bloqueados, sai o mais antigo.
+    """
+
+    EVICTION_SCAN = 32
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        # chave -> (fichas, atualizado em, próxima ficha em)
+        self._buckets: OrderedDict[str, tuple[float, float, float]] = (
+            OrderedDict()
+        )
+
+    async def consume(
+        self, key: str, capacity: float, refill_per_second: float
+    ) -> float:
+        now = monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            tokens = capacity
+        else:
+            tokens, updated_at, _ = bucket
+            tokens = min(
+                capacity, tokens + (now - updated_at) * refill_per_second
+            )
+
+        granted = tokens >= 1
+        if granted:
+            tokens -= 1
+        wait = max(0.0, 1 - tokens) / refill_per_second
+        # recusada ou não, a requisição renova a posição do balde no LRU
+        self._buckets[key] = (tokens, now, now + wait)
+        self._buckets.move_to_end(key)
+        if len(self._buckets) > self.max_keys:
+            self._evict(now)
+        return 0.0 if granted else wait
+
+    def _evict(self, now: float):
+        for _ in range(min(self.EVICTION_SCAN, len(self._buckets))):
+            key, (_, _, available_at) = next(iter(self._buckets.items()))
+            if available_at <= now:
+                del self._buckets[key]
+                return
+            self._buckets.move_to_end(key)
+        self._buckets.popitem(last=False)
+
+    async def reset(self, key: str):
+        self._buckets.pop(key, None)
+
+
+class LoginThrottle:
+    """Limita tentativas de login por usuário e por IP de origem."""
+
+    def __init__(
+        self,
+        backend: RateLimitBackend,
+        attempts: int,
+        ip_attempts: int,
+        window_seconds: float,
+    ):
+        self.backend = backend
+        self.attempts = attempts
+        self.ip_attempts = ip_attempts
+        self.window_seconds = window_seconds
+
+    @staticmethod
+    def _user_key(username: str) -> str:
+        return f'login:user:{username.strip().lower()}'
+
+    async def check(self, username: str, client_ip: str) -> float:
+        """Retorna 0 se a tentativa pode seguir, ou o Retry-After em
+        segundos."""
+        retry_after = await self.backend.consume(
+            self._user_key(username),
+            self.attempts,
+            self.attempts / self.window_seconds,
+        )
+        if retry_after:
+            return retry_after
+
+        return await self.backend.consume(
+            f'login:ip:{client_ip}',
+            self.ip_attempts,
+            self.ip_attempts / self.window_seconds,
+        )
+
+    async def reset_user(self, username: str):
+        await self.backend.reset(self._user_key(username))
+
+
+login_throttle = LoginThrottle(
+    InMemoryRateLimitBackend(),
+    attempts=settings.LOGIN_RATE_LIMIT_ATTEMPTS,
+    ip_attempts=settings.LOGIN_RATE_LIMIT_IP_ATTEMPTS,
+    window_seconds=settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS,
+)
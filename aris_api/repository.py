@@ -0,0 +1,461 @@
+"""Acesso a dados de usuários e tokens sem o identity map do ORM.
+
+As consultas usam o SQLAlchemy Core sobre as tabelas dos modelos, selecionam
+apenas as colunas necessárias e devolvem tuplas (`Row`) ou registros com
+`__slots__`. As instruções são montadas uma única vez, com `bindparam`, para
+que a engine reaproveite a compilação em cache a cada requisição.
+"""
+
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+from functools import cache
+
+from sqlalchemy import (
+    bindparam,
+    delete,
+    insert,
+    or_,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from aris_api.models import (
+    EmailDomain,
+    RefreshToken,
+    RevokedToken,
+    TableVersion,
+    User,
+)
+
+users = User.__table__
+refresh_tokens = RefreshToken.__table__
+revoked_tokens = RevokedToken.__table__
+table_versions = TableVersion.__table__
+
+
+@dataclass(frozen=True, slots=True)
+class UserRecord:
+    id: int
+    username: str
+    email: str
+
+
+@dataclass(frozen=True, slots=True)
+class UserCredentials:
+    id: int
+    email: str
+    password: str
+
+
+PUBLIC_COLUMNS = (users.c.id, users.c.username, users.c.email)
+PUBLIC_FIELDS = tuple(column.name for column in PUBLIC_COLUMNS)
+
+_USER_BY_EMAIL = select(*PUBLIC_COLUMNS).where(
+    users.c.email == bindparam('email')
+)
+_CREDENTIALS_BY_LOGIN = select(
+    users.c.id, users.c.email, users.c.password
+).where(
+    (users.c.email == bindparam('login'))
+    | (users.c.username == bindparam('login'))
+)
+_USER_EXISTS = select(users.c.id).where(users.c.id == bindparam('user_id'))
+# chave de ordenação de cada `sort` da listagem; o id desempata o que não é
+# único
+SORT_KEYS = {
+    'id': (users.c.id,),
+    'username': (users.c.username,),
+    'created_at': (users.c.created_at, users.c.id),
+}
+# ✅ cada filtro é uma faixa ou igualdade sobre uma coluna (ou expressão)
+# indexada
+_USER_FILTERS = {
+    'username_prefix': (
+        users.c.username >= bindparam('username_from'),
+        users.c.username < bindparam('username_to'),
+    ),
+    'email_domain': (EmailDomain(users.c.email) == bindparam('email_domain'),),
+    'created_after': (users.c.created_at >= bindparam('created_after'),),
+    'created_before': (users.c.created_at < bindparam('created_before'),),
+}
+_EXPORT_USERS = select(*PUBLIC_COLUMNS, users.c.created_at).order_by(
+    users.c.id
+)
+_INSERT_USER = insert(users).returning(*PUBLIC_COLUMNS)
+_INSERT_USERS = insert(users).returning(
+    *PUBLIC_COLUMNS, sort_by_parameter_order=True
+)
+_UPDATE_USER = (
+    update(users)
+    .where(users.c.id == bindparam('user_id'))
+    .values(
+        username=bindparam('new_username'),
+        email=bindparam('new_email'),
+        password=bindparam('new_password'),
+    )
+    .returning(*PUBLIC_COLUMNS)
+)
+_UPDATE_PASSWORD = (
+    update(users)
+    .where(users.c.id == bindparam('user_id'))
+    .values(password=bindparam('new_password'))
+)
+_DELETE_USER = (
+    delete(users)
+    .where(users.c.id == bindparam('user_id'))
+    .returning(users.c.id)
+)
+_EMAIL_BY_ID = select(users.c.email).where(users.c.id == bindparam('user_id'))
+
+_TABLE_VERSION = select(table_versions.c.version).where(
+    table_versions.c.name == bindparam('table')
+)
+_BUMP_TABLE_VERSION = (
+    update(table_versions)
+    .where(table_versions.c.name == bindparam('table'))
+    .values(version=table_versions.c.version + 1)
+)
+
+_INSERT_REFRESH_TOKEN = insert(refresh_tokens)
+# ✅ consome o token numa única instrução: duas renovações simultâneas com o
+# mesmo token não conseguem as duas passar
+_CONSUME_REFRESH_TOKEN = (
+    update(refresh_tokens)
+    .where(
+        refresh_tokens.c.token_hash == bindparam('hash'),
+        refresh_tokens.c.revoked_at.is_(None),
+        refresh_tokens.c.expires_at > bindparam('now'),
+    )
+    .values(revoked_at=bindparam('now'))
+    .returning(refresh_tokens.c.user_id, refresh_tokens.c.family_id)
+)
+_REVOKED_REFRESH_FAMILY = select(refresh_tokens.c.family_id).where(
+    refresh_tokens.c.token_hash == bindparam('hash'),
+    refresh_tokens.c.revoked_at.is_not(None),
+)
+_REVOKE_REFRESH_FAMILY = (
+    update(refresh_tokens)
+    .where(
+        refresh_tokens.c.family_id == bindparam('family'),
+        refresh_tokens.c.revoked_at.is_(None),
+    )
+    .values(revoked_at=bindparam('now'))
+)
+_INSERT_REVOKED_TOKEN = insert(revoked_tokens)
+_TOKEN_REVOKED = select(revoked_tokens.c.id).where(
+    revoked_tokens.c.jti == bindparam('jti')
+)
+_REVOKED_TOKENS_SINCE = select(
+    revoked_tokens.c.jti,
+    revoked_tokens.c.expires_at,
+    revoked_tokens.c.revoked_at,
+).where(
+    revoked_tokens.c.revoked_at >= bindparam('since'),
+    revoked_tokens.c.expires_at > bindparam('now'),
+)
+_DELETE_EXPIRED_REVOKED_TOKENS = delete(revoked_tokens).where(
+    revoked_tokens.c.expires_at <= bindparam('now')
+)
+_REVOKE_USER_REFRESH_TOKENS = (
+    update(refresh_tokens)
+    .where(
+        refresh_tokens.c.user_id == bindparam('owner_id'),
+        refresh_tokens.c.revoked_at.is_(None),
+    )
+    .values(revoked_at=bindparam('now'))
+)
+
+
+async def get_user_by_email(
+    session: AsyncSession, email: str
+) -> UserRecord | None:
+    row = (await session.execute(_USER_BY_EMAIL, {'email': email})).first()
+    return UserRecord(*row) if row else None
+
+
+async def get_credentials(
+    session: AsyncSession, login: str
+) -> UserCredentials | None:
+    """Busca id/email/hash pelo email ou pelo nome de usuário."""
+    row = (
+        await session.execute(_CREDENTIALS_BY_LOGIN, {'login': login})
+    ).first()
+    return UserCredentials(*row) if row else None
+
+
+async def user_exists(session: AsyncSession, user_id: int) -> bool:
+    return await session.scalar(_USER_EXISTS, {'user_id': user_id}) is not None
+
+
+@cache
+def list_users_statement(
+    sort: str, filters: frozenset[str], keyset: bool = False
+):
+    """Consulta da listagem, montada uma vez por combinação de parâmetros.
+
+    `sort` é um nome de `SORT_KEYS`, com `-` na frente para ordem
+    decrescente. Com `keyset`, a página começa depois da chave
+    `after_0, after_1, ...`; sem ele, usa `offset`.
+    """
+    descending = sort.startswith('-')
+    keys = SORT_KEYS[sort.removeprefix('-')]
+    # a chave de ordenação volta junto para montar o próximo cursor
+    statement = select(
+        *PUBLIC_COLUMNS,
+        *(key for key in keys if key.name not in PUBLIC_FIELDS),
+    )
+    for name in sorted(filters):
+        statement = statement.where(*_USER_FILTERS[name])
+
+    if keyset:
+        # tipados como a coluna: o DateTime do SQLite é comparado como texto
+        after = [
+            bindparam(f'after_{i}', type_=key.type)
+            for i, key in enumerate(keys)
+        ]
+        row, start = tuple_(*keys), tuple_(*after)
+        if len(keys) == 1:
+            row, start = keys[0], after[0]
+        statement = statement.where(row < start if descending else row > start)
+    else:
+        statement = statement.offset(bindparam('offset'))
+
+    return statement.order_by(
+        *(key.desc() if descending else key for key in keys)
+    ).limit(bindparam('limit'))
+
+
+_SURROGATES = range(0xD800, 0xE000)
+
+
+def _prefix_range(prefix: str) -> tuple[str, str]:
+    """Faixa `[início, fim)` das strings que começam com `prefix`.
+
+    Com a ordem binária de `users.username` (BINARY no SQLite, collation
+    "C" declarada em `User` no PostgreSQL) a busca por prefixo vira uma
+    faixa do índice, sem LIKE. Numa collation de idioma (en_US, pt_BR) a
+    faixa também pegaria "ABC" para o prefixo "ab".
+    """
+    following = ord(prefix[-1]) + 1
+    if following > sys.maxunicode:
+        return prefix, prefix + chr(sys.maxunicode)
+    if following in _SURROGATES:
+        following = _SURROGATES.stop
+    return prefix, prefix[:-1] + chr(following)
+
+
+async def list_users(  # noqa: PLR0913
+    session: AsyncSession,
+    limit: int,
+    offset: int = 0,
+    after: tuple | None = None,
+    sort: str = 'id',
+    *,
+    username_prefix: str | None = None,
+    email_domain: str | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+):
+    """Página de usuários filtrada; keyset quando `after` é informado.
+
+    `after` é a chave de ordenação (ver `SORT_KEYS`) da última linha da
+    página anterior.
+    """
+    values = {
+        'email_domain': email_domain,
+        'created_after': created_after,
+        'created_before': created_before,
+    }
+    params = {
+        'limit': limit,
+        **{name: value for name, value in values.items() if value is not None},
+    }
+    filters = set(params) - {'limit'}
+    if username_prefix:
+        params['username_from'], params['username_to'] = _prefix_range(
+            username_prefix
+        )
+        filters.add('username_prefix')
+
+    if after is None:
+        params['offset'] = offset
+    else:
+        params.update((f'after_{i}', value) for i, value in enumerate(after))
+
+    statement = list_users_statement(
+        sort, frozenset(filters), keyset=after is not None
+    )
+    result = await session.execute(statement, params)
+    return result.all()
+
+
+async def stream_users(session: AsyncSession, chunk_size: int):
+    return await session.stream(
+        _EXPORT_USERS.execution_options(yield_per=chunk_size)
+    )
+
+
+async def find_taken(
+    session: AsyncSession, usernames: set[str], emails: set[str]
+):
+    """Nomes de usuário e emails, dentre os informados, já cadastrados."""
+    result = await session.execute(
+        select(users.c.username, users.c.email).where(
+            or_(users.c.username.in_(usernames), users.c.email.in_(emails))
+        )
+    )
+    return result.all()
+
+
+async def insert_user(
+    session: AsyncSession, username: str, email: str, password: str
+) -> UserRecord:
+    result = await session.execute(
+        _INSERT_USER,
+        {'username': username, 'email': email, 'password': password},
+    )
+    return UserRecord(*result.one())
+
+
+async def insert_users(session: AsyncSession, rows: list[dict]):
+    """INSERT ... RETURNING em lote, na mesma ordem de `rows`."""
+    return (await session.execute(_INSERT_USERS, rows)).all()
+
+
+async def update_user(
+    session: AsyncSession,
+    user_id: int,
+    username: str,
+    email: str,
+    password: str,
+) -> UserRecord | None:
+    result = await session.execute(
+        _UPDATE_USER,
+        {
+            'user_id': user_id,
+            'new_username': username,
+            'new_email': email,
+            'new_password': password,
+        },
+    )
+    row = result.first()
+    return UserRecord(*row) if row else None
+
+
+async def update_password(session: AsyncSession, user_id: int, password: str):
+    await session.execute(
+        _UPDATE_PASSWORD, {'user_id': user_id, 'new_password': password}
+    )
+
+
+async def delete_user(session: AsyncSession, user_id: int) -> bool:
+    result = await session.execute(_DELETE_USER, {'user_id': user_id})
+    return result.first() is not None
+
+
+async def get_email(session: AsyncSession, user_id: int) -> str | None:
+    return await session.scalar(_EMAIL_BY_ID, {'user_id': user_id})
+
+
+# --- Versões das tabelas ---
+async def get_table_version(session: AsyncSession, table: str) -> int:
+    """Versão atual de `table`; lida na mesma transação dos dados.
+
+    Lida uma vez por sessão: a autenticação e a rota dividem a leitura.
+    """
+    versions = session.info.setdefault('table_versions', {})
+    if table not in versions:
+        versions[table] = (
+            await session.scalar(_TABLE_VERSION, {'table': table}) or 0
+        )
+    return versions[table]
+
+
+async def bump_table_version(session: AsyncSession, table: str):
+    """Incrementa a versão de `table` dentro da transação da escrita."""
+    session.info.get('table_versions', {}).pop(table, None)
+    await session.execute(_BUMP_TABLE_VERSION, {'table': table})
+
+
+# --- Refresh tokens ---
+async def insert_refresh_token(
+    session: AsyncSession,
+    user_id: int,
+    token_hash: str,
+    family_id: str,
+    expires_at: datetime,
+):
+    await session.execute(
+        _INSERT_REFRESH_TOKEN,
+        {
+            'user_id': user_id,
+            'token_hash': token_hash,
+            'family_id': family_id,
+            'expires_at': expires_at,
+        },
+    )
+
+
+async def consume_refresh_token(
+    session: AsyncSession, token_hash: str, now: datetime
+):
+    """Revoga o token se ainda válido; devolve `(user_id, family_id)`."""
+    result = await session.execute(
+        _CONSUME_REFRESH_TOKEN, {'hash': token_hash, 'now': now}
+    )
+    return result.first()
+
+
+async def get_revoked_refresh_family(
+    session: AsyncSession, token_hash: str
+) -> str | None:
+    """Família de um token que já foi usado ou revogado (reuso)."""
+    return await session.scalar(_REVOKED_REFRESH_FAMILY, {'hash': token_hash})
+
+
+async def revoke_refresh_family(
+    session: AsyncSession, family_id: str, now: datetime
+):
+    await session.execute(
+        _REVOKE_REFRESH_FAMILY, {'family': family_id, 'now': now}
+    )
+
+
+async def revoke_user_refresh_tokens(
+    session: AsyncSession, user_id: int, now: datetime
+):
+    await session.execute(
+        _REVOKE_USER_REFRESH_TOKENS, {'owner_id': user_id, 'now': now}
+    )
+
+
+# --- Tokens de acesso revogados ---
+async def insert_revoked_token(
+    session: AsyncSession, jti: str, expires_at: datetime
+):
+    await session.execute(
+        _INSERT_REVOKED_TOKEN, {'jti': jti, 'expires_at': expires_at}
+    )
+
+
+async def is_token_revoked(session: AsyncSession, jti: str) -> bool:
+    return await session.scalar(_TOKEN_REVOKED, {'jti': jti}) is not None
+
+
+async def revoked_tokens_since(
+    session: AsyncSession, since: datetime | None, now: datetime
+):
+    """Revogações ainda não expiradas feitas a partir de `since` (todas,
+    com `None`)."""
+    result = await session.execute(
+        _REVOKED_TOKENS_SINCE,
+        {'since': since or datetime.min, 'now': now},
+    )
+    return result.all()
+
+
+async def delete_expired_revoked_tokens(session: AsyncSession, now: datetime):
+    await session.execute(_DELETE_EXPIRED_REVOKED_TOKENS, {'now': now})
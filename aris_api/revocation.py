@@ -0,0 +1,236 @@
+"""Lista de tokens de acesso revogados (logout).
+
+A fonte da verdade é a tabela `revoked_tokens`. Cada worker mantém na
+memória filtros de Bloom com os `jti` revogados, agrupados pelo minuto em
+que o token expira: a consulta só olha o grupo do `exp` do token e o grupo
+inteiro é descartado quando esse minuto passa. Quase todo token não está
+revogado, e para esses a verificação custa alguns microssegundos, sem ir ao
+banco; só um "talvez" do filtro é confirmado com uma consulta.
+
+Os workers leem as revogações novas a cada `REVOCATION_SYNC_SECONDS`; um
+logout feito em outro worker (ou lido de uma réplica atrasada) pode levar
+esse tempo para valer aqui. A leitura é por `revoked_at` e volta
+`REVOCATION_SYNC_MARGIN_SECONDS` antes da última revogação vista: uma
+transação pode confirmar depois de outra que começou mais tarde (no
+PostgreSQL o id e o `now()` saem no INSERT, não no commit), e seguir só o
+maior id já lido perderia essa revogação para sempre.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from aris_api import repository
+from aris_api.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Filtro de Bloom de tamanho fixo: sem falsos negativos e com taxa de
+    falsos positivos `error_rate` até `capacity` elementos."""
+
+    __slots__ = ('capacity', 'count', 'size', 'hashes', 'bits')
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.count = 0
+        self.size = math.ceil(
+            -capacity * math.log(error_rate) / math.log(2) ** 2
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    @staticmethod
+    def hash(key: str) -> tuple[int, int]:
+        """Par de hashes para o double hashing (Kirsch-Mitzenmacher).
+
+        Usa o `hash()` do Python (SipHash, 64 bits, já em cache na string):
+        ele muda a cada processo, o que não importa porque os filtros só
+        existem na memória do worker.
+        """
+        value = hash(key) & 0xFFFF_FFFF_FFFF_FFFF
+        return value >> 32, (value & 0xFFFF_FFFF) | 1
+
+    def add(self, hashed: tuple[int, int]):
+        first, second = hashed
+        bits, size = self.bits, self.size
+        for i in range(self.hashes):
+            position = (first + i * second) % size
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, hashed: tuple[int, int]) -> bool:
+        first, second = hashed
+        bits, size = self.bits, self.size
+        # ⚡ token não revogado costuma parar no primeiro ou segundo bit
+        for i in range(self.hashes):
+            position = (first + i * second) % size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class RevocationList:
+    """`jti` revogados, em filtros de Bloom agrupados pela expiração.
+
+    Cada grupo começa com um filtro de `initial_capacity`; quando ele enche,
+    outro `GROWTH` vezes maior e com metade da taxa de erro é encadeado
+    (filtro de Bloom escalável), e a taxa do grupo fica abaixo de
+    `error_rate`.
+    """
+
+    GROWTH = 4
+
+    def __init__(
+        self,
+        bucket_seconds: int = 60,
+        error_rate: float = 0.001,
+        initial_capacity: int = 4096,
+    ):
+        self.bucket_seconds = bucket_seconds
+        self.error_rate = error_rate
+        self.initial_capacity = initial_capacity
+        self._buckets: dict[int, list[BloomFilter]] = {}
+
+    def __len__(self):
+        return sum(
+            bloom.count
+            for filters in self._buckets.values()
+            for bloom in filters
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            len(bloom.bits)
+            for filters in self._buckets.values()
+            for bloom in filters
+        )
+
+    def add(self, jti: str, exp: float):
+        if exp <= time.time():
+            return
+
+        filters = self._buckets.setdefault(int(exp // self.bucket_seconds), [])
+        if not filters or filters[-1].count >= filters[-1].capacity:
+            filters.append(
+                BloomFilter(
+                    self.initial_capacity * self.GROWTH ** len(filters),
+                    self.error_rate / 2 ** (len(filters) + 1),
+                )
+            )
+        filters[-1].add(BloomFilter.hash(jti))
+
+    def might_contain(self, jti: str, exp: float) -> bool:
+        filters = self._buckets.get(int(exp // self.bucket_seconds))
+        if filters is None:
+            return False
+        hashed = BloomFilter.hash(jti)
+        return any(hashed in bloom for bloom in filters)
+
+    def expire(self, now: float | None = None):
+        """Descarta os grupos cujos tokens já expiraram todos."""
+        current = int(
+            (time.time() if now is None else now) // self.bucket_seconds
+        )
+        for bucket in [b for b in self._buckets if b < current]:
+            del self._buckets[bucket]
+
+    def clear(self):
+        self._buckets.clear()
+
+
+def _to_db(exp: float) -> datetime:
+    return datetime.fromtimestamp(exp, UTC).replace(tzinfo=None)
+
+
+def _from_db(expires_at: datetime) -> float:
+    return expires_at.replace(tzinfo=UTC).timestamp()
+
+
+class RevocationStore:
+    """Filtros em memória na frente da tabela `revoked_tokens`."""
+
+    def __init__(
+        self, revocations: RevocationList, margin_seconds: float = 60
+    ):
+        self.revocations = revocations
+        self.margin = timedelta(seconds=margin_seconds)
+        # maior revoked_at já lido (relógio do banco)
+        self.synced_until: datetime | None = None
+        # jti lidos dentro da janela, para não entrarem duas vezes no filtro
+        self._recent: dict[str, datetime] = {}
+
+    async def revoke(self, session: AsyncSession, jti: str, exp: float):
+        """Grava a revogação (o commit fica com quem chamou) e já passa a
+        recusar o token neste worker."""
+        await repository.insert_revoked_token(session, jti, _to_db(exp))
+        self.revocations.add(jti, exp)
+
+    async def is_revoked(
+        self, session: AsyncSession, jti: str, exp: float
+    ) -> bool:
+        if not self.revocations.might_contain(jti, exp):
+            return False
+        # "talvez": pode ser falso positivo do filtro, confirma no banco
+        return await repository.is_token_revoked(session, jti)
+
+    async def sync(self, session: AsyncSession):
+        """Carrega as revogações novas e apaga as que já expiraram."""
+        now = time.time()
+        since = (
+            None
+            if self.synced_until is None
+            else self.synced_until - self.margin
+        )
+        rows = await repository.revoked_tokens_since(
+            session, since, _to_db(now)
+        )
+        for row in rows:
+            if row.jti not in self._recent:
+                self.revocations.add(row.jti, _from_db(row.expires_at))
+            self._recent[row.jti] = row.revoked_at
+            if self.synced_until is None or row.revoked_at > self.synced_until:
+                self.synced_until = row.revoked_at
+
+        if self.synced_until is not None:
+            horizon = self.synced_until - self.margin
+            self._recent = {
+                jti: revoked_at
+                for jti, revoked_at in self._recent.items()
+                if revoked_at >= horizon
+            }
+        self.revocations.expire(now)
+        await repository.delete_expired_revoked_tokens(session, _to_db(now))
+        await session.commit()
+
+    def reset(self):
+        self.revocations.clear()
+        self.synced_until = None
+        self._recent.clear()
+
+
+async def run_sync(store: RevocationStore, session_factory, interval: float):
+    """Sincroniza `store` a cada `interval` segundos até ser cancelado."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with session_factory() as session:
+                await store.sync(session)
+        except Exception:
+            # banco fora do ar: mantém o que já tem e tenta de novo depois
+            logger.exception('falha ao sincronizar tokens revogados')
+
+
+revocation_store = RevocationStore(
+    RevocationList(
+        bucket_seconds=settings.REVOCATION_BUCKET_SECONDS,
+        error_rate=settings.REVOCATION_ERROR_RATE,
+    ),
+    margin_seconds=settings.REVOCATION_SYNC_MARGIN_SECONDS,
+)
@@ -1,43 +1,195 @@
+import math
+from datetime import timedelta
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from aris_api.database import get_session
-from aris_api.models import User
-from aris_api.schemas import Token
-from aris_api.security import create_access_token, verify_password
+from aris_api import repository
+from aris_api.database import get_read_session, get_session
+from aris_api.ratelimit import login_throttle
+from aris_api.revocation import revocation_store
+from aris_api.schemas import Message, RefreshTokenRequest, Token
+from aris_api.security import (
+    CurrentToken,
+    create_access_token,
+    get_current_token,
+    hash_refresh_token,
+    new_refresh_token,
+    new_token_family,
+    utcnow,
+    verify_and_update_password_async,
+)
+from aris_api.settings import settings
 
 router = APIRouter(prefix='/auth', tags=['auth'])
 
 # ✅ Define dependências com Annotated (boa prática atual)
 FormData = Annotated[OAuth2PasswordRequestForm, Depends()]
 SessionDep = Annotated[AsyncSession, Depends(get_session)]
+ReadSessionDep = Annotated[AsyncSession, Depends(get_read_session)]
 
 
-@router.post('/token', response_model=Token)
+async def throttle_login(request: Request, form_data: FormData):
+    """Recusa tentativas acima do limite antes de qualquer SQL ou argon2."""
+    if not settings.LOGIN_RATE_LIMIT_ENABLED:
+        return
+
+    client_ip = request.client.host if request.client else 'desconhecido'
+    retry_after = await login_throttle.check(form_data.username, client_ip)
+    if retry_after:
+        raise HTTPException(
+            status_code=HTTPStatus.TOO_MANY_REQUESTS,
+            detail='muitas tentativas de login, tente novamente mais tarde',
+            headers={'Retry-After': str(math.ceil(retry_after))},
+        )
+
+
+@router.post(
+    '/token', response_model=Token, dependencies=[Depends(throttle_login)]
+)
 async def login_for_access_token(
     form_data: FormData,
-    session: SessionDep,
+    session: ReadSessionDep,
+    write_session: SessionDep,
 ):
-    user_db = await session.scalar(
-        select(User).where(
-            (User.email == form_data.username)
-            | (User.username == form_data.username)
+    user_db = await repository.get_credentials(session, form_data.username)
+
+    valid, updated_hash = False, None
+    if user_db:
+        valid, updated_hash = await verify_and_update_password_async(
+            form_data.password, user_db.password
         )
-    )
 
-    if not user_db or not verify_password(
-        form_data.password, user_db.password
-    ):
+    if not valid:
         raise HTTPException(
             status_code=HTTPStatus.UNAUTHORIZED,
             detail='email ou senha incorretos',
         )
 
-    access_token = create_access_token({'sub': user_db.email})
+    await login_throttle.reset_user(form_data.username)
+
+    # ✅ parâmetros do argon2 mudaram: regrava o hash de forma transparente
+    if updated_hash:
+        await repository.update_password(
+            write_session, user_db.id, updated_hash
+        )
+
+    tokens = await _issue_tokens(
+        write_session, user_db.id, user_db.email, new_token_family()
+    )
+    await write_session.commit()
+    return tokens
+
+
+INVALID_REFRESH_TOKEN = 'refresh token inválido ou expirado'
+
+
+async def _issue_tokens(
+    session: AsyncSession, user_id: int, email: str, family_id: str
+):
+    """Novo par access/refresh; o refresh vale mais REFRESH_TOKEN_EXPIRE_DAYS
+    a partir de agora (sessão deslizante)."""
+    refresh_token, token_hash = new_refresh_token()
+    await repository.insert_refresh_token(
+        session,
+        user_id,
+        token_hash=token_hash,
+        family_id=family_id,
+        expires_at=utcnow()
+        + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+    return {
+        'access_token': create_access_token({'sub': email}),
+        'token_type': 'bearer',
+        'refresh_token': refresh_token,
+    }
+
+
+@router.post('/refresh_token', response_model=Token)
+async def refresh_access_token(
+    payload: RefreshTokenRequest, session: SessionDep
+):
+    # ⚡ SHA-256 + um UPDATE: renovar não passa pelo argon2
+    token_hash = hash_refresh_token(payload.refresh_token)
+    now = utcnow()
+    consumed = await repository.consume_refresh_token(session, token_hash, now)
+    email = None
+    if consumed is not None:
+        email = await repository.get_email(session, consumed.user_id)
+
+    if email is None:
+        # 🚨 token já rotacionado voltou a ser usado: quem o apresentou pode
+        # tê-lo roubado, então a sessão inteira (família) é revogada
+        family_id = await repository.get_revoked_refresh_family(
+            session, token_hash
+        )
+        if family_id is not None:
+            await repository.revoke_refresh_family(session, family_id, now)
+        await session.commit()
+        raise HTTPException(
+            status_code=HTTPStatus.UNAUTHORIZED,
+            detail=INVALID_REFRESH_TOKEN,
+        )
+
+    tokens = await _issue_tokens(
+        session, consumed.user_id, email, consumed.family_id
+    )
+    await session.commit()
+    return tokens
+
+
+async def _revoke_refresh_family(session: AsyncSession, refresh_token: str):
+    """Revoga o refresh token e os rotacionados dele (sem commit)."""
+    token_hash = hash_refresh_token(refresh_token)
+    now = utcnow()
+    consumed = await repository.consume_refresh_token(session, token_hash, now)
+    if consumed is not None:
+        await repository.revoke_refresh_family(
+            session, consumed.family_id, now
+        )
+
+
+@router.post('/revoke', response_model=Message)
+async def revoke_refresh_token(
+    payload: RefreshTokenRequest, session: SessionDep
+):
+    """Encerra a sessão: revoga o refresh token e os rotacionados dele."""
+    await _revoke_refresh_family(session, payload.refresh_token)
+    await session.commit()
+
+    # a resposta não revela se o token existia (RFC 7009)
+    return Message(message='refresh token revogado')
+
+
+@router.post('/logout', response_model=Message)
+async def logout(
+    session: SessionDep,
+    current: Annotated[CurrentToken, Depends(get_current_token)],
+    payload: RefreshTokenRequest | None = None,
+):
+    """Revoga o token de acesso atual e, se enviado, o refresh token."""
+    # claims do token já validado: decodificar de novo poderia falhar se
+    # ele expirasse no meio da requisição
+    if not current.jti:
+        # sem jti não há como revogar: responder sucesso seria mentir
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail='token sem jti não pode ser revogado',
+        )
+
+    if payload is not None:
+        await _revoke_refresh_family(session, payload.refresh_token)
+        await session.commit()
+
+    try:
+        await revocation_store.revoke(session, current.jti, current.exp)
+        await session.commit()
+    except IntegrityError:
+        # logout simultâneo em outro worker: o token já está revogado
+        await session.rollback()
 
-    return {'access_token': access_token, 'token_type': 'bearer'}
+    return Message(message='logout realizado com sucesso')
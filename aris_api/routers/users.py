@@ -1,27 +1,92 @@
+import csv
+import io
+from datetime import datetime
 from http import HTTPStatus
-from typing import Annotated
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select
+import orjson
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncSession
 
-from aris_api.database import get_session
-from aris_api.models import User
+from aris_api import repository
+from aris_api.coalesce import SingleFlight
+from aris_api.database import get_read_session, get_session
+from aris_api.etags import etag_matches, make_etag, users_page_cache
+from aris_api.pagination import decode_cursor, encode_cursor
 from aris_api.schemas import (
+    BulkUserResponse,
     FilterPage,
     Message,
+    UserBulk,
     UserList,
     UserPublic,
     UserSchema,
 )
-from aris_api.security import get_current_user, get_password_hash
+from aris_api.security import (
+    AuthenticatedUser,
+    get_current_user,
+    hash_password_async,
+    hash_passwords_async,
+    token_cache,
+    utcnow,
+)
+from aris_api.settings import settings
 
 router = APIRouter(prefix='/users', tags=['users'])
 
 # ✅ Define o tipo de dependência com Annotated
 SessionDep = Annotated[AsyncSession, Depends(get_session)]
-CurrentUserDep = Annotated[User, Depends(get_current_user)]
+ReadSessionDep = Annotated[AsyncSession, Depends(get_read_session)]
+CurrentUserDep = Annotated[AuthenticatedUser, Depends(get_current_user)]
+
+USERNAME_CONFLICT = 'nome de usuário já existe'
+EMAIL_CONFLICT = 'email já existe'
+USER_CONFLICT = 'nome de usuário ou email já existente'
+USER_NOT_FOUND = 'usuário não encontrado'
+
+users_page_loads = SingleFlight(
+    'users_page', timeout=settings.SINGLE_FLIGHT_TIMEOUT_SECONDS
+)
+
+
+# restrições únicas de `users` no PostgreSQL (nomes dados pelo banco e
+# pelas migrações cdb53e0a1e99 e 096cc38b6f12)
+_UNIQUE_COLUMNS = {
+    'users_email_key': 'email',
+    'ix_users_username': 'username',
+}
+_SQLITE_UNIQUE = 'UNIQUE constraint failed: '
+
+
+def _violated_column(exc: IntegrityError) -> str | None:
+    """Coluna da restrição única violada, pelo nome da restrição (não
+    pelo texto do erro, que traz os valores e muda entre drivers)."""
+    orig = exc.orig
+    # asyncpg: o erro do driver fica em __cause__; psycopg: em .diag
+    for source in (orig.__cause__, getattr(orig, 'diag', None)):
+        constraint = getattr(source, 'constraint_name', None)
+        if constraint:
+            return _UNIQUE_COLUMNS.get(constraint)
+
+    # SQLite: "UNIQUE constraint failed: users.email" (só as colunas)
+    message = str(orig)
+    if message.startswith(_SQLITE_UNIQUE):
+        columns = message.removeprefix(_SQLITE_UNIQUE).split(',')
+        if len(columns) == 1:
+            return columns[0].strip().rpartition('.')[2]
+    return None
+
+
+def _conflict_detail(exc: IntegrityError) -> str:
+    """Traduz a violação de unicidade do banco para a mensagem da API."""
+    match _violated_column(exc):
+        case 'username':
+            return USERNAME_CONFLICT
+        case 'email':
+            return EMAIL_CONFLICT
+    return USER_CONFLICT
 
 
 @router.post(
@@ -30,46 +95,295 @@ CurrentUserDep = Annotated[User, Depends(get_current_user)]
     response_model=UserPublic,
 )
 async def create_user(user: UserSchema, session: SessionDep):
-    db_user = await session.scalar(
-        select(User).where(
-            (User.username == user.username) | (User.email == user.email)
+    # ✅ um único INSERT ... RETURNING; a unicidade é garantida pelo banco
+    try:
+        user_db = await repository.insert_user(
+            session,
+            username=user.username,
+            email=user.email,
+            password=await hash_password_async(user.password),
         )
+        await repository.bump_table_version(session, 'users')
+        await session.commit()
+    except IntegrityError as exc:
+        await session.rollback()
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT,
+            detail=_conflict_detail(exc),
+        )
+
+    return user_db
+
+
+async def _insert_users(session: AsyncSession, rows: list[dict]):
+    """Insere um lote com um único INSERT ... RETURNING e confirma."""
+    created = await repository.insert_users(session, rows)
+    await repository.bump_table_version(session, 'users')
+    await session.commit()
+    return created
+
+
+async def _insert_batch(session: AsyncSession, rows: list[dict]):
+    """Insere o lote; `None` marca as linhas recusadas pelo banco."""
+    try:
+        return await _insert_users(session, rows)
+    except IntegrityError:
+        await session.rollback()
+
+    # corrida com outro cadastro: refaz o lote linha a linha
+    created = []
+    for row in rows:
+        try:
+            created.extend(await _insert_users(session, [row]))
+        except IntegrityError:
+            await session.rollback()
+            created.append(None)
+    return created
+
+
+@router.post(
+    '/bulk',
+    status_code=HTTPStatus.OK,
+    response_model=BulkUserResponse,
+    response_model_exclude_none=True,
+)
+async def create_users_bulk(
+    payload: UserBulk,
+    session: SessionDep,
+    current_user: CurrentUserDep,
+):
+    results = [None] * len(payload.users)
+
+    # ✅ uma única consulta para todos os conflitos já existentes no banco
+    existing = await repository.find_taken(
+        session,
+        usernames={u.username for u in payload.users},
+        emails={u.email for u in payload.users},
     )
+    taken_usernames, taken_emails = set(), set()
+    for username, email in existing:
+        taken_usernames.add(username)
+        taken_emails.add(email)
 
-    if db_user:
-        if db_user.username == user.username:
-            raise HTTPException(
-                status_code=HTTPStatus.CONFLICT,
-                detail='nome de usuário já existe',
-            )
-        elif db_user.email == user.email:
-            raise HTTPException(
-                status_code=HTTPStatus.CONFLICT,
-                detail='email já existe',
-            )
+    # duplicados dentro do próprio payload também conflitam, mas só com
+    # linhas aceitas: uma linha recusada não reserva o outro campo
+    seen_usernames, seen_emails = set(), set()
+    accepted = []
+    for index, user in enumerate(payload.users):
+        if user.username in taken_usernames or user.username in seen_usernames:
+            detail = USERNAME_CONFLICT
+        elif user.email in taken_emails or user.email in seen_emails:
+            detail = EMAIL_CONFLICT
+        else:
+            accepted.append(index)
+            seen_usernames.add(user.username)
+            seen_emails.add(user.email)
+            continue
+
+        results[index] = {
+            'index': index,
+            'status': 'conflict',
+            'detail': detail,
+        }
+
+    batch_size = settings.BULK_INSERT_BATCH_SIZE
+    for start in range(0, len(accepted), batch_size):
+        batch = accepted[start : start + batch_size]
+        hashes = await hash_passwords_async([
+            payload.users[index].password for index in batch
+        ])
+        rows = [
+            {
+                'username': payload.users[index].username,
+                'email': payload.users[index].email,
+                'password': hashed,
+            }
+            for index, hashed in zip(batch, hashes)
+        ]
 
-    user_db = User(
-        username=user.username,
-        email=user.email,
-        password=get_password_hash(user.password),
+        created = await _insert_batch(session, rows)
+        for index, row in zip(batch, created):
+            if row is None:
+                results[index] = {
+                    'index': index,
+                    'status': 'conflict',
+                    'detail': USER_CONFLICT,
+                }
+            else:
+                results[index] = {
+                    'index': index,
+                    'status': 'created',
+                    'user': row._asdict(),
+                }
+
+    created_count = sum(r['status'] == 'created' for r in results)
+    return {
+        'created': created_count,
+        'conflicts': len(results) - created_count,
+        'results': results,
+    }
+
+
+def _decode_after(cursor: str, sort: str) -> tuple:
+    """Chave de ordenação da última linha, guardada no cursor.
+
+    O cursor leva a ordenação em que foi gerado: `created_at` e
+    `-created_at` têm chaves do mesmo formato, mas não podem se misturar.
+    """
+    try:
+        values = decode_cursor(cursor)
+    except ValueError:
+        values = None
+
+    match values:
+        case [str() as cursor_sort, *key] if cursor_sort == sort:
+            pass
+        case _:
+            key = None
+
+    match sort.removeprefix('-'), key:
+        case 'id', [int() as user_id]:
+            return (user_id,)
+        case 'username', [str() as username]:
+            return (username,)
+        case 'created_at', [str() as created_at, int() as user_id]:
+            try:
+                return datetime.fromisoformat(created_at), user_id
+            except ValueError:
+                pass
+    raise HTTPException(
+        status_code=HTTPStatus.BAD_REQUEST,
+        detail='cursor inválido',
     )
-    session.add(user_db)
-    await session.commit()  # ✅ await
-    await session.refresh(user_db)  # ✅ await
-    return user_db
 
 
-@router.get('/', status_code=HTTPStatus.OK, response_model=UserList)
+def _next_cursor(user, sort: str) -> str:
+    key = sort.removeprefix('-')
+    if key == 'created_at':
+        return encode_cursor(sort, user.created_at.isoformat(), user.id)
+    return encode_cursor(sort, getattr(user, key))
+
+
+async def _users_page(
+    session: AsyncSession,
+    filter_users: FilterPage,
+    after: tuple | None,
+    cache_key: tuple[int, str],
+) -> bytes:
+    """Consulta e serializa a página, guardando o corpo no cache."""
+    # ✅ tuplas leves, sem entidades no identity map; os filtros usam os
+    # índices de `models.User`
+    users = await repository.list_users(
+        session,
+        limit=filter_users.limit,
+        offset=filter_users.offset,
+        after=after,
+        sort=filter_users.sort,
+        username_prefix=filter_users.username_prefix,
+        email_domain=filter_users.email_domain,
+        created_after=filter_users.created_after,
+        created_before=filter_users.created_before,
+    )
+
+    # ⚡ dados já validados na escrita: serializa direto com orjson, sem
+    # passar por UserList/UserPublic a cada linha
+    body = {
+        'users': [dict(zip(repository.PUBLIC_FIELDS, user)) for user in users]
+    }
+    if len(users) == filter_users.limit:
+        body['next_cursor'] = _next_cursor(users[-1], filter_users.sort)
+    content = orjson.dumps(body)
+    users_page_cache.set(cache_key, content)
+    return content
+
+
+@router.get(
+    '/',
+    status_code=HTTPStatus.OK,
+    response_model=UserList,
+    responses={HTTPStatus.NOT_MODIFIED: {'description': 'página inalterada'}},
+)
 async def read_users(
-    session: SessionDep,
+    session: ReadSessionDep,
     get_current_user: CurrentUserDep,
     filter_users: Annotated[FilterPage, Query()],
+    if_none_match: Annotated[str | None, Header()] = None,
 ):
-    result = await session.scalars(
-        select(User).limit(filter_users.limit).offset(filter_users.offset)
+    # ✅ keyset: custo constante, não importa a profundidade da página
+    after = None
+    if filter_users.cursor is not None:
+        after = _decode_after(filter_users.cursor, filter_users.sort)
+
+    # ⚡ a versão é lida antes da página: no pior caso o ETag fica mais
+    # antigo que os dados (o cliente só baixa de novo), nunca mais novo
+    version = await repository.get_table_version(session, 'users')
+    key = filter_users.model_dump_json()
+    etag = make_etag(version, key)
+    headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
+
+    body = users_page_cache.get((version, key))
+    if body is None:
+        # ⚡ polls simultâneos da mesma página: uma consulta só
+        body = await users_page_loads.do(
+            (version, key),
+            lambda: _users_page(session, filter_users, after, (version, key)),
+        )
+    return Response(body, media_type='application/json', headers=headers)
+
+
+EXPORT_COLUMNS = ('id', 'username', 'email', 'created_at')
+
+
+async def _export_ndjson(result: AsyncResult):
+    async for rows in result.partitions():
+        yield b''.join(
+            orjson.dumps(row._asdict(), option=orjson.OPT_APPEND_NEWLINE)
+            for row in rows
+        )
+
+
+async def _export_csv(result: AsyncResult):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(EXPORT_COLUMNS)
+
+    async for rows in result.partitions():
+        writer.writerows(
+            (row.id, row.username, row.email, row.created_at.isoformat())
+            for row in rows
+        )
+        yield buffer.getvalue()
+        # ✅ reaproveita o buffer: memória constante por bloco
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():  # tabela vazia: só o cabeçalho
+        yield buffer.getvalue()
+
+
+@router.get('/export', status_code=HTTPStatus.OK)
+async def export_users(
+    session: ReadSessionDep,
+    current_user: CurrentUserDep,
+    export_format: Annotated[
+        Literal['ndjson', 'csv'], Query(alias='format')
+    ] = 'ndjson',
+):
+    result = await repository.stream_users(
+        session, chunk_size=settings.EXPORT_CHUNK_SIZE
+    )
+
+    if export_format == 'csv':
+        return StreamingResponse(
+            _export_csv(result),
+            media_type='text/csv',
+            headers={'Content-Disposition': 'attachment; filename=users.csv'},
+        )
+    return StreamingResponse(
+        _export_ndjson(result), media_type='application/x-ndjson'
     )
-    users = result.all()  # ✅ precisa materializar a lista
-    return {'users': users}
 
 
 @router.put(
@@ -83,33 +397,48 @@ async def update_user(
     session: SessionDep,
     current_user: CurrentUserDep,  # ✅ nome correto
 ):
-    user_db = await session.scalar(select(User).where(User.id == user_id))
-    if not user_db:
-        raise HTTPException(
-            status_code=HTTPStatus.NOT_FOUND,
-            detail='usuário não encontrado',
-        )
-
     if current_user.id != user_id:
+        # só consulta o banco para distinguir 404 de 403
+        if not await repository.user_exists(session, user_id):
+            raise HTTPException(
+                status_code=HTTPStatus.NOT_FOUND,
+                detail=USER_NOT_FOUND,
+            )
         raise HTTPException(
             status_code=HTTPStatus.FORBIDDEN,
             detail='não autorizado para atualizar este usuário',
         )
 
+    hashed_password = await hash_password_async(user.password)
     try:
-        user_db.username = user.username
-        user_db.email = user.email
-        user_db.password = get_password_hash(user.password)
+        user_db = await repository.update_user(
+            session,
+            user_id,
+            username=user.username,
+            email=user.email,
+            password=hashed_password,
+        )
+        # senha/email trocados: sessões abertas precisam logar de novo
+        await repository.revoke_user_refresh_tokens(session, user_id, utcnow())
+        # ETags de GET /users/ mudam junto com a tabela
+        await repository.bump_table_version(session, 'users')
         await session.commit()
-        await session.refresh(user_db)
-        return user_db
     except IntegrityError:
         await session.rollback()
         raise HTTPException(
             status_code=HTTPStatus.CONFLICT,
-            detail='nome de usuário ou email já existente',
+            detail=USER_CONFLICT,
         )
 
+    if user_db is None:  # removido entre a autenticação e o UPDATE
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND,
+            detail=USER_NOT_FOUND,
+        )
+
+    token_cache.invalidate_user(user_id)
+    return user_db
+
 
 @router.delete(
     '/{user_id}',
@@ -117,13 +446,16 @@ async def update_user(
     response_model=Message,
 )
 async def delete_user(user_id: int, session: SessionDep):
-    user_db = await session.scalar(select(User).where(User.id == user_id))
-    if not user_db:
+    # ✅ DELETE ... RETURNING: sem carregar a entidade antes
+    deleted = await repository.delete_user(session, user_id)
+    if not deleted:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND,
-            detail='usuário não encontrado',
+            detail=USER_NOT_FOUND,
         )
 
-    await session.delete(user_db)  # ✅ await
-    await session.commit()  # ✅ await
+    await repository.revoke_user_refresh_tokens(session, user_id, utcnow())
+    await repository.bump_table_version(session, 'users')
+    await session.commit()
+    token_cache.invalidate_user(user_id)
     return Message(message='usuário deletado com sucesso')
@@ -1,16 +1,29 @@
-from pydantic import BaseModel, ConfigDict, EmailStr, Field
+from datetime import UTC, datetime
+from typing import Literal
+
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
+
+from aris_api.settings import settings
 
 
 class Message(BaseModel):
     message: str
 
 
+class HealthStatus(BaseModel):
+    status: str
+
+
 class UserSchema(BaseModel):
     username: str
     email: EmailStr
     password: str
 
 
+class UserBulk(BaseModel):
+    users: list[UserSchema] = Field(max_length=settings.BULK_MAX_USERS)
+
+
 class UserPublic(BaseModel):
     username: str
     email: EmailStr
@@ -25,13 +38,56 @@ class UserDB(UserSchema):
 
 class UserList(BaseModel):
     users: list[UserPublic]
+    next_cursor: str | None = None
+
+
+class BulkUserResult(BaseModel):
+    index: int
+    status: Literal['created', 'conflict']
+    user: UserPublic | None = None
+    detail: str | None = None
+
+
+class BulkUserResponse(BaseModel):
+    created: int
+    conflicts: int
+    results: list[BulkUserResult]
 
 
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: str
+
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
 
 
 class FilterPage(BaseModel):
     offset: int = Field(default=0, ge=0)
-    limit: int = Field(default=10, ge=1)
+    limit: int = Field(default=10, ge=1, le=settings.MAX_PAGE_SIZE)
+    # ✅ quando informado, ignora o offset e pagina por chave (id > cursor)
+    cursor: str | None = None
+    # `-` na frente inverte a ordem; o cursor vale só para o mesmo `sort`
+    sort: Literal[
+        'id', '-id', 'username', '-username', 'created_at', '-created_at'
+    ] = 'id'
+    username_prefix: str | None = Field(default=None, min_length=1)
+    email_domain: str | None = Field(default=None, min_length=1)
+    created_after: datetime | None = None
+    created_before: datetime | None = None
+
+    @field_validator('email_domain')
+    @classmethod
+    def normalize_domain(cls, value: str | None) -> str | None:
+        # o índice guarda o domínio em minúsculas
+        return value and value.removeprefix('@').lower()
+
+    @field_validator('created_after', 'created_before')
+    @classmethod
+    def naive_utc(cls, value: datetime | None) -> datetime | None:
+        # created_at é gravado em UTC, sem fuso
+        if value is None or value.tzinfo is None:
+            return value
+        return value.astimezone(UTC).replace(tzinfo=None)
@@ -1,30 +1,207 @@
 # aris_api/security.py
-from datetime import datetime, timedelta
+import asyncio
+import hashlib
+import os
+import secrets
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from functools import cache
 from http import HTTPStatus
+from time import perf_counter
+from typing import TYPE_CHECKING
+from weakref import WeakKeyDictionary
 from zoneinfo import ZoneInfo
 
-import jwt
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
-from jwt import DecodeError, decode
-from pwdlib import PasswordHash
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from aris_api.database import get_session
-from aris_api.models import User
+from aris_api.coalesce import SingleFlight
+from aris_api.database import get_read_session
+from aris_api.instrumentation import record_hash_time
+from aris_api.metrics import (
+    password_hash_queue_depth,
+    password_hash_rejected_total,
+    password_hash_seconds,
+)
+from aris_api.repository import (
+    UserRecord,
+    get_table_version,
+    get_user_by_email,
+)
+from aris_api.revocation import revocation_store
 from aris_api.settings import settings
 
-pwd_context = PasswordHash.recommended()
+if TYPE_CHECKING:
+    from pwdlib import PasswordHash
+
+    from aris_api.keys import KeyRing
+
 oauth2_sheme = OAuth2PasswordBearer(tokenUrl='auth/token')
 
 
+# ⚡ pwdlib/argon2 e o anel de chaves (PyJWT + `cryptography`) são
+# importados no primeiro uso, não no import da app
+@cache
+def get_password_context() -> 'PasswordHash':
+    from pwdlib import PasswordHash  # noqa: PLC0415
+    from pwdlib.hashers.argon2 import Argon2Hasher  # noqa: PLC0415
+
+    return PasswordHash((
+        Argon2Hasher(
+            time_cost=settings.ARGON2_TIME_COST,
+            memory_cost=settings.ARGON2_MEMORY_COST,
+            parallelism=settings.ARGON2_PARALLELISM,
+        ),
+    ))
+
+
 def get_password_hash(password: str):
-    return pwd_context.hash(password)
+    return get_password_context().hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str):
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_password_context().verify(plain_password, hashed_password)
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str):
+    """Retorna `(válida, novo_hash)`; `novo_hash` vem preenchido quando o
+    hash armazenado usa parâmetros diferentes dos configurados."""
+    return get_password_context().verify_and_update(
+        plain_password, hashed_password
+    )
+
+
+class PasswordHashExecutor:
+    """Executa o argon2 fora do event loop, com fila limitada.
+
+    `max_queue` limita as operações em andamento (na fila + executando).
+    Quando o limite é atingido a requisição recebe 503 imediatamente, em vez
+    de acumular latência sem limite.
+
+    Lotes (`run_bulk`) ocupam no máximo `bulk_workers` workers (padrão: um
+    a menos que o total), um hash por vez: login e cadastro nunca esperam
+    atrás de um lote inteiro.
+    """
+
+    def __init__(
+        self,
+        kind: str = 'thread',
+        max_workers: int | None = None,
+        max_queue: int = 64,
+        bulk_workers: int | None = None,
+    ):
+        self.kind = kind
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.max_queue = max_queue
+        self.bulk_workers = bulk_workers or max(1, self.max_workers - 1)
+        self.pending = 0
+        self._executor: Executor | None = None
+        # semáforos só valem no loop em que foram criados
+        self._bulk_slots: WeakKeyDictionary[
+            asyncio.AbstractEventLoop, asyncio.Semaphore
+        ] = WeakKeyDictionary()
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == 'process':
+                from concurrent.futures import (  # noqa: PLC0415
+                    ProcessPoolExecutor,
+                )
+
+                self._executor = ProcessPoolExecutor(self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    self.max_workers, thread_name_prefix='argon2'
+                )
+        return self._executor
+
+    async def run(self, func, *args):
+        if self.pending >= self.max_queue:
+            password_hash_rejected_total.inc()
+            raise HTTPException(
+                status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                detail='servidor ocupado, tente novamente em instantes',
+                headers={'Retry-After': '1'},
+            )
+
+        self.pending += 1
+        password_hash_queue_depth.inc()
+        start = perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._get_executor(), func, *args
+            )
+        finally:
+            self.pending -= 1
+            password_hash_queue_depth.dec()
+            elapsed = perf_counter() - start
+            password_hash_seconds.observe(elapsed)
+            record_hash_time(elapsed)
+
+    async def run_bulk(self, func, *args):
+        """Como `run`, mas espera uma das `bulk_workers` vagas de lote antes
+        de entrar na fila."""
+        slots = self._bulk_slots.setdefault(
+            asyncio.get_running_loop(), asyncio.Semaphore(self.bulk_workers)
+        )
+        async with slots:
+            return await self.run(func, *args)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+hash_executor = PasswordHashExecutor(
+    kind=settings.PASSWORD_HASH_EXECUTOR,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_QUEUE_SIZE,
+)
+
+
+async def hash_password_async(password: str):
+    return await hash_executor.run(get_password_hash, password)
+
+
+async def hash_passwords_async(passwords: list[str]) -> list[str]:
+    """Gera os hashes em paralelo, sem ocupar todos os workers do executor
+    (ver `PasswordHashExecutor.run_bulk`)."""
+    return list(
+        await asyncio.gather(
+            *(
+                hash_executor.run_bulk(get_password_hash, password)
+                for password in passwords
+            )
+        )
+    )
+
+
+async def verify_password_async(plain_password: str, hashed_password: str):
+    return await hash_executor.run(
+        verify_password, plain_password, hashed_password
+    )
+
+
+async def verify_and_update_password_async(
+    plain_password: str, hashed_password: str
+):
+    return await hash_executor.run(
+        verify_and_update_password, plain_password, hashed_password
+    )
+
+
+@cache
+def get_key_ring() -> 'KeyRing':
+    """Chaves de assinatura/validação, carregadas uma vez por processo."""
+    from aris_api.keys import KeyRing  # noqa: PLC0415
+
+    return KeyRing.from_settings(settings)
 
 
 def create_access_token(data: dict):
@@ -32,39 +209,211 @@ def create_access_token(data: dict):
     expire = datetime.now(tz=ZoneInfo('UTC')) + timedelta(
         minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
     )
-    to_encode.update({'exp': expire})
-    encoded_jwt = jwt.encode(
-        to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
-    )
+    # jti: identifica o token para revogação (logout)
+    to_encode.update({'exp': expire, 'jti': secrets.token_urlsafe(16)})
+    encoded_jwt = get_key_ring().encode(to_encode)
     return encoded_jwt
 
 
+def decode_access_token(token: str) -> dict | None:
+    """Payload do token, ou `None` se ele for inválido ou estiver
+    expirado."""
+    from jwt import InvalidTokenError  # noqa: PLC0415
+
+    try:
+        return get_key_ring().decode(token)
+    except InvalidTokenError:
+        return None
+
+
+def utcnow() -> datetime:
+    """Agora em UTC, sem fuso (como as colunas DateTime do banco)."""
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def hash_refresh_token(token: str) -> str:
+    # token aleatório de 256 bits: SHA-256 basta, argon2 seria desperdício
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def new_refresh_token() -> tuple[str, str]:
+    """Gera `(token, hash)`; apenas o hash vai para o banco."""
+    token = secrets.token_urlsafe(32)
+    return token, hash_refresh_token(token)
+
+
+def new_token_family() -> str:
+    return secrets.token_hex(16)
+
+
+# identidade resolvida a partir do token (sem vínculo com a sessão)
+AuthenticatedUser = UserRecord
+
+
+class TokenCache:
+    """Cache LRU + TTL de tokens já verificados, indexado pelo SHA-256.
+
+    A validade de cada entrada nunca passa do `exp` do próprio token. Cada
+    entrada guarda também `jti` e `exp`, para a checagem de revogação, e a
+    versão da tabela `users` em que o usuário foi lido.
+
+    `invalidate_user` só alcança o worker que fez a escrita. Nos outros, a
+    entrada cai quando a versão de `users` muda (ver `get_current_user`): o
+    custo é ler essa versão a cada requisição autenticada, e qualquer
+    escrita em `users`, até um cadastro, esvazia o cache de todos os
+    workers.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        # chave -> (válido até, usuário, jti, exp, versão de users)
+        self._entries: OrderedDict[
+            bytes, tuple[float, AuthenticatedUser, str | None, float, int]
+        ] = OrderedDict()
+        self._by_user: dict[int, set[bytes]] = {}
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(
+        self, token: str, version: int | None = None
+    ) -> tuple[AuthenticatedUser, str | None, float] | None:
+        """`(usuário, jti, exp)` do token em cache, ou `None`.
+
+        Com `version`, a entrada só vale se foi gravada nessa versão de
+        `users`.
+        """
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, user, jti, exp, cached_version = entry
+        if expires_at <= time.time() or (
+            version is not None and cached_version != version
+        ):
+            self._discard(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return user, jti, exp
+
+    def get(self, token: str) -> AuthenticatedUser | None:
+        cached = self.lookup(token)
+        return cached[0] if cached else None
+
+    def set(
+        self,
+        token: str,
+        user: AuthenticatedUser,
+        exp: float,
+        jti: str | None = None,
+        version: int = 0,
+    ):
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+
+        key = self._key(token)
+        self._discard(key)
+        self._entries[key] = (
+            min(time.time() + self.ttl, exp),
+            user,
+            jti,
+            exp,
+            version,
+        )
+        self._by_user.setdefault(user.id, set()).add(key)
+
+        while len(self._entries) > self.max_size:
+            self._discard(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int):
+        for key in self._by_user.pop(user_id, ()):
+            self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+        self._by_user.clear()
+
+    def _discard(self, key: bytes):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+
+        keys = self._by_user.get(entry[1].id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[entry[1].id]
+
+
+token_cache = TokenCache(
+    max_size=settings.TOKEN_CACHE_MAX_SIZE,
+    ttl=settings.TOKEN_CACHE_TTL_SECONDS,
+)
+user_lookups = SingleFlight(
+    'user_by_email', timeout=settings.SINGLE_FLIGHT_TIMEOUT_SECONDS
+)
+
+
+@dataclass(frozen=True, slots=True)
+class CurrentToken:
+    """Token de acesso já validado: o usuário e as claims de revogação."""
+
+    user: AuthenticatedUser
+    jti: str | None
+    exp: float
+
+
 # 🔥 versão corrigida — completamente assíncrona
-async def get_current_user(
-    session: AsyncSession = Depends(get_session),
+async def get_current_token(
+    session: AsyncSession = Depends(get_read_session),
     token: str = Depends(oauth2_sheme),
-):
+) -> CurrentToken:
     credential_exception = HTTPException(
         status_code=HTTPStatus.UNAUTHORIZED,
         detail='Não foi possível validar as credenciais',
         headers={'WWW-Authenticate': 'Bearer'},
     )
 
-    try:
-        payload = decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        subject_email = payload.get('sub')
+    # 🔁 a versão de `users` acompanha updates/deletes feitos em outros
+    # workers; GET /users/ reaproveita a mesma leitura
+    version = await get_table_version(session, 'users')
+    cached = token_cache.lookup(token, version)
+    if cached is not None:
+        current_user, jti, exp = cached
+    else:
+        payload = decode_access_token(token)
+        subject_email = payload.get('sub') if payload else None
         if not subject_email:
             raise credential_exception
-    except DecodeError:
-        raise credential_exception
+        current_user, jti, exp = None, payload.get('jti'), payload['exp']
 
-    # ✅ async scalar
-    user = await session.scalar(
-        select(User).where(User.email == subject_email)
-    )
-    if not user:
+    # 🚫 vale também para tokens em cache; sem revogação o custo é só o do
+    # filtro em memória, sem consulta ao banco
+    if jti is not None and await revocation_store.is_revoked(
+        session, jti, exp
+    ):
         raise credential_exception
 
-    return user
+    if current_user is None:
+        # ⚡ rajada com o mesmo token: uma consulta só para todas
+        current_user = await user_lookups.do(
+            subject_email, lambda: get_user_by_email(session, subject_email)
+        )
+        if not current_user:
+            raise credential_exception
+        token_cache.set(token, current_user, exp, jti, version)
+
+    return CurrentToken(current_user, jti, exp)
+
+
+async def get_current_user(
+    current: CurrentToken = Depends(get_current_token),
+) -> AuthenticatedUser:
+    return current.user
@@ -0,0 +1,34 @@
+import argparse
+import os
+
+import uvicorn
+
+from aris_api.settings import settings
+
+
+def default_workers() -> int:
+    return settings.WEB_CONCURRENCY or os.cpu_count() or 1
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Servidor de produção da aris_api (uvicorn multi-worker).'
+    )
+    parser.add_argument('--host', default=settings.SERVER_HOST)
+    parser.add_argument('--port', type=int, default=settings.SERVER_PORT)
+    parser.add_argument('--workers', type=int, default=default_workers())
+    args = parser.parse_args()
+
+    # cada worker executa o lifespan (aquecimento) antes de ficar pronto
+    uvicorn.run(
+        'aris_api.app:app',
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        proxy_headers=True,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_TIMEOUT_SECONDS,
+    )
+
+
+if __name__ == '__main__':
+    main()
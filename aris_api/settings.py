@@ -1,3 +1,7 @@
+from datetime import datetime
+from functools import cache
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -10,10 +14,116 @@ class Settings(BaseSettings):
 
     DATABASE_URL: str
     TEST_DATABASE_URL: str
+    # réplicas somente-leitura (JSON), ex.: '["sqlite+aiosqlite:///./r1.db"]'
+    READ_DATABASE_URLS: list[str] = []
+    READ_REPLICA_COOLDOWN_SECONDS: float = 30
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+    # 🔄 validade do refresh token; renovada a cada uso (sessão deslizante)
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    # 🚫 tokens revogados (logout): filtros de Bloom por minuto de expiração,
+    # sincronizados entre workers a cada REVOCATION_SYNC_SECONDS (0 = nunca)
+    REVOCATION_SYNC_SECONDS: float = 5
+    # cada leitura volta este tanto antes da última revogação vista, para
+    # pegar transações que confirmaram fora de ordem
+    REVOCATION_SYNC_MARGIN_SECONDS: float = 60
+    REVOCATION_BUCKET_SECONDS: int = 60
+    REVOCATION_ERROR_RATE: float = 0.001
+    # 🔑 chave privada (PEM) para assinar com RS256/ES256/EdDSA; sem ela os
+    # tokens usam SECRET_KEY. Chaves públicas extras (anterior/próxima)
+    # continuam válidas na rotação; ver aris_api/keys.py
+    JWT_SIGNING_KEY_FILE: str | None = None
+    JWT_VERIFICATION_KEY_FILES: list[str] = []
+    # na troca de SECRET_KEY por chave privada, tokens sem kid (assinados
+    # com SECRET_KEY em JWT_SECRET_ALGORITHM) valem até este instante; sem
+    # ele, a troca invalida todos os tokens de acesso em circulação
+    JWT_SECRET_TOKENS_VALID_UNTIL: datetime | None = None
+    JWT_SECRET_ALGORITHM: str = 'HS256'
+    JWKS_MAX_AGE_SECONDS: int = 300  # Cache-Control de /.well-known/jwks.json
+
+    # 🚀 servidor de produção (python -m aris_api.serve)
+    SERVER_HOST: str = '0.0.0.0'
+    SERVER_PORT: int = 8000
+    WEB_CONCURRENCY: int | None = None  # None = nº de CPUs
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: int = 30
+    WARMUP_ON_STARTUP: bool = True
+
+    # 🗄️ pool de conexões / engine
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_PRE_PING: bool = False
+    DB_POOL_RECYCLE: int = -1  # segundos; -1 = nunca recicla
+    DB_STATEMENT_CACHE_SIZE: int = 128
+    DB_POOL_WARMUP_CONNECTIONS: int = 2
+    # 🐢 loga comandos acima deste tempo (None desliga) e avisa quando uma
+    # requisição repete o mesmo comando N vezes com parâmetros diferentes
+    DB_SLOW_QUERY_MS: float | None = 200
+    DB_N_PLUS_ONE_THRESHOLD: int = 10
+
+    # PRAGMAs aplicados a cada nova conexão SQLite (None = padrão do SQLite).
+    # journal_mode é persistido no arquivo; 'WAL' é o recomendado em produção.
+    DB_SQLITE_JOURNAL_MODE: (
+        Literal['DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'] | None
+    ) = None
+    DB_SQLITE_SYNCHRONOUS: Literal['OFF', 'NORMAL', 'FULL', 'EXTRA'] | None = (
+        None
+    )
+    DB_SQLITE_BUSY_TIMEOUT_MS: int | None = 5000
+    DB_SQLITE_MMAP_SIZE: int | None = None
+
+    # 🔐 custo do argon2id (hashes antigos são atualizados no login)
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536  # KiB
+    ARGON2_PARALLELISM: int = 4
+
+    # executor do argon2 (fora do event loop)
+    PASSWORD_HASH_EXECUTOR: Literal['thread', 'process'] = 'thread'
+    PASSWORD_HASH_WORKERS: int | None = None  # None = nº de CPUs (máx. 4)
+    PASSWORD_HASH_QUEUE_SIZE: int = 64
+
+    # 🛑 limite de tentativas de login (token bucket por usuário e por IP)
+    LOGIN_RATE_LIMIT_ENABLED: bool = True
+    LOGIN_RATE_LIMIT_ATTEMPTS: int = 10
+    LOGIN_RATE_LIMIT_IP_ATTEMPTS: int = 100
+    LOGIN_RATE_LIMIT_WINDOW_SECONDS: float = 60
+
+    # ⚡ cache de tokens já validados (get_current_user); cada worker tem o
+    # seu, descartado quando a versão da tabela users muda
+    TOKEN_CACHE_MAX_SIZE: int = 10_000
+    TOKEN_CACHE_TTL_SECONDS: float = 60
+
+    # 🔀 consultas idênticas simultâneas compartilham uma execução
+    SINGLE_FLIGHT_TIMEOUT_SECONDS: float = 10
+
+    # 📄 paginação de GET /users/
+    MAX_PAGE_SIZE: int = 100
+    EXPORT_CHUNK_SIZE: int = 1000  # linhas por bloco em GET /users/export
+    # páginas já serializadas, por (versão da tabela, filtros); 0 desliga
+    USERS_PAGE_CACHE_SIZE: int = 256
+
+    # 📦 POST /users/bulk
+    BULK_MAX_USERS: int = 10_000
+    BULK_INSERT_BATCH_SIZE: int = 500
+
+    # 🔬 profiling de requisições (ver aris_api/profiling.py). Com
+    # PROFILING_SECRET, o cabeçalho X-Debug-Profile assinado força o perfil
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.0  # fração das requisições (0 a 1)
+    PROFILING_SECRET: str | None = None
+    PROFILING_MODE: Literal['cprofile', 'sampling'] = 'cprofile'
+    PROFILING_INTERVAL_MS: float = 1  # intervalo do modo sampling
+    PROFILING_DIR: str = 'profiles'
+    PROFILING_MAX_FILES: int = 50  # perfis mantidos; os mais antigos saem
+
+
+@cache
+def get_settings() -> Settings:
+    """Instância única das configurações (o `.env` é lido uma vez)."""
+    return Settings()
 
 
-# ✅ Instância global para ser importada em qualquer lugar
-settings = Settings()
+# os módulos leem as configurações no import (limites dos schemas, caches
+# globais); construir o Settings custa poucos ms perto do resto do import
+settings = get_settings()
@@ -0,0 +1,80 @@
+"""Logins por segundo, por núcleo, em cada perfil de custo do argon2id.
+
+Mede apenas a verificação da senha (o que domina o custo de
+`POST /auth/token`). O tempo de CPU do processo é usado para estimar a vazão
+por núcleo, já que `parallelism > 1` espalha o cálculo em várias threads.
+
+Uso:
+    python -m benchmarks.bench_argon2_profiles --iterations 50
+    python -m benchmarks.bench_argon2_profiles --profile 2,19456,1
+"""
+
+import argparse
+import os
+from time import perf_counter, process_time
+
+from pwdlib.hashers.argon2 import Argon2Hasher
+
+# (time_cost, memory_cost em KiB, parallelism)
+PROFILES = {
+    'owasp-19m': (2, 19456, 1),
+    'owasp-46m': (1, 47104, 1),
+    'padrao': (3, 65536, 4),
+    'forte': (4, 131072, 4),
+}
+
+
+def measure(time_cost: int, memory_cost: int, parallelism: int, n: int):
+    hasher = Argon2Hasher(
+        time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism
+    )
+    hashed = hasher.hash('senha-de-benchmark')
+    hasher.verify('senha-de-benchmark', hashed)  # aquecimento
+
+    wall_start, cpu_start = perf_counter(), process_time()
+    for _ in range(n):
+        hasher.verify('senha-de-benchmark', hashed)
+    wall = perf_counter() - wall_start
+    cpu = process_time() - cpu_start
+    return n / wall, n / cpu, wall / n
+
+
+def parse_profile(value: str):
+    time_cost, memory_cost, parallelism = (int(v) for v in value.split(','))
+    return time_cost, memory_cost, parallelism
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument(
+        '--profile',
+        action='append',
+        type=parse_profile,
+        help='perfil extra no formato time_cost,memory_cost,parallelism',
+    )
+    args = parser.parse_args()
+
+    profiles = dict(PROFILES)
+    for time_cost, memory_cost, parallelism in args.profile or ():
+        profiles[f't={time_cost},m={memory_cost},p={parallelism}'] = (
+            time_cost,
+            memory_cost,
+            parallelism,
+        )
+
+    print(f'CPUs: {os.cpu_count()}')
+    print(
+        f'{"perfil":<24} {"t":>3} {"m (KiB)":>9} {"p":>3} '
+        f'{"ms/login":>9} {"logins/s":>9} {"logins/s/núcleo":>16}'
+    )
+    for name, params in profiles.items():
+        per_wall, per_core, latency = measure(*params, args.iterations)
+        print(
+            f'{name:<24} {params[0]:>3} {params[1]:>9} {params[2]:>3} '
+            f'{latency * 1000:>9.1f} {per_wall:>9.1f} {per_core:>16.1f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
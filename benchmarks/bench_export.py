@@ -0,0 +1,127 @@
+"""Benchmark de vazão do GET /users/export.
+
+Popula um SQLite temporário com N usuários sintéticos e consome a exportação
+chamando a app ASGI em processo, sem guardar o corpo da resposta.
+
+Uso:
+    python -m benchmarks.bench_export --rows 1000000 --format ndjson
+"""
+
+import argparse
+import asyncio
+import resource
+import sqlite3
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from aris_api.app import app
+from aris_api.database import get_session
+from aris_api.models import table_registry
+from aris_api.security import get_current_user
+
+
+def seed(path: Path, rows: int):
+    engine = create_async_engine(f'sqlite+aiosqlite:///{path}')
+
+    async def create_tables():
+        async with engine.begin() as conn:
+            await conn.run_sync(table_registry.metadata.create_all)
+        await engine.dispose()
+
+    asyncio.run(create_tables())
+
+    with sqlite3.connect(path) as conn:
+        conn.executemany(
+            'INSERT INTO users (username, email, password) VALUES (?, ?, ?)',
+            ((f'user{i}', f'user{i}@example.com', 'x') for i in range(rows)),
+        )
+
+
+def max_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def run(path: Path, export_format: str) -> tuple[int, int, float]:
+    """Chama a app ASGI diretamente, descartando cada bloco recebido.
+
+    (O `httpx.ASGITransport` acumula o corpo inteiro em memória, o que
+    mascararia o consumo do endpoint.)
+    """
+    engine = create_async_engine(f'sqlite+aiosqlite:///{path}')
+
+    async def session_override():
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = session_override
+    app.dependency_overrides[get_current_user] = lambda: None
+
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': '/users/export',
+        'raw_path': b'/users/export',
+        'query_string': f'format={export_format}'.encode(),
+        'headers': [],
+        'server': ('bench', 80),
+        'client': ('127.0.0.1', 0),
+        'root_path': '',
+    }
+    counters = {'lines': 0, 'size': 0}
+
+    disconnected = asyncio.Event()
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await disconnected.wait()  # o cliente nunca desconecta
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.body':
+            body = message.get('body', b'')
+            counters['lines'] += body.count(b'\n')
+            counters['size'] += len(body)
+
+    start = perf_counter()
+    await app(scope, receive, send)
+    elapsed = perf_counter() - start
+
+    app.dependency_overrides.clear()
+    await engine.dispose()
+    return counters['lines'], counters['size'], elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument(
+        '--format', choices=('ndjson', 'csv'), default='ndjson'
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'export.db'
+        seed(path, args.rows)
+
+        rss_before = max_rss_mb()
+        lines, size, elapsed = asyncio.run(run(path, args.format))
+
+    print(f'linhas:    {lines}')
+    print(f'bytes:     {size / 1024 / 1024:.1f} MiB')
+    print(f'tempo:     {elapsed:.2f} s')
+    print(f'vazão:     {args.rows / elapsed:,.0f} linhas/s')
+    print(f'RSS pico:  {max_rss_mb():.1f} MiB (antes: {rss_before:.1f} MiB)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""Custo de CPU de um ataque de força bruta em POST /auth/token.
+
+Dispara N tentativas com senha errada (mesmo IP, alternando entre alguns
+usuários) com o limitador ligado e desligado, e compara o tempo de CPU do
+processo e quantas verificações argon2 de fato rodaram.
+
+Uso:
+    python -m benchmarks.bench_login_attack --attempts 200 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import tempfile
+from collections import Counter
+from pathlib import Path
+from time import perf_counter, process_time
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from aris_api.app import app
+from aris_api.database import build_engine, get_read_session, get_session
+from aris_api.metrics import password_hash_seconds
+from aris_api.models import User, table_registry
+from aris_api.ratelimit import InMemoryRateLimitBackend, login_throttle
+from aris_api.security import get_password_hash
+from aris_api.settings import settings
+
+TARGETS = ('alice', 'bob', 'carol', 'dave')
+
+
+async def attack(client: httpx.AsyncClient, attempts: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def attempt(i: int):
+        async with semaphore:
+            response = await client.post(
+                '/auth/token',
+                data={
+                    'username': TARGETS[i % len(TARGETS)],
+                    'password': f'chute-{i}',
+                },
+            )
+            return int(response.status_code)
+
+    return Counter(
+        await asyncio.gather(*(attempt(i) for i in range(attempts)))
+    )
+
+
+async def run(path: Path, attempts: int, concurrency: int, enabled: bool):
+    engine = build_engine(f'sqlite+aiosqlite:///{path}')
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.drop_all)
+        await conn.run_sync(table_registry.metadata.create_all)
+        hashed = get_password_hash('senha-correta')
+        await conn.execute(
+            User.__table__.insert(),
+            [
+                {
+                    'username': name,
+                    'email': f'{name}@x.com',
+                    'password': hashed,
+                }
+                for name in TARGETS
+            ],
+        )
+
+    async def session_override():
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = session_override
+    app.dependency_overrides[get_read_session] = session_override
+    settings.LOGIN_RATE_LIMIT_ENABLED = enabled
+    login_throttle.backend = InMemoryRateLimitBackend()
+
+    hashes_before = password_hash_seconds.count
+    wall_start, cpu_start = perf_counter(), process_time()
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url='http://bench'
+    ) as client:
+        statuses = await attack(client, attempts, concurrency)
+    wall = perf_counter() - wall_start
+    cpu = process_time() - cpu_start
+
+    app.dependency_overrides.clear()
+    await engine.dispose()
+    return statuses, password_hash_seconds.count - hashes_before, wall, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--attempts', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for enabled in (False, True):
+            statuses, hashes, wall, cpu = asyncio.run(
+                run(
+                    Path(tmp) / 'attack.db',
+                    args.attempts,
+                    args.concurrency,
+                    enabled,
+                )
+            )
+            print(f'limitador {"ligado" if enabled else "desligado"}:')
+            print(f'  respostas:        {dict(sorted(statuses.items()))}')
+            print(f'  argon2 executado: {hashes}')
+            print(f'  tempo:            {wall:.2f} s')
+            print(f'  CPU:              {cpu:.2f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Memória e latência da lista de tokens revogados com 1M de revogações.
+
+Compara os filtros de Bloom por minuto de expiração (RevocationList) com um
+dict `jti -> exp` em memória (a alternativa exata mais simples). Os `exp`
+são espalhados pelos próximos ACCESS_TOKEN_EXPIRE_MINUTES, como numa
+produção em que os logouts chegam ao longo do tempo.
+
+Uso:
+    python -m benchmarks.bench_revocation --revoked 1000000 --lookups 200000
+"""
+
+import argparse
+import random
+import secrets
+import time
+import tracemalloc
+from time import perf_counter
+
+from aris_api.revocation import RevocationList
+
+
+def _tokens(count: int, now: float, window: float):
+    return [
+        (secrets.token_urlsafe(16), now + 60 + random.random() * window)
+        for _ in range(count)
+    ]
+
+
+def _measure(build):
+    start = perf_counter()
+    store = build()
+    elapsed = perf_counter() - start
+    del store
+
+    # memória numa segunda carga: o tracemalloc distorce o tempo
+    tracemalloc.start()
+    store = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return store, size, elapsed
+
+
+def _lookup_ns(contains, tokens) -> float:
+    start = perf_counter()
+    for jti, exp in tokens:
+        contains(jti, exp)
+    return (perf_counter() - start) / len(tokens) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--revoked', type=int, default=1_000_000)
+    parser.add_argument('--lookups', type=int, default=200_000)
+    parser.add_argument('--window-minutes', type=int, default=30)
+    parser.add_argument('--error-rate', type=float, default=0.001)
+    args = parser.parse_args()
+
+    now = time.time()
+    window = args.window_minutes * 60
+    revoked = _tokens(args.revoked, now, window)
+    # tokens válidos (a maioria das requisições) e tokens revogados
+    valid = _tokens(args.lookups, now, window)
+    sample = random.sample(revoked, min(args.lookups, len(revoked)))
+
+    def build_bloom():
+        revocations = RevocationList(error_rate=args.error_rate)
+        for jti, exp in revoked:
+            revocations.add(jti, exp)
+        return revocations
+
+    def build_dict():
+        # strings novas, como as lidas do banco na sincronização
+        return {jti.encode().decode(): exp for jti, exp in revoked}
+
+    bloom, bloom_bytes, bloom_build = _measure(build_bloom)
+    exact, dict_bytes, dict_build = _measure(build_dict)
+
+    false_positives = sum(bloom.might_contain(jti, exp) for jti, exp in valid)
+    results = [
+        (
+            'bloom por minuto',
+            bloom_bytes,
+            bloom_build,
+            _lookup_ns(bloom.might_contain, valid),
+            _lookup_ns(bloom.might_contain, sample),
+        ),
+        (
+            'dict jti -> exp',
+            dict_bytes,
+            dict_build,
+            _lookup_ns(lambda jti, exp: jti in exact, valid),
+            _lookup_ns(lambda jti, exp: jti in exact, sample),
+        ),
+    ]
+
+    print(f'{args.revoked:,} tokens revogados, {args.lookups:,} consultas')
+    print(
+        f'{"estrutura":<17} {"memória (MiB)":>14} {"carga (s)":>10} '
+        f'{"válido (ns)":>12} {"revogado (ns)":>14}'
+    )
+    for name, size, build, miss, hit in results:
+        print(
+            f'{name:<17} {size / 2**20:>14.1f} {build:>10.2f} '
+            f'{miss:>12,.0f} {hit:>14,.0f}'
+        )
+    print(
+        f'falsos positivos (vão ao banco): {false_positives} '
+        f'({false_positives / len(valid):.3%})'
+    )
+
+
+if __name__ == '__main__':
+    main()
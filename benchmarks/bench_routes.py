@@ -0,0 +1,553 @@
+"""Vazão e latência (p50/p95/p99) de cada rota da API, com baselines.
+
+Roda `aris_api.app.app` em processo, via `httpx.ASGITransport`, com N
+requisições simultâneas, sobre bancos SQLite semeados com 10k/100k/1M
+usuários. O banco semeado fica em `--data-dir` e é copiado a cada execução,
+porque as rotas de escrita o modificam. O resultado de cada tamanho vai para
+`<output-dir>/users-<N>.json`.
+
+`compare` confronta dois resultados e sai com status 1 quando alguma rota
+piorou além da tolerância (latência maior ou vazão menor). Os números
+dependem da máquina e do Python: gere a baseline e a medição na mesma
+máquina, com o mesmo interpretador (o `compare` avisa quando diferem), e
+regenere as baselines quando o caminho das rotas mudar.
+
+Uso:
+    python -m benchmarks.bench_routes run --users 10000 100000 \\
+        --concurrency 10 --requests 200 --output-dir bench_results
+    python -m benchmarks.bench_routes run --users 10000 100000 1000000 \\
+        --output-dir benchmarks/baselines          # atualiza as baselines
+    python -m benchmarks.bench_routes compare \\
+        benchmarks/baselines/users-10000.json bench_results/users-10000.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from time import perf_counter
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from aris_api.app import app
+from aris_api.database import build_engine, get_read_session, get_session
+from aris_api.models import table_registry
+from aris_api.security import (
+    create_access_token,
+    get_password_hash,
+    new_refresh_token,
+    new_token_family,
+    token_cache,
+    utcnow,
+)
+from aris_api.settings import settings
+
+PASSWORD = 'senha-do-benchmark'
+DOMAINS = tuple(f'empresa{i}.com' for i in range(20))
+# formato em que o DateTime do SQLAlchemy grava no SQLite
+SQLITE_DATETIME = '%Y-%m-%d %H:%M:%S.%f'
+# cada hash/verificação argon2 custa dezenas de ms de CPU
+ARGON2_REQUESTS = 50
+METRICS = ('throughput', 'p50_ms', 'p95_ms', 'p99_ms')
+
+
+@dataclass(frozen=True)
+class Context:
+    """Dados semeados que as requisições usam."""
+
+    users: int
+    token: str
+    refresh_tokens: list[str]
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    method: str
+    # (contexto, índice da requisição) -> url e argumentos do httpx
+    request: Callable[[Context, int], tuple[str, dict]]
+    expected: int = 200
+    # rotas caras (argon2, exportação completa) rodam menos vezes
+    max_requests: int | None = None
+
+
+def _auth(context: Context) -> dict:
+    return {'Authorization': f'Bearer {context.token}'}
+
+
+def _new_user(i: int) -> dict:
+    return {
+        'username': f'novo{i}',
+        'email': f'novo{i}@bench.com',
+        'password': PASSWORD,
+    }
+
+
+SCENARIOS = (
+    Scenario('GET /', 'GET', lambda c, i: ('/', {})),
+    Scenario('GET /health/ready', 'GET', lambda c, i: ('/health/ready', {})),
+    Scenario(
+        'GET /.well-known/jwks.json',
+        'GET',
+        lambda c, i: ('/.well-known/jwks.json', {}),
+    ),
+    Scenario('GET /metrics', 'GET', lambda c, i: ('/metrics', {})),
+    Scenario(
+        'GET /users/',
+        'GET',
+        lambda c, i: ('/users/', {'headers': _auth(c)}),
+    ),
+    Scenario(
+        'GET /users/?offset=meio',
+        'GET',
+        lambda c, i: (
+            '/users/',
+            {'headers': _auth(c), 'params': {'offset': c.users // 2}},
+        ),
+    ),
+    Scenario(
+        'GET /users/?username_prefix',
+        'GET',
+        lambda c, i: (
+            '/users/',
+            {'headers': _auth(c), 'params': {'username_prefix': f'user{i}'}},
+        ),
+    ),
+    Scenario(
+        'GET /users/?email_domain',
+        'GET',
+        lambda c, i: (
+            '/users/',
+            {
+                'headers': _auth(c),
+                'params': {'email_domain': DOMAINS[i % len(DOMAINS)]},
+            },
+        ),
+    ),
+    Scenario(
+        'GET /users/?sort=-created_at',
+        'GET',
+        lambda c, i: (
+            '/users/',
+            {'headers': _auth(c), 'params': {'sort': '-created_at'}},
+        ),
+    ),
+    Scenario(
+        'GET /users/export',
+        'GET',
+        lambda c, i: ('/users/export', {'headers': _auth(c)}),
+        max_requests=5,
+    ),
+    Scenario(
+        'POST /auth/token',
+        'POST',
+        lambda c, i: (
+            '/auth/token',
+            {'data': {'username': f'user{i % c.users}', 'password': PASSWORD}},
+        ),
+        max_requests=ARGON2_REQUESTS,
+    ),
+    Scenario(
+        'POST /auth/refresh_token',
+        'POST',
+        lambda c, i: (
+            '/auth/refresh_token',
+            {'json': {'refresh_token': c.refresh_tokens[2 * i]}},
+        ),
+    ),
+    Scenario(
+        'POST /auth/revoke',
+        'POST',
+        lambda c, i: (
+            '/auth/revoke',
+            {'json': {'refresh_token': c.refresh_tokens[2 * i + 1]}},
+        ),
+    ),
+    Scenario(
+        'POST /auth/logout',
+        'POST',
+        # um access token novo por requisição: o logout o revoga
+        lambda c, i: (
+            '/auth/logout',
+            {
+                'headers': {
+                    'Authorization': 'Bearer '
+                    + create_access_token({'sub': 'user0@empresa0.com'})
+                }
+            },
+        ),
+    ),
+    Scenario(
+        'POST /users/',
+        'POST',
+        lambda c, i: ('/users/', {'json': _new_user(i)}),
+        expected=201,
+        max_requests=ARGON2_REQUESTS,
+    ),
+    Scenario(
+        'POST /users/bulk',
+        'POST',
+        lambda c, i: (
+            '/users/bulk',
+            {
+                'headers': _auth(c),
+                'json': {'users': [_new_user(f'{i}-{j}') for j in range(10)]},
+            },
+        ),
+        max_requests=10,
+    ),
+    Scenario(
+        'PUT /users/{id}',
+        'PUT',
+        lambda c, i: (
+            '/users/1',
+            {
+                'headers': _auth(c),
+                'json': {
+                    'username': 'user0',
+                    'email': 'user0@empresa0.com',
+                    'password': PASSWORD,
+                },
+            },
+        ),
+        max_requests=ARGON2_REQUESTS,
+    ),
+    Scenario(
+        'DELETE /users/{id}',
+        'DELETE',
+        # apaga do fim para o começo; o usuário 1 (do token) fica
+        lambda c, i: (f'/users/{c.users - i}', {}),
+    ),
+)
+
+
+def seed_database(path: Path, users: int):
+    """Cria o schema e insere `users` usuários com a mesma senha.
+
+    Um único hash argon2 é reaproveitado: calcular 1M deles levaria horas.
+    As datas de cadastro cobrem o último ano e os emails se dividem entre
+    `DOMAINS`, para os filtros da listagem terem o que filtrar.
+    """
+    engine = build_engine(f'sqlite+aiosqlite:///{path}')
+
+    async def create_schema():
+        async with engine.begin() as conn:
+            await conn.run_sync(table_registry.metadata.create_all)
+        await engine.dispose()
+
+    asyncio.run(create_schema())
+
+    password = get_password_hash(PASSWORD)
+    start = datetime(2025, 1, 1)
+    step = timedelta(days=365) / users
+    with sqlite3.connect(path) as conn:
+        conn.executemany(
+            'INSERT INTO users (username, email, password, created_at) '
+            'VALUES (?, ?, ?, ?)',
+            (
+                (
+                    f'user{i}',
+                    f'user{i}@{DOMAINS[i % len(DOMAINS)]}',
+                    password,
+                    (start + step * i).strftime(SQLITE_DATETIME),
+                )
+                for i in range(users)
+            ),
+        )
+
+
+def seeded_database(data_dir: Path, users: int) -> Path:
+    """Banco semeado com `users` usuários, criado só na primeira vez."""
+    path = data_dir / f'users-{users}.db'
+    if not path.exists():
+        data_dir.mkdir(parents=True, exist_ok=True)
+        partial = path.with_suffix('.tmp')
+        partial.unlink(missing_ok=True)
+        print(f'semeando {users:,} usuários em {path}...')
+        seed_database(partial, users)
+        partial.rename(path)
+    return path
+
+
+def _summary(latencies: list[float], statuses: Counter, wall: float, scenario):
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+    return {
+        'requests': len(latencies),
+        'errors': sum(
+            count
+            for status, count in statuses.items()
+            if status != scenario.expected
+        ),
+        'statuses': {str(status): n for status, n in sorted(statuses.items())},
+        'throughput': len(latencies) / wall,
+        'p50_ms': cuts[49] * 1000,
+        'p95_ms': cuts[94] * 1000,
+        'p99_ms': cuts[98] * 1000,
+    }
+
+
+async def measure(  # noqa: PLR0913
+    client: httpx.AsyncClient,
+    context: Context,
+    scenario: Scenario,
+    *,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+):
+    """Dispara as requisições do cenário com no máximo `concurrency` ao
+    mesmo tempo; as `warmup` primeiras não entram na medição."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, statuses = [], Counter()
+
+    async def send(i: int, record: bool):
+        url, kwargs = scenario.request(context, i)
+        async with semaphore:
+            start = perf_counter()
+            response = await client.request(scenario.method, url, **kwargs)
+            await response.aread()
+            elapsed = perf_counter() - start
+        if record:
+            latencies.append(elapsed)
+            statuses[response.status_code] += 1
+
+    await asyncio.gather(*(send(i, record=False) for i in range(warmup)))
+    start = perf_counter()
+    await asyncio.gather(
+        *(send(i, record=True) for i in range(warmup, warmup + requests))
+    )
+    return _summary(latencies, statuses, perf_counter() - start, scenario)
+
+
+def _seed_refresh_tokens(path: Path, count: int) -> list[str]:
+    """Refresh tokens válidos do usuário 1; cada renovação consome um."""
+    tokens = [new_refresh_token() for _ in range(count)]
+    expires_at = (utcnow() + timedelta(days=1)).strftime(SQLITE_DATETIME)
+    with sqlite3.connect(path) as conn:
+        conn.executemany(
+            'INSERT INTO refresh_tokens '
+            '(user_id, token_hash, family_id, expires_at) '
+            'VALUES (1, ?, ?, ?)',
+            (
+                (token_hash, new_token_family(), expires_at)
+                for _, token_hash in tokens
+            ),
+        )
+    return [token for token, _ in tokens]
+
+
+async def run_suite(
+    path: Path,
+    users: int,
+    requests: int,
+    concurrency: int,
+    only: set[str] | None = None,
+):
+    warmup = max(1, requests // 10)
+    context = Context(
+        users=users,
+        token=create_access_token({'sub': 'user0@empresa0.com'}),
+        refresh_tokens=_seed_refresh_tokens(path, 2 * (requests + warmup)),
+    )
+    engine = build_engine(f'sqlite+aiosqlite:///{path}')
+
+    async def session_override():
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = session_override
+    app.dependency_overrides[get_read_session] = session_override
+    # todas as requisições vêm do mesmo "IP"
+    settings.LOGIN_RATE_LIMIT_ENABLED = False
+    token_cache.clear()
+    # o lifespan não roda aqui (aqueceria a engine de DATABASE_URL)
+    app.state.ready = True
+
+    results = {}
+    try:
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url='http://bench'
+        ) as client:
+            for scenario in SCENARIOS:
+                if only and scenario.name not in only:
+                    continue
+                count = min(requests, scenario.max_requests or requests)
+                results[scenario.name] = await measure(
+                    client,
+                    context,
+                    scenario,
+                    requests=count,
+                    concurrency=concurrency,
+                    warmup=min(warmup, count),
+                )
+                _print_route(scenario.name, results[scenario.name])
+    finally:
+        app.dependency_overrides.clear()
+        app.state.ready = False
+        await engine.dispose()
+    return results
+
+
+def _print_route(name: str, result: dict):
+    errors = f'  ⚠ {result["errors"]} erros' if result['errors'] else ''
+    print(
+        f'{name:<32} {result["throughput"]:>9,.1f} {result["p50_ms"]:>9.2f} '
+        f'{result["p95_ms"]:>9.2f} {result["p99_ms"]:>9.2f}{errors}'
+    )
+
+
+def compare(
+    baseline: dict, current: dict, tolerance: float, min_delta_ms: float
+) -> list[str]:
+    """Rotas que pioraram além de `tolerance` (fração) em relação à
+    baseline. Diferenças de latência abaixo de `min_delta_ms` são ruído."""
+    regressions = []
+    for name, before in baseline['routes'].items():
+        after = current['routes'].get(name)
+        if after is None:
+            continue
+        for metric in METRICS:
+            old, new = before[metric], after[metric]
+            if metric == 'throughput':
+                worse = new < old * (1 - tolerance)
+            else:
+                worse = new > old * (1 + tolerance) and (
+                    new - old >= min_delta_ms
+                )
+            if worse:
+                regressions.append(
+                    f'{name}: {metric} {old:,.2f} -> {new:,.2f} '
+                    f'({(new - old) / old:+.0%})'
+                )
+        if after['errors'] > before['errors']:
+            regressions.append(
+                f'{name}: erros {before["errors"]} -> {after["errors"]}'
+            )
+    return regressions
+
+
+def _meta(args, users: int) -> dict:
+    return {
+        'users': users,
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'machine': platform.machine(),
+        'date': datetime.now().isoformat(timespec='seconds'),
+    }
+
+
+def command_run(args) -> int:
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    failed = False
+    for users in args.users:
+        template = seeded_database(args.data_dir, users)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / template.name
+            shutil.copyfile(template, path)
+            print(
+                f'\n{users:,} usuários, {args.requests} requisições, '
+                f'concorrência {args.concurrency}'
+            )
+            print(
+                f'{"rota":<32} {"req/s":>9} {"p50 (ms)":>9} '
+                f'{"p95 (ms)":>9} {"p99 (ms)":>9}'
+            )
+            routes = asyncio.run(
+                run_suite(
+                    path,
+                    users,
+                    args.requests,
+                    args.concurrency,
+                    set(args.route or ()),
+                )
+            )
+
+        result = {'meta': _meta(args, users), 'routes': routes}
+        output = args.output_dir / f'users-{users}.json'
+        output.write_text(json.dumps(result, indent=2, ensure_ascii=False))
+        print(f'resultado salvo em {output}')
+
+        baseline = args.compare_to and args.compare_to / output.name
+        if baseline and baseline.exists():
+            failed |= _report(
+                json.loads(baseline.read_text()),
+                result,
+                args.tolerance,
+                args.min_delta_ms,
+            )
+    return int(failed)
+
+
+def _report(baseline, current, tolerance, min_delta_ms) -> bool:
+    for key in ('users', 'requests', 'concurrency', 'python', 'machine'):
+        if baseline['meta'][key] != current['meta'][key]:
+            print(
+                f'aviso: {key} difere da baseline '
+                f'({baseline["meta"][key]} x {current["meta"][key]})'
+            )
+    regressions = compare(baseline, current, tolerance, min_delta_ms)
+    if regressions:
+        print(f'\nregressões (tolerância {tolerance:.0%}):')
+        for line in regressions:
+            print(f'  {line}')
+    else:
+        print(f'\nsem regressões (tolerância {tolerance:.0%})')
+    return bool(regressions)
+
+
+def command_compare(args) -> int:
+    baseline = json.loads(args.baseline.read_text())
+    current = json.loads(args.current.read_text())
+    return int(_report(baseline, current, args.tolerance, args.min_delta_ms))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='mede as rotas')
+    run.add_argument('--users', type=int, nargs='+', default=[10_000])
+    run.add_argument('--requests', type=int, default=200)
+    run.add_argument('--concurrency', type=int, default=10)
+    run.add_argument(
+        '--route', action='append', help='mede só esta rota (repetível)'
+    )
+    run.add_argument('--data-dir', type=Path, default=Path('benchmarks/.data'))
+    run.add_argument('--output-dir', type=Path, default=Path('bench_results'))
+    run.add_argument(
+        '--compare-to',
+        type=Path,
+        help='diretório de baselines para comparar ao final',
+    )
+    run.set_defaults(handler=command_run)
+
+    compare_parser = commands.add_parser(
+        'compare', help='compara um resultado com a baseline'
+    )
+    compare_parser.add_argument('baseline', type=Path)
+    compare_parser.add_argument('current', type=Path)
+    compare_parser.set_defaults(handler=command_compare)
+
+    for command in (run, compare_parser):
+        command.add_argument('--tolerance', type=float, default=0.15)
+        command.add_argument('--min-delta-ms', type=float, default=0.5)
+
+    args = parser.parse_args()
+    sys.exit(args.handler(args))
+
+
+if __name__ == '__main__':
+    main()
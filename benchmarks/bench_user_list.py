@@ -0,0 +1,95 @@
+"""Linhas/s na montagem de páginas de GET /users/: antes x depois.
+
+- antes: entidades ORM -> UserList/UserPublic (from_attributes) ->
+  jsonable_encoder -> json.dumps (o caminho padrão do FastAPI)
+- depois: só as colunas id/username/email -> dicts -> orjson
+
+Uso:
+    python -m benchmarks.bench_user_list --rows 20000 --page-size 100 1000
+"""
+
+import argparse
+import asyncio
+import json
+import sqlite3
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from aris_api.database import build_engine
+from aris_api.models import User, table_registry
+from aris_api.schemas import UserList
+
+
+async def page_before(session: AsyncSession, limit: int, offset: int):
+    users = (
+        await session.scalars(
+            select(User).order_by(User.id).limit(limit).offset(offset)
+        )
+    ).all()
+    content = jsonable_encoder(UserList.model_validate({'users': users}))
+    session.expunge_all()
+    return json.dumps(content).encode()
+
+
+async def page_after(session: AsyncSession, limit: int, offset: int):
+    users = (
+        await session.execute(
+            select(User.id, User.username, User.email)
+            .order_by(User.id)
+            .limit(limit)
+            .offset(offset)
+        )
+    ).all()
+    return orjson.dumps({'users': [user._asdict() for user in users]})
+
+
+async def measure(engine, build_page, page_size: int, rows: int):
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        await build_page(session, page_size, 0)  # aquecimento
+        start = perf_counter()
+        for offset in range(0, rows, page_size):
+            await build_page(session, page_size, offset)
+        return rows / (perf_counter() - start)
+
+
+async def run(path: Path, rows: int, page_sizes: list[int]):
+    engine = build_engine(f'sqlite+aiosqlite:///{path}')
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+    with sqlite3.connect(path) as conn:
+        conn.executemany(
+            'INSERT INTO users (username, email, password) VALUES (?, ?, ?)',
+            ((f'user{i}', f'user{i}@example.com', 'x') for i in range(rows)),
+        )
+
+    print(f'{"página":>7} {"antes (linhas/s)":>17} {"depois (linhas/s)":>18}')
+    for page_size in page_sizes:
+        before = await measure(engine, page_before, page_size, rows)
+        after = await measure(engine, page_after, page_size, rows)
+        print(
+            f'{page_size:>7} {before:>17,.0f} {after:>18,.0f}'
+            f'   ({after / before:.1f}x)'
+        )
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20_000)
+    parser.add_argument(
+        '--page-size', type=int, nargs='+', default=[100, 1000]
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(Path(tmp) / 'list.db', args.rows, args.page_size))
+
+
+if __name__ == '__main__':
+    main()
@@ -41,6 +41,8 @@ def do_run_migrations(connection):
     context.configure(
         connection=connection,
         target_metadata=target_metadata,
+        # SQLite não tem ALTER TABLE completo: recria a tabela em lote
+        render_as_batch=connection.dialect.name == "sqlite",
     )
 
     with context.begin_transaction():
@@ -0,0 +1,58 @@
+"""add unique index to username
+
+Revision ID: 096cc38b6f12
+Revises: cdb53e0a1e99
+Create Date: 2026-10-18 07:32:31.896292
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '096cc38b6f12'
+down_revision: Union[str, Sequence[str], None] = 'cdb53e0a1e99'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# quantos nomes repetidos a mensagem de erro lista
+MAX_LISTED = 20
+
+
+def _check_duplicate_usernames() -> None:
+    # o PUT /users/{id} antigo aceitava nomes repetidos: sem esta checagem
+    # o CREATE UNIQUE INDEX falharia com um IntegrityError cru
+    if context.is_offline_mode():
+        return
+    duplicates = op.get_bind().scalars(
+        sa.text(
+            'SELECT username FROM users GROUP BY username '
+            'HAVING count(*) > 1 ORDER BY username'
+        )
+    ).all()
+    if not duplicates:
+        return
+
+    listed = ', '.join(repr(name) for name in duplicates[:MAX_LISTED])
+    if len(duplicates) > MAX_LISTED:
+        listed += f' e mais {len(duplicates) - MAX_LISTED}'
+    raise RuntimeError(
+        f'{len(duplicates)} nome(s) de usuário repetido(s) impedem o índice '
+        f'único ix_users_username: {listed}. Renomeie as contas repetidas '
+        'e rode a migração de novo.'
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _check_duplicate_usernames()
+    op.create_index(
+        op.f('ix_users_username'), 'users', ['username'], unique=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_users_username'), table_name='users')
@@ -0,0 +1,38 @@
+"""add user directory indexes
+
+Revision ID: 549e0a0ef058
+Revises: b553aa95fd68
+Create Date: 2026-10-18 08:05:48.911319
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '549e0a0ef058'
+down_revision: Union[str, Sequence[str], None] = 'b553aa95fd68'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _email_domain() -> sa.TextClause:
+    # mesma expressão de aris_api.models.EmailDomain, por dialeto
+    if op.get_context().dialect.name == 'sqlite':
+        return sa.text("lower(substr(email, instr(email, '@') + 1))")
+    return sa.text("lower(split_part(email, '@', 2))")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_users_created_at', 'users', ['created_at', 'id'], unique=False)
+    # o autogenerate não enxerga índices funcionais
+    op.create_index('ix_users_email_domain', 'users', [_email_domain()], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_email_domain', table_name='users')
+    op.drop_index('ix_users_created_at', table_name='users')
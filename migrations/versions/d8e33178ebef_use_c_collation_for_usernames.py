@@ -0,0 +1,42 @@
+"""use C collation for usernames
+
+Revision ID: d8e33178ebef
+Revises: 9f6722634796
+Create Date: 2026-10-18 08:42:03.637487
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8e33178ebef'
+down_revision: Union[str, Sequence[str], None] = '9f6722634796'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _alter_username(type_: sa.String) -> None:
+    # o SQLite já compara em ordem binária (BINARY); no PostgreSQL o ALTER
+    # também recria ix_users_username e a unique com a nova collation
+    if op.get_context().dialect.name != 'postgresql':
+        return
+    op.alter_column(
+        'users',
+        'username',
+        existing_type=sa.String(),
+        type_=type_,
+        existing_nullable=False,
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _alter_username(sa.String(collation='C'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _alter_username(sa.String())
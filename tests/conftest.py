@@ -1,5 +1,10 @@
+import os
+import shutil
+import socket
+import subprocess
 from contextlib import contextmanager
 from datetime import datetime
+from pathlib import Path
 
 import pytest
 import pytest_asyncio
@@ -9,21 +14,60 @@ from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.pool import StaticPool
 
 from aris_api.app import app
-from aris_api.database import get_session
+from aris_api.database import get_read_session, get_session
+from aris_api.etags import users_page_cache
+from aris_api.instrumentation import instrument_engine
 from aris_api.models import User, table_registry
-from aris_api.security import get_password_hash
+from aris_api.ratelimit import InMemoryRateLimitBackend, login_throttle
+from aris_api.revocation import revocation_store
+from aris_api.security import get_password_hash, token_cache
 from aris_api.settings import settings
 
 
+@pytest.fixture(autouse=True)
+def _clear_token_cache():
+    """Evita que tokens em cache vazem entre bancos de teste diferentes."""
+    token_cache.clear()
+    yield
+    token_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def _reset_revocations():
+    """Filtros de tokens revogados são globais do processo."""
+    revocation_store.reset()
+    yield
+    revocation_store.reset()
+
+
+@pytest.fixture(autouse=True)
+def _reset_page_cache():
+    """Cada teste recria o banco e a versão de `users` volta a 0."""
+    users_page_cache.clear()
+    yield
+    users_page_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def _reset_login_throttle(monkeypatch):
+    """Cada teste começa com os baldes de login cheios."""
+    monkeypatch.setattr(login_throttle, 'backend', InMemoryRateLimitBackend())
+
+
 @pytest.fixture
-def client(db_session):
+def client(db_session, monkeypatch):
     """Cria um cliente de teste para FastAPI com a sessão de DB sobrescrita."""
+    # o aquecimento (pool + argon2) tem teste próprio em test_app.py
+    monkeypatch.setattr(settings, 'WARMUP_ON_STARTUP', False)
+    # a sincronização de revogações usa o banco real, não o de teste
+    monkeypatch.setattr(settings, 'REVOCATION_SYNC_SECONDS', 0)
 
     def get_session_override():
         return db_session
 
     with TestClient(app) as test_client:
         app.dependency_overrides[get_session] = get_session_override
+        app.dependency_overrides[get_read_session] = get_session_override
         yield test_client
 
     app.dependency_overrides.clear()
@@ -37,6 +81,7 @@ async def db_session():
         connect_args={'check_same_thread': False},
         poolclass=StaticPool,
     )
+    instrument_engine(engine)
 
     async with engine.begin() as conn:
         await conn.run_sync(table_registry.metadata.create_all)
@@ -48,6 +93,32 @@ async def db_session():
         await conn.run_sync(table_registry.metadata.drop_all)
 
 
+@pytest.fixture
+def assert_max_queries(db_session):
+    """`with assert_max_queries(n):` falha se o bloco mandar mais de `n`
+    comandos SQL ao banco de teste. Devolve a lista dos comandos."""
+
+    @contextmanager
+    def budget(limit: int):
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        engine = db_session.bind.sync_engine
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+        assert len(statements) <= limit, (
+            f'{len(statements)} comandos SQL (limite {limit}):\n'
+            + '\n'.join(statements)
+        )
+
+    return budget
+
+
 @contextmanager
 def _mock_db_time(model, time=datetime(2025, 5, 20)):
     """Mocka a data de criação (created_at) de um modelo no banco."""
@@ -84,6 +155,22 @@ async def user(db_session: AsyncSession):
     return user
 
 
+@pytest_asyncio.fixture
+async def users(db_session: AsyncSession, user):
+    """Cria mais 4 usuários (ids 2..5) além do usuário de teste."""
+    others = [
+        User(
+            username=f'user{i}',
+            email=f'user{i}@example.com',
+            password='não-usado',
+        )
+        for i in range(2, 6)
+    ]
+    db_session.add_all(others)
+    await db_session.commit()
+    return [user, *others]
+
+
 @pytest.fixture
 def token(client, user):
     """Gera um token JWT para o usuário de teste."""
@@ -101,3 +188,83 @@ def token(client, user):
 def test_settings():
     """Retorna as configurações de teste."""
     return settings
+
+
+def _postgres_bin_dir() -> Path | None:
+    """Diretório com `initdb`/`pg_ctl`: POSTGRES_BIN_DIR ou o PATH."""
+    configured = os.environ.get('POSTGRES_BIN_DIR')
+    if configured:
+        return Path(configured)
+    initdb = shutil.which('initdb')
+    return Path(initdb).parent if initdb else None
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(scope='session')
+def postgres_url(tmp_path_factory):
+    """Sobe um PostgreSQL descartável com o binário local (sem Docker).
+
+    Sem o binário ou sem o asyncpg os testes marcados com `postgres` são
+    pulados e a suíte continua rodando offline com SQLite.
+    """
+    pytest.importorskip('asyncpg')
+    bin_dir = _postgres_bin_dir()
+    if bin_dir is None or not (bin_dir / 'initdb').exists():
+        pytest.skip('PostgreSQL não encontrado (defina POSTGRES_BIN_DIR)')
+    if os.geteuid() == 0:
+        pytest.skip('o initdb do PostgreSQL não roda como root')
+
+    data_dir = tmp_path_factory.mktemp('pgdata')
+    port = _free_port()
+    subprocess.run(
+        [
+            bin_dir / 'initdb',
+            '--pgdata',
+            data_dir,
+            '--username',
+            'aris',
+            '--auth',
+            'trust',
+            '--encoding',
+            'UTF8',
+            '--no-sync',
+        ],
+        check=True,
+        capture_output=True,
+    )
+    subprocess.run(
+        [
+            bin_dir / 'pg_ctl',
+            '--pgdata',
+            data_dir,
+            '--log',
+            data_dir / 'postgres.log',
+            '--wait',
+            '--options',
+            f'-p {port} -k {data_dir} -c listen_addresses=127.0.0.1 '
+            '-c fsync=off -c max_connections=200',
+            'start',
+        ],
+        check=True,
+        capture_output=True,
+    )
+    try:
+        yield f'postgresql+asyncpg://aris@127.0.0.1:{port}/postgres'
+    finally:
+        subprocess.run(
+            [
+                bin_dir / 'pg_ctl',
+                '--pgdata',
+                data_dir,
+                '--mode',
+                'immediate',
+                'stop',
+            ],
+            check=False,
+            capture_output=True,
+        )
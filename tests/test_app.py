@@ -1,7 +1,87 @@
+import subprocess
+import sys
 from http import HTTPStatus
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from aris_api import database
+from aris_api.app import app
+from aris_api.database import build_engine
+from aris_api.metrics import password_hash_seconds
+from aris_api.settings import settings
 
 
 def test_root_deve_retornar_ola_mundo(client):
     response = client.get('/')
     assert response.json() == {'message': 'Olá. Mundo!'}
     assert response.status_code == HTTPStatus.OK
+
+
+def test_health_live(client):
+    response = client.get('/health/live')
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {'status': 'ok'}
+
+
+def test_health_ready_after_startup(client):
+    response = client.get('/health/ready')
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {'status': 'ready'}
+
+
+def test_health_ready_before_startup():
+    # sem o `with`, o lifespan não roda: a instância ainda não está pronta
+    app.state.ready = False
+    response = TestClient(app).get('/health/ready')
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.json() == {'status': 'starting'}
+
+
+def test_lifespan_warms_pool_and_disposes_on_shutdown(tmp_path, monkeypatch):
+    engine = build_engine(f'sqlite+aiosqlite:///{tmp_path / "warm.db"}')
+    monkeypatch.setattr(database, 'get_engine', lambda: engine)
+    monkeypatch.setattr(settings, 'WARMUP_ON_STARTUP', True)
+    monkeypatch.setattr(settings, 'DB_POOL_WARMUP_CONNECTIONS', 2)
+    monkeypatch.setattr(settings, 'REVOCATION_SYNC_SECONDS', 0)
+    hashes_before = password_hash_seconds.count
+
+    with TestClient(app) as client:
+        assert engine.pool.checkedin() == settings.DB_POOL_WARMUP_CONNECTIONS
+        assert password_hash_seconds.count == hashes_before + 1
+        assert client.get('/health/ready').status_code == HTTPStatus.OK
+
+    assert engine.pool.checkedin() == 0
+    assert app.state.ready is False
+
+
+# ⏱️ orçamento de import da app (µs); folgado para CI compartilhada, mas
+# acusa regressões grosseiras como um import pesado de volta no topo
+IMPORT_BUDGET_US = 2_500_000
+LAZY_MODULES = ('jwt', 'cryptography', 'pwdlib', 'argon2', 'aiosqlite')
+
+
+def _import_times(module: str) -> dict[str, int]:
+    """Tempo cumulativo (µs) de cada módulo, via `python -X importtime`."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=Path(__file__).parents[1],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.removeprefix('import time:').split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_import_app_stays_within_budget():
+    times = _import_times('aris_api.app')
+
+    assert times['aris_api.app'] < IMPORT_BUDGET_US
+    # argon2, JWT e o driver do banco só carregam no primeiro uso
+    assert not [name for name in LAZY_MODULES if name in times]
@@ -1,5 +1,20 @@
 from http import HTTPStatus
 
+import pytest
+from pwdlib.hashers.argon2 import Argon2Hasher
+from sqlalchemy import select
+
+from aris_api.metrics import password_hash_seconds
+from aris_api.models import RefreshToken, User
+from aris_api.ratelimit import (
+    InMemoryRateLimitBackend,
+    LoginThrottle,
+    RateLimitBackend,
+    login_throttle,
+)
+from aris_api.security import hash_refresh_token, verify_and_update_password
+from aris_api.settings import settings
+
 
 def test_get_token(client, user):
     response = client.post(
@@ -15,3 +30,229 @@ def test_get_token(client, user):
 
     assert 'access_token' in token
     assert token['token_type'] == 'bearer'
+    assert 'refresh_token' in token
+
+
+def test_get_token_wrong_password(client, user):
+    response = client.post(
+        '/auth/token',
+        data={'username': user.email, 'password': 'senha-errada'},
+    )
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    assert response.json() == {'detail': 'email ou senha incorretos'}
+
+
+@pytest.mark.asyncio
+async def test_get_token_rehashes_outdated_hash(client, db_session):
+    cheap_hasher = Argon2Hasher(time_cost=1, memory_cost=8192, parallelism=1)
+    old_hash = cheap_hasher.hash('123412341234')
+    db_session.add(
+        User(username='antigo', email='antigo@example.com', password=old_hash)
+    )
+    await db_session.commit()
+
+    response = client.post(
+        '/auth/token',
+        data={'username': 'antigo', 'password': '123412341234'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    new_hash = await db_session.scalar(
+        select(User.password).where(User.username == 'antigo')
+    )
+    assert new_hash != old_hash
+    assert verify_and_update_password('123412341234', new_hash) == (
+        True,
+        None,
+    )
+
+
+def test_login_throttled_before_hashing(client, user, monkeypatch):
+    monkeypatch.setattr(login_throttle, 'attempts', 3)
+    form = {'username': user.email, 'password': 'senha-errada'}
+    for _ in range(login_throttle.attempts):
+        response = client.post('/auth/token', data=form)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+    hashes_before = password_hash_seconds.count
+    response = client.post('/auth/token', data=form)
+
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert int(response.headers['Retry-After']) >= 1
+    assert password_hash_seconds.count == hashes_before  # argon2 não rodou
+
+
+def test_login_success_resets_user_bucket(client, user, monkeypatch):
+    monkeypatch.setattr(login_throttle, 'attempts', 2)
+    client.post(
+        '/auth/token', data={'username': user.email, 'password': 'errada'}
+    )
+    client.post(
+        '/auth/token',
+        data={'username': user.email, 'password': user.clean_password},
+    )
+
+    response = client.post(
+        '/auth/token',
+        data={'username': user.email, 'password': user.clean_password},
+    )
+    assert response.status_code == HTTPStatus.OK
+
+
+class SharedStoreStandIn(RateLimitBackend):
+    """Simula um armazenamento compartilhado entre workers (janela fixa)."""
+
+    def __init__(self):
+        self.counts = {}
+
+    async def consume(self, key, capacity, refill_per_second):
+        self.counts[key] = self.counts.get(key, 0) + 1
+        return 0.0 if self.counts[key] <= capacity else 1.0
+
+    async def reset(self, key):
+        self.counts.pop(key, None)
+
+
+def test_rate_limit_backend_requires_both_methods():
+    class ConsumeOnly(RateLimitBackend):
+        blocked = frozenset()
+
+        async def consume(self, key, capacity, refill_per_second):
+            return 1.0 if key in self.blocked else 0.0
+
+    with pytest.raises(TypeError, match='reset'):
+        ConsumeOnly()
+
+
+@pytest.mark.asyncio
+async def test_throttled_bucket_survives_eviction():
+    backend = InMemoryRateLimitBackend(max_keys=3)
+    for _ in range(3):
+        await backend.consume('alvo', 2, 2 / 60)
+    assert await backend.consume('alvo', 2, 2 / 60) > 0
+
+    # chaves descartáveis deixam 'alvo' como o balde mais antigo
+    for i in range(10):
+        assert await backend.consume(f'lixo{i}', 2, 2 / 60) == 0
+
+    assert await backend.consume('alvo', 2, 2 / 60) > 0
+
+
+@pytest.mark.asyncio
+async def test_login_throttle_shared_backend_across_workers():
+    store = SharedStoreStandIn()
+    worker_a = LoginThrottle(
+        store, attempts=2, ip_attempts=10, window_seconds=60
+    )
+    worker_b = LoginThrottle(
+        store, attempts=2, ip_attempts=10, window_seconds=60
+    )
+
+    assert await worker_a.check('alice', '10.0.0.1') == 0
+    assert await worker_b.check('ALICE', '10.0.0.2') == 0
+    assert await worker_a.check('alice', '10.0.0.3') > 0
+
+
+def _login(client, user):
+    return client.post(
+        '/auth/token',
+        data={'username': user.email, 'password': user.clean_password},
+    ).json()
+
+
+def _refresh(client, refresh_token):
+    return client.post(
+        '/auth/refresh_token', json={'refresh_token': refresh_token}
+    )
+
+
+@pytest.mark.asyncio
+async def test_refresh_token_rotates_without_argon2(client, user, db_session):
+    tokens = _login(client, user)
+    hashes_before = password_hash_seconds.count
+
+    response = _refresh(client, tokens['refresh_token'])
+
+    assert response.status_code == HTTPStatus.OK
+    refreshed = response.json()
+    assert refreshed['refresh_token'] != tokens['refresh_token']
+    assert password_hash_seconds.count == hashes_before
+    # só o hash é persistido, e os dois tokens são da mesma família
+    rows = (await db_session.scalars(select(RefreshToken))).all()
+    assert {row.token_hash for row in rows} == {
+        hash_refresh_token(tokens['refresh_token']),
+        hash_refresh_token(refreshed['refresh_token']),
+    }
+    assert len({row.family_id for row in rows}) == 1
+
+    me = client.get(
+        '/users/',
+        headers={'Authorization': f'Bearer {refreshed["access_token"]}'},
+    )
+    assert me.status_code == HTTPStatus.OK
+
+
+def test_refresh_token_reuse_revokes_family(client, user):
+    tokens = _login(client, user)
+    other_session = _login(client, user)
+    rotated = _refresh(client, tokens['refresh_token']).json()
+
+    # o token antigo reaparece: a família inteira deixa de valer
+    reused = _refresh(client, tokens['refresh_token'])
+
+    assert reused.status_code == HTTPStatus.UNAUTHORIZED
+    assert reused.json() == {'detail': 'refresh token inválido ou expirado'}
+    assert (
+        _refresh(client, rotated['refresh_token']).status_code
+        == HTTPStatus.UNAUTHORIZED
+    )
+    # outros logins do mesmo usuário não são afetados
+    assert (
+        _refresh(client, other_session['refresh_token']).status_code
+        == HTTPStatus.OK
+    )
+
+
+def test_refresh_token_unknown_or_expired(client, user, monkeypatch):
+    assert _refresh(client, 'nao-existe').status_code == (
+        HTTPStatus.UNAUTHORIZED
+    )
+
+    monkeypatch.setattr(settings, 'REFRESH_TOKEN_EXPIRE_DAYS', -1)
+    expired = _login(client, user)['refresh_token']
+
+    assert _refresh(client, expired).status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_revoke_refresh_token(client, user):
+    tokens = _login(client, user)
+    rotated = _refresh(client, tokens['refresh_token']).json()
+
+    response = client.post(
+        '/auth/revoke', json={'refresh_token': rotated['refresh_token']}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {'message': 'refresh token revogado'}
+    assert _refresh(client, rotated['refresh_token']).status_code == (
+        HTTPStatus.UNAUTHORIZED
+    )
+
+
+def test_update_user_revokes_refresh_tokens(client, user):
+    tokens = _login(client, user)
+
+    client.put(
+        f'/users/{user.id}',
+        headers={'Authorization': f'Bearer {tokens["access_token"]}'},
+        json={
+            'username': user.username,
+            'email': user.email,
+            'password': 'nova-senha-123',
+        },
+    )
+
+    assert _refresh(client, tokens['refresh_token']).status_code == (
+        HTTPStatus.UNAUTHORIZED
+    )
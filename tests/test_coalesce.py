@@ -0,0 +1,179 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from aris_api import repository, security
+from aris_api.app import app
+from aris_api.coalesce import SingleFlight
+from aris_api.database import build_engine, get_read_session
+from aris_api.models import User, table_registry
+from aris_api.security import create_access_token
+
+CALLERS = 10
+
+
+def _count_statements(engine, statements):
+    event.listen(
+        engine.sync_engine,
+        'before_cursor_execute',
+        lambda conn, cursor, statement, *_: statements.append(statement),
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_query(db_session, users):
+    statements = []
+    _count_statements(db_session.bind, statements)
+    flight = SingleFlight('teste')
+
+    results = await asyncio.gather(
+        *(
+            flight.do(
+                'user2@example.com',
+                lambda: repository.get_user_by_email(
+                    db_session, 'user2@example.com'
+                ),
+            )
+            for _ in range(CALLERS)
+        )
+    )
+
+    assert len(statements) == 1
+    assert {result.username for result in results} == {'user2'}
+    # terminada a chamada, nada fica guardado: a próxima consulta de novo
+    await flight.do(
+        'user2@example.com',
+        lambda: repository.get_user_by_email(db_session, 'user2@example.com'),
+    )
+    assert statements == [statements[0]] * 2
+
+
+@pytest.mark.asyncio
+async def test_distinct_keys_run_separately():
+    flight = SingleFlight('teste')
+    calls = []
+
+    async def call(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return key
+
+    results = await asyncio.gather(
+        *(flight.do(key, lambda key=key: call(key)) for key in 'abab')
+    )
+
+    assert results == list('abab')
+    assert sorted(calls) == ['a', 'b']
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_waiting_caller():
+    flight = SingleFlight('teste')
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise ValueError('banco fora do ar')
+
+    results = await asyncio.gather(
+        *(flight.do('k', failing) for _ in range(CALLERS)),
+        return_exceptions=True,
+    )
+
+    assert calls == 1
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_timeout_releases_waiting_callers():
+    flight = SingleFlight('teste', timeout=0.01)
+
+    results = await asyncio.gather(
+        *(flight.do('k', lambda: asyncio.sleep(1)) for _ in range(3)),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, TimeoutError) for result in results)
+    assert await flight.do('k', lambda: asyncio.sleep(0, 'ok')) == 'ok'
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_lets_followers_run_their_own_call():
+    flight = SingleFlight('teste')
+    started = asyncio.Event()
+
+    async def slow():
+        started.set()
+        await asyncio.sleep(1)
+
+    leader = asyncio.create_task(flight.do('k', slow))
+    await started.wait()
+    follower = asyncio.create_task(
+        flight.do('k', lambda: asyncio.sleep(0, 'próprio'))
+    )
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == 'próprio'
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+
+@pytest.mark.asyncio
+async def test_burst_with_same_token_looks_up_user_once(tmp_path, monkeypatch):
+    """Rajada com um token ainda fora do cache: uma busca do usuário e uma
+    consulta da página para todas as requisições."""
+    engine = build_engine(f'sqlite+aiosqlite:///{tmp_path / "burst.db"}')
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+        await conn.execute(
+            insert(User),
+            {'username': 'ana', 'email': 'ana@example.com', 'password': 'x'},
+        )
+    statements = []
+    _count_statements(engine, statements)
+
+    # segura a primeira consulta o bastante para as demais chegarem
+    async def slow(call, *args, **kwargs):
+        await asyncio.sleep(0.05)
+        return await call(*args, **kwargs)
+
+    lookup, page = security.get_user_by_email, repository.list_users
+    monkeypatch.setattr(
+        security, 'get_user_by_email', lambda *a: slow(lookup, *a)
+    )
+    monkeypatch.setattr(
+        repository, 'list_users', lambda *a, **kw: slow(page, *a, **kw)
+    )
+
+    async def session_override():
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_read_session] = session_override
+    token = create_access_token({'sub': 'ana@example.com'})
+    headers = {'Authorization': f'Bearer {token}'}
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url='http://test'
+        ) as client:
+            responses = await asyncio.gather(
+                *(
+                    client.get('/users/', headers=headers)
+                    for _ in range(CALLERS)
+                )
+            )
+    finally:
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+    assert {response.status_code for response in responses} == {HTTPStatus.OK}
+    lookups = [s for s in statements if 'WHERE users.email' in s]
+    pages = [s for s in statements if 'ORDER BY users.id' in s]
+    assert (len(lookups), len(pages)) == (1, 1)
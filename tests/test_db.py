@@ -1,10 +1,26 @@
+import asyncio
 from dataclasses import asdict
 
 import pytest
-from sqlalchemy import select
+from sqlalchemy import select, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import AsyncSession  # ✅ import adicionado
 
-from aris_api.models import User
+from aris_api import database
+from aris_api.database import (
+    InstrumentedQueuePool,
+    ReplicaRouter,
+    build_engine,
+    engine_options,
+    get_read_session,
+)
+from aris_api.metrics import (
+    db_pool_checkout_seconds,
+    db_pool_connections_in_use,
+    db_pool_timeouts_total,
+)
+from aris_api.models import User, table_registry
+from aris_api.settings import settings
 
 
 @pytest.mark.asyncio
@@ -30,3 +46,132 @@ async def test_create_user(db_session: AsyncSession, mock_db_time):
             'password': '123412341234',
             'created_at': time,
         }
+
+
+@pytest.mark.asyncio
+async def test_build_engine_applies_sqlite_pragmas(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, 'DB_SQLITE_JOURNAL_MODE', 'WAL')
+    monkeypatch.setattr(settings, 'DB_SQLITE_SYNCHRONOUS', 'NORMAL')
+    monkeypatch.setattr(settings, 'DB_SQLITE_BUSY_TIMEOUT_MS', 1234)
+    engine = build_engine(f'sqlite+aiosqlite:///{tmp_path / "pragmas.db"}')
+
+    async with engine.connect() as conn:
+        journal_mode = await conn.scalar(text('PRAGMA journal_mode'))
+        synchronous = await conn.scalar(text('PRAGMA synchronous'))
+        busy_timeout = await conn.scalar(text('PRAGMA busy_timeout'))
+    await engine.dispose()
+
+    assert isinstance(engine.pool, InstrumentedQueuePool)
+    assert (journal_mode, synchronous, busy_timeout) == ('wal', 1, 1234)
+
+
+def test_engine_options_per_dialect(monkeypatch):
+    cache_size = 256
+    monkeypatch.setattr(settings, 'DB_STATEMENT_CACHE_SIZE', cache_size)
+
+    postgres = engine_options('postgresql+asyncpg://aris@db/aris')
+    sqlite_file = engine_options('sqlite+aiosqlite:///arquivo.db')
+    sqlite_memory = engine_options('sqlite+aiosqlite:///:memory:')
+
+    assert postgres['poolclass'] is InstrumentedQueuePool
+    assert postgres['connect_args']['prepared_statement_cache_size'] == (
+        cache_size
+    )
+    assert sqlite_file['connect_args'] == {'cached_statements': cache_size}
+    assert sqlite_file['poolclass'] is InstrumentedQueuePool
+    assert 'poolclass' not in sqlite_memory
+
+
+@pytest.mark.asyncio
+async def test_pool_saturation(tmp_path, monkeypatch):
+    """Com pool de 2 conexões, 8 requisições simultâneas fazem fila e as
+    que esperam além do DB_POOL_TIMEOUT recebem TimeoutError."""
+    monkeypatch.setattr(settings, 'DB_POOL_SIZE', 2)
+    monkeypatch.setattr(settings, 'DB_MAX_OVERFLOW', 0)
+    monkeypatch.setattr(settings, 'DB_POOL_TIMEOUT', 0.25)
+    engine = build_engine(f'sqlite+aiosqlite:///{tmp_path / "pool.db"}')
+    waits_before = db_pool_checkout_seconds.count
+    timeouts_before = db_pool_timeouts_total.value
+    in_use_peak = 0
+
+    async def hold_connection(seconds):
+        nonlocal in_use_peak
+        async with engine.connect() as conn:
+            await conn.execute(text('SELECT 1'))
+            in_use_peak = max(in_use_peak, engine.pool.checkedout())
+            await asyncio.sleep(seconds)
+
+    results = await asyncio.gather(
+        *(hold_connection(0.1) for _ in range(8)), return_exceptions=True
+    )
+    await engine.dispose()
+
+    timeouts = [r for r in results if isinstance(r, PoolTimeoutError)]
+    assert in_use_peak == settings.DB_POOL_SIZE
+    # 2 conexões x 0,1 s por requisição: só ~4 cabem em 0,25 s de espera
+    assert 0 < len(timeouts) < len(results)
+    assert all(r is None or r in timeouts for r in results)
+    assert db_pool_timeouts_total.value - timeouts_before == len(timeouts)
+    assert db_pool_checkout_seconds.count - waits_before == len(results)
+    assert db_pool_connections_in_use.value == 0
+
+
+async def _sqlite_with_user(path, username):
+    """Cria um banco SQLite em arquivo com um único usuário."""
+    engine = build_engine(f'sqlite+aiosqlite:///{path}')
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+        await conn.execute(
+            User.__table__.insert(),
+            {
+                'username': username,
+                'email': f'{username}@x.com',
+                'password': '',
+            },
+        )
+    return engine
+
+
+async def _read_username():
+    generator = get_read_session()
+    session = await anext(generator)
+    username = await session.scalar(select(User.username))
+    await generator.aclose()
+    return username
+
+
+@pytest.mark.asyncio
+async def test_get_read_session_round_robin(tmp_path, monkeypatch):
+    replica_a = await _sqlite_with_user(tmp_path / 'a.db', 'replica_a')
+    replica_b = await _sqlite_with_user(tmp_path / 'b.db', 'replica_b')
+    router = ReplicaRouter([replica_a, replica_b], 30)
+    monkeypatch.setattr(database, 'get_read_router', lambda: router)
+
+    usernames = [await _read_username() for _ in range(4)]
+
+    assert usernames == ['replica_a', 'replica_b'] * 2
+    await replica_a.dispose()
+    await replica_b.dispose()
+
+
+@pytest.mark.asyncio
+async def test_get_read_session_failover(tmp_path, monkeypatch):
+    broken = build_engine(
+        f'sqlite+aiosqlite:///{tmp_path / "nao-existe" / "r.db"}'
+    )
+    healthy = await _sqlite_with_user(tmp_path / 'ok.db', 'replica_ok')
+    primary = await _sqlite_with_user(tmp_path / 'primary.db', 'primary')
+    router = ReplicaRouter([broken, healthy], cooldown=30)
+    monkeypatch.setattr(database, 'get_read_router', lambda: router)
+    monkeypatch.setattr(database, 'get_engine', lambda: primary)
+
+    # a réplica quebrada sai da rodada e a leitura cai na saudável
+    assert await _read_username() == 'replica_ok'
+    assert router.candidates() == [healthy]
+
+    # sem réplicas saudáveis a leitura vai para o primário
+    router.mark_down(healthy)
+    assert await _read_username() == 'primary'
+
+    for engine in (broken, healthy, primary):
+        await engine.dispose()
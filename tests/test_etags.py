@@ -0,0 +1,38 @@
+from aris_api.etags import PageCache, etag_matches, make_etag
+
+
+def test_etag_depends_on_version_and_parameters():
+    etag = make_etag(3, '{"limit":10}')
+
+    assert etag == make_etag(3, '{"limit":10}')
+    assert etag != make_etag(4, '{"limit":10}')
+    assert etag != make_etag(3, '{"limit":20}')
+
+
+def test_etag_matches_weak_lists_and_wildcard():
+    etag = make_etag(1, 'página')
+    strong = etag.removeprefix('W/')
+
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"outro", {strong}', etag)
+    assert etag_matches('*', etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches(make_etag(2, 'página'), etag)
+
+
+def test_page_cache_evicts_least_recently_used():
+    cache = PageCache(max_size=2)
+    cache.set((1, 'a'), b'a')
+    cache.set((1, 'b'), b'b')
+    cache.get((1, 'a'))
+    cache.set((1, 'c'), b'c')
+
+    assert cache.get((1, 'b')) is None
+    assert (cache.get((1, 'a')), cache.get((1, 'c'))) == (b'a', b'c')
+
+
+def test_page_cache_disabled():
+    cache = PageCache(max_size=0)
+    cache.set((1, 'a'), b'a')
+
+    assert len(cache) == 0
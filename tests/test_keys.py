@@ -0,0 +1,202 @@
+import time
+from datetime import UTC, datetime, timedelta
+from http import HTTPStatus
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from cryptography.hazmat.primitives.serialization import (
+    Encoding,
+    NoEncryption,
+    PrivateFormat,
+    PublicFormat,
+)
+
+from aris_api.keys import KeyRing, load_public_key
+from aris_api.security import get_key_ring, token_cache
+from aris_api.settings import settings
+
+SECRET = 'segredo-de-teste'
+
+
+def _claims(subject: str) -> dict:
+    return {'sub': subject, 'exp': int(time.time()) + 60}
+
+
+def _write_private(path, key):
+    path.write_bytes(
+        key.private_bytes(Encoding.PEM, PrivateFormat.PKCS8, NoEncryption())
+    )
+    return str(path)
+
+
+def _write_public(path, key):
+    path.write_bytes(
+        key.public_key().public_bytes(
+            Encoding.PEM, PublicFormat.SubjectPublicKeyInfo
+        )
+    )
+    return str(path)
+
+
+@pytest.fixture
+def key_ring_cache():
+    get_key_ring.cache_clear()
+    yield
+    get_key_ring.cache_clear()
+
+
+def test_symmetric_ring_signs_without_kid():
+    ring = KeyRing('HS256', SECRET)
+
+    token = ring.encode(_claims('a@example.com'))
+
+    assert 'kid' not in jwt.get_unverified_header(token)
+    assert ring.decode(token)['sub'] == 'a@example.com'
+    assert ring.jwks == {'keys': []}
+
+
+def test_asymmetric_ring_publishes_jwks_and_signs_with_kid():
+    ring = KeyRing('EdDSA', SECRET, ed25519.Ed25519PrivateKey.generate())
+
+    token = ring.encode(_claims('a@example.com'))
+
+    (jwk,) = ring.jwks['keys']
+    assert jwk['kid'] == ring.signing_kid
+    assert (jwk['alg'], jwk['use'], jwk['kty']) == ('EdDSA', 'sig', 'OKP')
+    assert jwt.get_unverified_header(token)['kid'] == ring.signing_kid
+    # um serviço externo valida apenas com o JWKS publicado
+    public_key = jwt.PyJWK(jwk).key
+    assert jwt.decode(token, public_key, algorithms=['EdDSA'])['sub'] == (
+        'a@example.com'
+    )
+
+
+def test_rotation_keeps_outstanding_tokens_valid():
+    old_key = ed25519.Ed25519PrivateKey.generate()
+    new_key = ec.generate_private_key(ec.SECP256R1())
+    old_token = KeyRing('EdDSA', SECRET, old_key).encode(_claims('antigo'))
+
+    ring = KeyRing(
+        'ES256', SECRET, new_key, verification_keys=[old_key.public_key()]
+    )
+    new_token = ring.encode(_claims('novo'))
+
+    assert ring.decode(old_token)['sub'] == 'antigo'
+    assert ring.decode(new_token)['sub'] == 'novo'
+    assert [k['alg'] for k in ring.jwks['keys']] == ['ES256', 'EdDSA']
+
+
+def test_asymmetric_ring_rejects_unknown_and_secret_signed_tokens():
+    ring = KeyRing('EdDSA', SECRET, ed25519.Ed25519PrivateKey.generate())
+    stranger = KeyRing('EdDSA', SECRET, ed25519.Ed25519PrivateKey.generate())
+
+    with pytest.raises(jwt.InvalidTokenError):
+        ring.decode(stranger.encode(_claims('x')))
+    # sem JWT_SECRET_TOKENS_VALID_UNTIL, o segredo simétrico não vale mais
+    # depois da troca
+    with pytest.raises(jwt.InvalidTokenError):
+        ring.decode(jwt.encode(_claims('x'), SECRET, algorithm='HS256'))
+
+
+def test_secret_tokens_stay_valid_during_transition():
+    secret_token = KeyRing('HS256', SECRET).encode(_claims('antigo'))
+    key = ed25519.Ed25519PrivateKey.generate()
+
+    during = KeyRing(
+        'EdDSA', SECRET, key, secret_tokens_valid_until=time.time() + 60
+    )
+    after = KeyRing(
+        'EdDSA', SECRET, key, secret_tokens_valid_until=time.time() - 1
+    )
+
+    assert during.decode(secret_token)['sub'] == 'antigo'
+    assert during.decode(during.encode(_claims('novo')))['sub'] == 'novo'
+    with pytest.raises(jwt.InvalidTokenError):
+        after.decode(secret_token)
+    # o algoritmo dos tokens sem kid é o configurado, nunca o do cabeçalho
+    with pytest.raises(jwt.InvalidTokenError):
+        during.decode(jwt.encode(_claims('x'), SECRET, algorithm='HS512'))
+
+
+def test_secret_algorithm_must_be_symmetric():
+    with pytest.raises(ValueError, match='não é simétrico'):
+        KeyRing(
+            'EdDSA',
+            SECRET,
+            ed25519.Ed25519PrivateKey.generate(),
+            secret_algorithm='RS256',
+        )
+
+
+def test_token_without_exp_is_rejected():
+    ring = KeyRing('HS256', SECRET)
+
+    with pytest.raises(jwt.MissingRequiredClaimError):
+        ring.decode(jwt.encode({'sub': 'x'}, SECRET, algorithm='HS256'))
+
+
+def test_algorithm_must_match_signing_key():
+    with pytest.raises(ValueError, match='não combina'):
+        KeyRing('RS256', SECRET, ed25519.Ed25519PrivateKey.generate())
+
+
+def test_load_public_key_accepts_private_pem(tmp_path):
+    key = ed25519.Ed25519PrivateKey.generate()
+    private_path = _write_private(tmp_path / 'privada.pem', key)
+    public_path = _write_public(tmp_path / 'publica.pem', key)
+
+    assert load_public_key(private_path) == load_public_key(public_path)
+
+
+def test_login_with_asymmetric_key_and_jwks_endpoint(
+    client, user, tmp_path, monkeypatch, key_ring_cache
+):
+    key = ed25519.Ed25519PrivateKey.generate()
+    monkeypatch.setattr(
+        settings,
+        'JWT_SIGNING_KEY_FILE',
+        _write_private(tmp_path / 'assinatura.pem', key),
+    )
+    monkeypatch.setattr(settings, 'ALGORITHM', 'EdDSA')
+
+    jwks_response = client.get('/.well-known/jwks.json')
+    token = client.post(
+        '/auth/token',
+        data={'username': user.email, 'password': user.clean_password},
+    ).json()['access_token']
+
+    assert jwks_response.status_code == HTTPStatus.OK
+    assert 'max-age=' in jwks_response.headers['cache-control']
+    (jwk,) = jwks_response.json()['keys']
+    payload = jwt.decode(token, jwt.PyJWK(jwk).key, algorithms=['EdDSA'])
+    assert payload['sub'] == user.email
+
+    token_cache.clear()
+    response = client.get(
+        '/users/', headers={'Authorization': f'Bearer {token}'}
+    )
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_transition_window_from_settings(
+    tmp_path, monkeypatch, key_ring_cache
+):
+    secret_token = KeyRing(settings.ALGORITHM, settings.SECRET_KEY).encode(
+        _claims('antigo')
+    )
+    key = ed25519.Ed25519PrivateKey.generate()
+    monkeypatch.setattr(
+        settings,
+        'JWT_SIGNING_KEY_FILE',
+        _write_private(tmp_path / 'assinatura.pem', key),
+    )
+    monkeypatch.setattr(settings, 'ALGORITHM', 'EdDSA')
+    # sem fuso: UTC
+    monkeypatch.setattr(
+        settings,
+        'JWT_SECRET_TOKENS_VALID_UNTIL',
+        datetime.now(UTC).replace(tzinfo=None) + timedelta(minutes=5),
+    )
+
+    assert get_key_ring().decode(secret_token)['sub'] == 'antigo'
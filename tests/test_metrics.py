@@ -0,0 +1,137 @@
+import logging
+from http import HTTPStatus
+
+import pytest
+
+from aris_api import repository
+from aris_api.instrumentation import (
+    RequestStats,
+    parameter_shape,
+    report_statements,
+    request_stats,
+)
+from aris_api.metrics import (
+    Counter,
+    Family,
+    Histogram,
+    db_repeated_statements_total,
+    http_request_db_queries,
+    http_requests_total,
+    render,
+)
+from aris_api.settings import settings
+
+LIST_USERS_MIN_QUERIES = 2
+
+
+def test_histogram_render_prometheus_format():
+    registry = []
+    histogram = Histogram(
+        'latencia_seconds', 'Latência.', buckets=(0.1, 1.0), registry=registry
+    )
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(3)
+
+    assert render(registry) == (
+        '# HELP latencia_seconds Latência.\n'
+        '# TYPE latencia_seconds histogram\n'
+        'latencia_seconds_bucket{le="0.1"} 1\n'
+        'latencia_seconds_bucket{le="1.0"} 2\n'
+        'latencia_seconds_bucket{le="+Inf"} 3\n'
+        'latencia_seconds_sum 3.55\n'
+        'latencia_seconds_count 3\n'
+    )
+
+
+def test_family_reuses_children_and_escapes_labels():
+    registry = []
+    family = Family(
+        Counter, 'eventos_total', 'Eventos.', ('rota',), registry=registry
+    )
+    family.labels('/a"b').inc()
+    family.labels('/a"b').inc()
+
+    assert len(family.children) == 1
+    assert 'eventos_total{rota="/a\\"b"} 2.0' in render(registry)
+
+
+def test_metrics_endpoint_records_routes(client, token):
+    client.get('/users/', headers={'Authorization': f'Bearer {token}'})
+
+    response = client.get('/metrics')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/plain')
+    assert (
+        'http_requests_total{method="GET",route="/users/",status="200"}'
+        in response.text
+    )
+    assert 'http_request_duration_seconds_bucket{method="GET"' in response.text
+    # autenticação (lookup do usuário) + listagem
+    queries = http_request_db_queries.labels('GET', '/users/')
+    assert queries.sum >= LIST_USERS_MIN_QUERIES
+
+
+def test_metrics_unmatched_route_is_grouped(client):
+    client.get('/nao-existe/123')
+
+    counter = http_requests_total.labels('GET', 'unmatched', 404)
+    assert counter.value >= 1
+
+
+def test_slow_query_log_shows_route_and_parameter_types(
+    client, token, caplog, monkeypatch
+):
+    monkeypatch.setattr(settings, 'DB_SLOW_QUERY_MS', 0)
+
+    with caplog.at_level(logging.WARNING, 'aris_api.instrumentation'):
+        client.get('/users/', headers={'Authorization': f'Bearer {token}'})
+
+    slow = [r.getMessage() for r in caplog.records if 'lenta' in r.message]
+    assert any(
+        'em GET /users/: SELECT' in message and 'parâmetros: (str)' in message
+        for message in slow
+    )
+    # os valores (e-mail do token) nunca vão para o log
+    assert not any('teste@example.com' in message for message in slow)
+
+
+def test_parameter_shape():
+    assert parameter_shape((1, 'a', None)) == '(int, str, NoneType)'
+    assert parameter_shape({'id': 1}) == '{id: int}'
+    assert parameter_shape([(1,), (2,)], executemany=True) == '2 x (int)'
+
+
+@pytest.mark.asyncio
+async def test_repeated_reads_and_fan_out_are_flagged(
+    db_session, user, caplog, monkeypatch
+):
+    monkeypatch.setattr(settings, 'DB_N_PLUS_ONE_THRESHOLD', 3)
+    stats = RequestStats()
+    token = request_stats.set(stats)
+    try:
+        for _ in range(2):
+            await repository.get_user_by_email(db_session, user.email)
+        for user_id in range(3):
+            await repository.user_exists(db_session, user_id)
+        # escritas repetidas são intencionais e não contam
+        for _ in range(2):
+            await repository.bump_table_version(db_session, 'users')
+    finally:
+        request_stats.reset(token)
+
+    assert list(stats.repeated().values()) == [2]
+    assert list(stats.fan_out(3).values()) == [3]
+
+    repeated = db_repeated_statements_total.labels('GET', '/teste')
+    before = repeated.value
+    with caplog.at_level(logging.WARNING, 'aris_api.instrumentation'):
+        report_statements(stats, 'GET', '/teste')
+
+    assert repeated.value == before + 1
+    messages = [record.getMessage() for record in caplog.records]
+    assert any(
+        'idêntico executado 2 vezes em GET /teste' in m for m in messages
+    )
+    assert any('N+1 em GET /teste: 3 execuções' in m for m in messages)
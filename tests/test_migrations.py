@@ -0,0 +1,39 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+
+from aris_api.settings import settings
+
+ALEMBIC_INI = Path(__file__).parents[1] / 'alembic.ini'
+
+
+def _alembic(url: str, action, *args):
+    # migrations/env.py lê a URL de settings.DATABASE_URL
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(settings, 'DATABASE_URL', url)
+        action(Config(ALEMBIC_INI), *args)
+
+
+def test_unique_username_migration_reports_duplicates(tmp_path):
+    path = tmp_path / 'migracao.db'
+    url = f'sqlite+aiosqlite:///{path}'
+    _alembic(url, command.upgrade, 'cdb53e0a1e99')
+    with sqlite3.connect(path) as conn:
+        conn.executemany(
+            'INSERT INTO users (username, email, password) VALUES (?, ?, ?)',
+            [
+                ('ana', 'ana@example.com', 'x'),
+                ('ana', 'ana2@example.com', 'x'),
+                ('beto', 'beto@example.com', 'x'),
+            ],
+        )
+
+    with pytest.raises(RuntimeError, match=r"repetido\(s\).*: 'ana'\."):
+        _alembic(url, command.upgrade, 'head')
+
+    with sqlite3.connect(path) as conn:
+        conn.execute("UPDATE users SET username = 'ana2' WHERE id = 2")
+    _alembic(url, command.upgrade, 'head')
@@ -0,0 +1,235 @@
+"""Mesmos fluxos da API rodando no PostgreSQL (asyncpg).
+
+Precisa do binário do PostgreSQL (PATH ou POSTGRES_BIN_DIR); sem ele os
+testes são pulados. Ver a fixture `postgres_url` em conftest.py.
+"""
+
+import asyncio
+from http import HTTPStatus
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from alembic import command
+from alembic.config import Config
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from aris_api.app import app
+from aris_api.database import build_engine, get_read_session, get_session
+from aris_api.revocation import RevocationList, RevocationStore
+from aris_api.security import decode_access_token
+from aris_api.settings import settings
+
+pytestmark = pytest.mark.postgres
+
+ALEMBIC_INI = Path(__file__).parents[1] / 'alembic.ini'
+
+
+def _alembic(postgres_url: str, action, *args):
+    # migrations/env.py lê a URL de settings.DATABASE_URL
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(settings, 'DATABASE_URL', postgres_url)
+        action(Config(ALEMBIC_INI), *args)
+
+
+@pytest.fixture(scope='module')
+def migrated_postgres(postgres_url):
+    _alembic(postgres_url, command.upgrade, 'head')
+    return postgres_url
+
+
+@pytest_asyncio.fixture
+async def pg_client(migrated_postgres):
+    engine = build_engine(migrated_postgres)
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                'TRUNCATE users, refresh_tokens, revoked_tokens '
+                'RESTART IDENTITY CASCADE'
+            )
+        )
+
+    async def session_override():
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = session_override
+    app.dependency_overrides[get_read_session] = session_override
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url='http://test'
+        ) as client:
+            yield client
+    finally:
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+
+def test_migrations_match_models_and_downgrade(migrated_postgres):
+    # sem diferenças entre os modelos e o schema gerado pelas migrações
+    _alembic(migrated_postgres, command.check)
+    _alembic(migrated_postgres, command.downgrade, 'base')
+    _alembic(migrated_postgres, command.upgrade, 'head')
+
+
+def _signup(
+    client, i: int, email: str | None = None, username: str | None = None
+):
+    return client.post(
+        '/users/',
+        json={
+            'username': username or f'user{i}',
+            'email': email or f'user{i}@example.com',
+            'password': '123412341234',
+        },
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_signups(pg_client):
+    created = await asyncio.gather(*(_signup(pg_client, i) for i in range(20)))
+    race = await asyncio.gather(
+        *(_signup(pg_client, 100 + i, 'mesmo@example.com') for i in range(5))
+    )
+
+    assert {response.status_code for response in created} == {
+        HTTPStatus.CREATED
+    }
+    assert (
+        sorted(response.status_code for response in race)
+        == [HTTPStatus.CREATED] + [HTTPStatus.CONFLICT] * 4
+    )
+    # a mensagem do asyncpg também identifica a coluna duplicada
+    assert {
+        response.json()['detail']
+        for response in race
+        if response.status_code == HTTPStatus.CONFLICT
+    } == {'email já existe'}
+
+
+@pytest.mark.asyncio
+async def test_login_refresh_and_logout(pg_client, migrated_postgres):
+    await _signup(pg_client, 1)
+    login = await pg_client.post(
+        '/auth/token',
+        data={'username': 'user1', 'password': '123412341234'},
+    )
+    tokens = login.json()
+
+    refreshed = await pg_client.post(
+        '/auth/refresh_token', json={'refresh_token': tokens['refresh_token']}
+    )
+    access = refreshed.json()['access_token']
+    headers = {'Authorization': f'Bearer {access}'}
+    page = await pg_client.get('/users/', headers=headers)
+    logout = await pg_client.post('/auth/logout', headers=headers)
+    after_logout = await pg_client.get('/users/', headers=headers)
+
+    # outro worker vê a revogação na sincronização seguinte
+    claims = decode_access_token(access)
+    other_worker = RevocationStore(RevocationList())
+    engine = build_engine(migrated_postgres)
+    try:
+        async with AsyncSession(engine) as session:
+            await other_worker.sync(session)
+            revoked_elsewhere = await other_worker.is_revoked(
+                session, claims['jti'], claims['exp']
+            )
+    finally:
+        await engine.dispose()
+
+    assert login.status_code == HTTPStatus.OK
+    assert refreshed.status_code == HTTPStatus.OK
+    assert page.json()['users'][0]['username'] == 'user1'
+    assert logout.status_code == HTTPStatus.OK
+    assert after_logout.status_code == HTTPStatus.UNAUTHORIZED
+    assert revoked_elsewhere
+
+
+@pytest.mark.asyncio
+async def test_user_directory_filters(pg_client):
+    for i, email in enumerate([
+        'a@Empresa.com',
+        'b@gmail.com',
+        'c@empresa.com',
+    ]):
+        await _signup(pg_client, i, email)
+    login = await pg_client.post(
+        '/auth/token',
+        data={'username': 'user0', 'password': '123412341234'},
+    )
+    headers = {'Authorization': f'Bearer {login.json()["access_token"]}'}
+
+    by_domain = await pg_client.get(
+        '/users/', headers=headers, params={'email_domain': 'empresa.com'}
+    )
+    first = await pg_client.get(
+        '/users/', headers=headers, params={'sort': '-created_at', 'limit': 2}
+    )
+    rest = await pg_client.get(
+        '/users/',
+        headers=headers,
+        params={'sort': '-created_at', 'cursor': first.json()['next_cursor']},
+    )
+
+    assert [u['id'] for u in by_domain.json()['users']] == [1, 3]
+    assert [u['id'] for u in first.json()['users']] == [3, 2]
+    assert [u['id'] for u in rest.json()['users']] == [1]
+
+
+@pytest.mark.asyncio
+async def test_username_prefix_ignores_database_locale(
+    pg_client, migrated_postgres
+):
+    # numa collation de idioma (en_US, pt_BR) a faixa [ab, ac) também
+    # pegaria ABC e aBz; com "C" a comparação é binária como no SQLite
+    names = ['ab', 'ABC', 'aBz', 'abc', 'abz', 'ac']
+    for i, name in enumerate(names):
+        await _signup(pg_client, i, username=name)
+    login = await pg_client.post(
+        '/auth/token',
+        data={'username': 'ab', 'password': '123412341234'},
+    )
+    headers = {'Authorization': f'Bearer {login.json()["access_token"]}'}
+
+    prefixed = await pg_client.get(
+        '/users/', headers=headers, params={'username_prefix': 'ab'}
+    )
+    ordered = await pg_client.get(
+        '/users/', headers=headers, params={'sort': 'username'}
+    )
+    engine = build_engine(migrated_postgres)
+    try:
+        async with engine.connect() as conn:
+            collation = await conn.scalar(
+                text(
+                    'SELECT collation_name FROM information_schema.columns '
+                    "WHERE table_name = 'users' AND column_name = 'username'"
+                )
+            )
+    finally:
+        await engine.dispose()
+
+    assert collation == 'C'
+    assert [u['username'] for u in prefixed.json()['users']] == [
+        'ab',
+        'abc',
+        'abz',
+    ]
+    assert [u['username'] for u in ordered.json()['users']] == sorted(names)
+
+
+@pytest.mark.asyncio
+async def test_signup_conflict_detail_comes_from_constraint(pg_client):
+    # o DETAIL do asyncpg traz o valor: "Key (email)=(username@...)"
+    await _signup(pg_client, 1, 'username@example.com')
+
+    by_email = await _signup(pg_client, 2, 'username@example.com')
+    by_username = await _signup(pg_client, 1, 'outro@example.com')
+
+    assert by_email.status_code == HTTPStatus.CONFLICT
+    assert by_email.json() == {'detail': 'email já existe'}
+    assert by_username.status_code == HTTPStatus.CONFLICT
+    assert by_username.json() == {'detail': 'nome de usuário já existe'}
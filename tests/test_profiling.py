@@ -0,0 +1,111 @@
+import time
+from http import HTTPStatus
+
+import pytest
+
+from aris_api import profiling
+from aris_api.profiling import sign_profile_token, verify_profile_token
+from aris_api.settings import settings
+
+SECRET = 'segredo-de-profiling'
+KEPT = 2
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, 'PROFILING_ENABLED', True)
+    monkeypatch.setattr(settings, 'PROFILING_SECRET', SECRET)
+    monkeypatch.setattr(settings, 'PROFILING_SAMPLE_RATE', 0.0)
+    monkeypatch.setattr(settings, 'PROFILING_DIR', str(tmp_path))
+    return tmp_path
+
+
+def _profiles(directory):
+    return sorted(path.name for path in directory.iterdir())
+
+
+def test_profile_token_signature_and_expiry():
+    token = sign_profile_token(SECRET)
+
+    assert verify_profile_token(SECRET, token)
+    assert not verify_profile_token('outro', token)
+    assert not verify_profile_token(None, token)
+    assert not verify_profile_token(SECRET, token + '0')
+    assert not verify_profile_token(SECRET, sign_profile_token(SECRET, -1))
+    assert not verify_profile_token(SECRET, 'lixo')
+    assert not verify_profile_token(SECRET, '\xb2.x')
+
+
+def test_signed_header_profiles_request(client, token, profile_dir):
+    response = client.get(
+        '/users/',
+        headers={
+            'Authorization': f'Bearer {token}',
+            'X-Debug-Profile': sign_profile_token(SECRET),
+        },
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    names = _profiles(profile_dir)
+    assert [name.rsplit('.', 1)[1] for name in names] == ['prof', 'txt']
+    summary = (profile_dir / names[1]).read_text()
+    assert 'rota: GET /users/' in summary
+    assert 'comandos SQL: ' in summary
+    assert 'get_current_user' in summary
+
+
+@pytest.mark.parametrize(
+    'header',
+    [
+        {},
+        {'X-Debug-Profile': 'lixo'},
+        {'X-Debug-Profile': f'{2**40}.00'},
+        {'X-Debug-Profile': b'\xb2.x'},
+    ],
+)
+def test_requests_without_valid_signature_are_not_profiled(
+    client, profile_dir, header
+):
+    client.get('/', headers=header)
+
+    assert _profiles(profile_dir) == []
+
+
+def test_disabled_profiling_ignores_signed_header(
+    client, profile_dir, monkeypatch
+):
+    monkeypatch.setattr(settings, 'PROFILING_ENABLED', False)
+
+    client.get('/', headers={'X-Debug-Profile': sign_profile_token(SECRET)})
+
+    assert _profiles(profile_dir) == []
+
+
+def test_sample_rate_and_rotation(client, profile_dir, monkeypatch):
+    monkeypatch.setattr(settings, 'PROFILING_SAMPLE_RATE', 1.0)
+    monkeypatch.setattr(settings, 'PROFILING_MAX_FILES', KEPT)
+
+    for _ in range(4):
+        client.get('/')
+
+    stems = {name.rsplit('.', 1)[0] for name in _profiles(profile_dir)}
+    assert len(stems) == KEPT
+    assert all(stem.endswith('-GET-root') for stem in stems)
+
+
+def test_stack_sampler_collects_collapsed_stacks():
+    sampler = profiling.StackSampler(
+        profiling.threading.get_ident(), interval=0.001
+    )
+    sampler.start()
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+    sampler.stop()
+
+    lines = sampler.collapsed().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(' ', 1)
+    assert int(count) > 0
+    assert 'test_stack_sampler_collects_collapsed_stacks' in stack
+    assert sampler.share(profiling.FOCUS['sql']) == 0.0
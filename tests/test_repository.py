@@ -0,0 +1,120 @@
+import tracemalloc
+
+import pytest
+from sqlalchemy import select
+
+from aris_api import repository
+from aris_api.models import User
+
+LOOKUPS = 300
+
+
+async def _traced(coro_factory):
+    """Executa a coroutine sob tracemalloc; retorna (retido, pico) em bytes
+    e mantém o resultado vivo até a medição."""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    result = await coro_factory()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert result
+    return current - before, peak - before
+
+
+@pytest.mark.asyncio
+async def test_repository_lookups(db_session, users):
+    assert await repository.get_user_by_email(
+        db_session, 'user2@example.com'
+    ) == repository.UserRecord(2, 'user2', 'user2@example.com')
+    credentials = await repository.get_credentials(db_session, 'user3')
+    assert (credentials.id, credentials.email) == (3, 'user3@example.com')
+    assert await repository.get_credentials(db_session, 'ninguem') is None
+    assert await repository.user_exists(db_session, 1)
+    assert not await repository.user_exists(db_session, 999)
+
+
+@pytest.mark.asyncio
+async def test_repository_list_users_offset_and_keyset(db_session, users):
+    first = await repository.list_users(db_session, limit=2)
+    after = await repository.list_users(db_session, limit=2, after=(2,))
+    skipped = await repository.list_users(db_session, limit=2, offset=4)
+
+    assert [row.id for row in first] == [1, 2]
+    assert [row.id for row in after] == [3, 4]
+    assert [row.id for row in skipped] == [5]
+
+
+async def _query_plan(session, sort, filters, keyset=False):
+    """Linhas de detalhe do EXPLAIN QUERY PLAN da listagem no SQLite."""
+    statement = repository.list_users_statement(
+        sort, frozenset(filters), keyset
+    )
+    connection = await session.connection()
+    compiled = statement.compile(dialect=connection.dialect)
+    result = await connection.exec_driver_sql(
+        f'EXPLAIN QUERY PLAN {compiled}', (None,) * len(compiled.positiontup)
+    )
+    return [row.detail for row in result]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ('sort', 'filters', 'index'),
+    [
+        ('username', {'username_prefix'}, 'ix_users_username'),
+        ('id', {'email_domain'}, 'ix_users_email_domain'),
+        ('-id', {'email_domain'}, 'ix_users_email_domain'),
+        (
+            'created_at',
+            {'created_after', 'created_before'},
+            'ix_users_created_at',
+        ),
+        ('-created_at', set(), 'ix_users_created_at'),
+    ],
+)
+async def test_list_users_filters_use_indexes(
+    db_session, sort, filters, index
+):
+    for keyset in (False, True):
+        (plan,) = await _query_plan(db_session, sort, filters, keyset)
+
+        # uma única busca no índice, já na ordem pedida (sem TEMP B-TREE)
+        assert plan.startswith((
+            'SEARCH users USING INDEX',
+            'SCAN users USING INDEX',
+        ))
+        assert index in plan
+
+
+@pytest.mark.asyncio
+async def test_repository_allocates_less_than_orm_entities(db_session):
+    db_session.add_all(
+        User(username=f'u{i}', email=f'u{i}@example.com', password='x')
+        for i in range(LOOKUPS)
+    )
+    await db_session.commit()
+    db_session.expunge_all()
+    emails = [f'u{i}@example.com' for i in range(LOOKUPS)]
+
+    async def orm_lookups():
+        return [
+            await db_session.scalar(select(User).where(User.email == email))
+            for email in emails
+        ]
+
+    async def repository_lookups():
+        return [
+            await repository.get_user_by_email(db_session, email)
+            for email in emails
+        ]
+
+    await repository_lookups()  # aquece o cache de compilação das duas vias
+    await orm_lookups()
+    db_session.expunge_all()
+
+    repo_retained, repo_peak = await _traced(repository_lookups)
+    orm_retained, orm_peak = await _traced(orm_lookups)
+
+    assert repo_retained < orm_retained / 2
+    assert repo_peak < orm_peak
@@ -0,0 +1,200 @@
+import time
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from jwt import ExpiredSignatureError
+from sqlalchemy import func, insert, select
+
+from aris_api import repository
+from aris_api.keys import KeyRing
+from aris_api.models import RevokedToken
+from aris_api.revocation import (
+    BloomFilter,
+    RevocationList,
+    RevocationStore,
+    revocation_store,
+)
+from aris_api.security import get_key_ring, utcnow
+
+ERROR_RATE = 0.01
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=10_000, error_rate=ERROR_RATE)
+    members = [BloomFilter.hash(f'membro-{i}') for i in range(10_000)]
+    for hashed in members:
+        bloom.add(hashed)
+
+    false_positives = sum(
+        BloomFilter.hash(f'outro-{i}') in bloom for i in range(10_000)
+    )
+
+    assert all(key in bloom for key in members)
+    assert false_positives < 10_000 * ERROR_RATE * 2
+
+
+def test_revocation_list_groups_by_expiry_and_expires():
+    revocations = RevocationList(bucket_seconds=60, initial_capacity=2)
+    exp = time.time() + 120
+    for i in range(5):
+        revocations.add(f'jti-{i}', exp)
+    revocations.add('ja-expirado', time.time() - 1)
+
+    assert len(revocations) == len(range(5))
+    assert revocations.might_contain('jti-4', exp)
+    # outro minuto de expiração: outro grupo, nem olha os filtros acima
+    assert not revocations.might_contain('jti-4', exp + 3600)
+
+    revocations.expire(now=exp + 60)
+    assert len(revocations) == 0
+    assert revocations.nbytes == 0
+
+
+def _login(client, user):
+    return client.post(
+        '/auth/token',
+        data={'username': user.email, 'password': user.clean_password},
+    ).json()
+
+
+def test_logout_without_jti_is_rejected(client, user):
+    # token válido, mas emitido sem jti: não há o que revogar
+    token = get_key_ring().encode({
+        'sub': user.email,
+        'exp': time.time() + 600,
+    })
+    headers = {'Authorization': f'Bearer {token}'}
+
+    response = client.post('/auth/logout', headers=headers)
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'token sem jti não pode ser revogado'}
+
+
+def test_logout_does_not_decode_the_token_again(client, user, monkeypatch):
+    tokens = _login(client, user)
+    headers = {'Authorization': f'Bearer {tokens["access_token"]}'}
+    client.get('/users/', headers=headers)  # token entra no cache
+
+    # o token expira entre get_current_user (cache) e o corpo da rota
+    def expired(self, token):
+        raise ExpiredSignatureError
+
+    monkeypatch.setattr(KeyRing, 'decode', expired)
+    response = client.post('/auth/logout', headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_logout_revokes_access_token_even_when_cached(client, user):
+    tokens = _login(client, user)
+    other = _login(client, user)
+    headers = {'Authorization': f'Bearer {tokens["access_token"]}'}
+    assert client.get('/users/', headers=headers).status_code == HTTPStatus.OK
+
+    response = client.post(
+        '/auth/logout',
+        headers=headers,
+        json={'refresh_token': tokens['refresh_token']},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {'message': 'logout realizado com sucesso'}
+    assert client.get('/users/', headers=headers).status_code == (
+        HTTPStatus.UNAUTHORIZED
+    )
+    refreshed = client.post(
+        '/auth/refresh_token', json={'refresh_token': tokens['refresh_token']}
+    )
+    assert refreshed.status_code == HTTPStatus.UNAUTHORIZED
+    # as outras sessões do usuário continuam válidas
+    other_headers = {'Authorization': f'Bearer {other["access_token"]}'}
+    assert client.get('/users/', headers=other_headers).status_code == (
+        HTTPStatus.OK
+    )
+
+
+@pytest.mark.asyncio
+async def test_unrevoked_token_checks_only_memory(db_session, monkeypatch):
+    async def fail(*args):
+        raise AssertionError('não deveria consultar o banco')
+
+    monkeypatch.setattr(repository, 'is_token_revoked', fail)
+
+    assert not await revocation_store.is_revoked(
+        db_session, 'qualquer', time.time() + 60
+    )
+
+
+@pytest.mark.asyncio
+async def test_false_positive_is_confirmed_in_database(
+    db_session, monkeypatch
+):
+    monkeypatch.setattr(
+        revocation_store.revocations, 'might_contain', lambda jti, exp: True
+    )
+
+    assert not await revocation_store.is_revoked(
+        db_session, 'nao-revogado', time.time() + 60
+    )
+
+
+@pytest.mark.asyncio
+async def test_sync_loads_other_workers_revocations_and_purges(db_session):
+    worker_a = RevocationStore(RevocationList())
+    worker_b = RevocationStore(RevocationList())
+    exp = time.time() + 600
+    await worker_a.revoke(db_session, 'revogado-em-a', exp)
+    await repository.insert_revoked_token(
+        db_session, 'expirado', utcnow().replace(year=2000)
+    )
+    await db_session.commit()
+
+    assert not await worker_b.is_revoked(db_session, 'revogado-em-a', exp)
+    await worker_b.sync(db_session)
+
+    assert await worker_b.is_revoked(db_session, 'revogado-em-a', exp)
+    remaining = await db_session.scalar(
+        select(func.count()).select_from(RevokedToken)
+    )
+    assert remaining == 1
+
+
+@pytest.mark.asyncio
+async def test_sync_picks_up_revocations_committed_out_of_order(db_session):
+    """No PostgreSQL o id sai no INSERT: uma revogação com id menor pode
+    confirmar depois de outra já lida pelos workers."""
+    worker = RevocationStore(RevocationList(), margin_seconds=60)
+    exp = time.time() + 600
+    expires_at = utcnow() + timedelta(seconds=600)
+    seen_at = utcnow()
+    await db_session.execute(
+        insert(RevokedToken),
+        {
+            'id': 10,
+            'jti': 'rapida',
+            'expires_at': expires_at,
+            'revoked_at': seen_at,
+        },
+    )
+    await db_session.commit()
+    await worker.sync(db_session)
+
+    # começou antes (id e revoked_at menores), mas confirmou só agora
+    await db_session.execute(
+        insert(RevokedToken),
+        {
+            'id': 5,
+            'jti': 'lenta',
+            'expires_at': expires_at,
+            'revoked_at': seen_at - timedelta(seconds=10),
+        },
+    )
+    await db_session.commit()
+    await worker.sync(db_session)
+    await worker.sync(db_session)
+
+    assert await worker.is_revoked(db_session, 'lenta', exp)
+    # a janela relida não soma de novo quem já estava no filtro
+    assert len(worker.revocations) == len(['rapida', 'lenta'])
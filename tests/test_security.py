@@ -1,6 +1,27 @@
+import asyncio
+import threading
+import time
+from http import HTTPStatus
+
+import pytest
+from fastapi import HTTPException
 from jwt import decode
 
-from aris_api.security import create_access_token, settings
+from aris_api import repository
+from aris_api.metrics import (
+    password_hash_rejected_total,
+    password_hash_seconds,
+)
+from aris_api.security import (
+    AuthenticatedUser,
+    PasswordHashExecutor,
+    TokenCache,
+    create_access_token,
+    hash_password_async,
+    settings,
+    token_cache,
+    verify_password_async,
+)
 
 
 def test_jwt():
@@ -12,3 +33,159 @@ def test_jwt():
     )
     assert decoded['test'] == data['test']
     assert 'exp' in decoded
+
+
+@pytest.mark.asyncio
+async def test_hash_password_async_roundtrip():
+    hashed = await hash_password_async('segredo')
+
+    assert hashed != 'segredo'
+    assert await verify_password_async('segredo', hashed)
+    assert not await verify_password_async('outro', hashed)
+
+
+@pytest.mark.asyncio
+async def test_hash_executor_back_pressure():
+    executor = PasswordHashExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+    rejected_before = password_hash_rejected_total.value
+    observed_before = password_hash_seconds.count
+
+    running = asyncio.create_task(executor.run(release.wait))
+    await asyncio.sleep(0)  # deixa a primeira tarefa ocupar a fila
+
+    with pytest.raises(HTTPException) as exc_info:
+        await executor.run(release.wait)
+
+    release.set()
+    await running
+    executor.shutdown()
+
+    assert exc_info.value.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert exc_info.value.headers == {'Retry-After': '1'}
+    assert password_hash_rejected_total.value == rejected_before + 1
+    assert password_hash_seconds.count == observed_before + 1
+    assert executor.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_hash_executor_bulk_leaves_a_worker_for_logins():
+    executor = PasswordHashExecutor(max_workers=2, max_queue=64)
+    release = threading.Event()
+    observed_before = password_hash_seconds.count
+
+    bulk = asyncio.gather(
+        *(executor.run_bulk(release.wait) for _ in range(10))
+    )
+    await asyncio.sleep(0.01)
+
+    # o lote ocupa um worker, um hash por vez; o outro fica livre
+    assert executor.pending == 1
+    assert await asyncio.wait_for(executor.run(lambda: 'login'), 1) == (
+        'login'
+    )
+
+    release.set()
+    await bulk
+    executor.shutdown()
+
+    assert password_hash_seconds.count == observed_before + 11
+    assert executor.pending == 0
+
+
+def _identity(user_id):
+    return AuthenticatedUser(
+        id=user_id, username=f'user{user_id}', email=f'{user_id}@x.com'
+    )
+
+
+def test_token_cache_lru_eviction():
+    cache = TokenCache(max_size=2, ttl=60)
+    far_future = time.time() + 3600
+    cache.set('a', _identity(1), far_future)
+    cache.set('b', _identity(2), far_future)
+
+    assert cache.get('a') == _identity(1)  # 'a' passa a ser o mais recente
+    cache.set('c', _identity(3), far_future)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == _identity(1)
+    assert cache.get('c') == _identity(3)
+    assert len(cache) == cache.max_size
+
+
+def test_token_cache_expiry_is_capped_at_token_exp():
+    cache = TokenCache(max_size=10, ttl=60)
+    cache.set('expirado', _identity(1), time.time() - 1)
+
+    assert cache.get('expirado') is None
+    assert len(cache) == 0
+
+
+def test_token_cache_invalidate_user():
+    cache = TokenCache(max_size=10, ttl=60)
+    far_future = time.time() + 3600
+    cache.set('t1', _identity(1), far_future)
+    cache.set('t2', _identity(1), far_future)
+    cache.set('t3', _identity(2), far_future)
+
+    cache.invalidate_user(1)
+
+    assert cache.get('t1') is None
+    assert cache.get('t2') is None
+    assert cache.get('t3') == _identity(2)
+
+
+def test_token_cache_populated_by_authenticated_request(client, token):
+    client.get('/users/', headers={'Authorization': f'Bearer {token}'})
+
+    assert token_cache.get(token) is not None
+
+
+def test_token_cache_invalidated_on_update(client, user, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.get('/users/', headers=headers)
+
+    client.put(
+        f'/users/{user.id}',
+        headers=headers,
+        json={
+            'username': 'bob',
+            'email': 'bob@example.com',
+            'password': '123412341234',
+        },
+    )
+
+    # o token antigo aponta para um email que não existe mais
+    assert token_cache.get(token) is None
+    response = client.get('/users/', headers=headers)
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_token_cache_follows_writes_from_other_workers(
+    client, user, token, db_session
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.get('/users/', headers=headers)
+
+    # outro worker apaga o usuário: invalidate_user não roda neste processo
+    await repository.delete_user(db_session, user.id)
+    await repository.bump_table_version(db_session, 'users')
+    await db_session.commit()
+
+    assert token_cache.get(token) is not None
+    response = client.get('/users/', headers=headers)
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    assert token_cache.get(token) is None
+
+
+def test_expired_token_is_unauthorized(client, user, monkeypatch):
+    monkeypatch.setattr(settings, 'ACCESS_TOKEN_EXPIRE_MINUTES', -1)
+    token = create_access_token({'sub': user.email})
+
+    response = client.get(
+        '/users/', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
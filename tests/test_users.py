@@ -1,20 +1,32 @@
+import asyncio
+import json
+from datetime import datetime
 from http import HTTPStatus
 
 import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from aris_api.database import get_session
+from aris_api import repository
+from aris_api.app import app
+from aris_api.database import build_engine, get_session
+from aris_api.models import User, table_registry
 from aris_api.schemas import UserPublic
 
 
-def test_create_user(client):
-    response = client.post(
-        '/users/',
-        json={
-            'username': 'alice',
-            'email': 'alice@example.com',
-            'password': '123412341234',
-        },
-    )
+def test_create_user(client, assert_max_queries):
+    # INSERT ... RETURNING + versão da tabela
+    with assert_max_queries(2):
+        response = client.post(
+            '/users/',
+            json={
+                'username': 'alice',
+                'email': 'alice@example.com',
+                'password': '123412341234',
+            },
+        )
     assert response.status_code == HTTPStatus.CREATED
     assert response.json() == {
         'id': 1,
@@ -23,25 +35,42 @@ def test_create_user(client):
     }
 
 
-def test_read_users(client, user, token):
+def test_read_users(client, user, token, assert_max_queries):
     user_schema = UserPublic.model_validate(user).model_dump()
-    response = client.get(
-        '/users/', headers={'Authorization': f'Bearer {token}'}
-    )
+    # usuário do token, versão da tabela e a página
+    with assert_max_queries(3):
+        response = client.get(
+            '/users/', headers={'Authorization': f'Bearer {token}'}
+        )
     assert response.status_code == HTTPStatus.OK
     assert response.json() == {'users': [user_schema]}
 
 
-def test_update_user(client, user, token):
-    response = client.put(
-        '/users/1',
-        headers={'Authorization': f'Bearer {token}'},
-        json={
-            'username': 'bob',
-            'email': 'bob@example.com',
-            'password': '123412341234',
-        },
-    )
+def test_read_users_cached_page_costs_one_query(
+    client, user, token, assert_max_queries
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.get('/users/', headers=headers)
+
+    # token e página em cache: só a versão da tabela
+    with assert_max_queries(1):
+        response = client.get('/users/', headers=headers)
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_update_user(client, user, token, assert_max_queries):
+    # versão e usuário do token, UPDATE ... RETURNING, refresh tokens e
+    # nova versão
+    with assert_max_queries(5):
+        response = client.put(
+            '/users/1',
+            headers={'Authorization': f'Bearer {token}'},
+            json={
+                'username': 'bob',
+                'email': 'bob@example.com',
+                'password': '123412341234',
+            },
+        )
     assert response.status_code == HTTPStatus.OK
     assert response.json() == {
         'id': 1,
@@ -50,8 +79,10 @@ def test_update_user(client, user, token):
     }
 
 
-def test_delete_user(client, user):
-    response = client.delete('/users/1')
+def test_delete_user(client, user, assert_max_queries):
+    # DELETE ... RETURNING, refresh tokens e versão
+    with assert_max_queries(3):
+        response = client.delete('/users/1')
     assert response.status_code == HTTPStatus.OK
     assert response.json() == {
         'message': 'usuário deletado com sucesso',
@@ -121,6 +152,30 @@ def test_create_user_conflict(client):
     assert response_email_conflict.json() == {'detail': 'email já existe'}
 
 
+def test_create_user_conflict_uses_violated_constraint(client):
+    # o e-mail contém "username": a mensagem vem da restrição, não do texto
+    client.post(
+        '/users/',
+        json={
+            'username': 'alice',
+            'email': 'username@example.com',
+            'password': '123412341234',
+        },
+    )
+
+    response = client.post(
+        '/users/',
+        json={
+            'username': 'bob',
+            'email': 'username@example.com',
+            'password': '123412341234',
+        },
+    )
+
+    assert response.status_code == HTTPStatus.CONFLICT
+    assert response.json() == {'detail': 'email já existe'}
+
+
 def test_update_user_not_found(client, token):
     # Tenta atualizar um usuário inexistente (id=999)
     response = client.put(
@@ -149,3 +204,409 @@ async def test_get_session_function():
     session = await anext(generator)
     assert session is not None
     await generator.aclose()  # ✅ fecha corretamente
+
+
+def test_read_users_cursor_pagination(client, users, token):
+    headers = {'Authorization': f'Bearer {token}'}
+
+    first = client.get('/users/?limit=2', headers=headers).json()
+    assert [u['id'] for u in first['users']] == [1, 2]
+
+    second = client.get(
+        '/users/',
+        headers=headers,
+        params={'limit': 2, 'cursor': first['next_cursor']},
+    ).json()
+    assert [u['id'] for u in second['users']] == [3, 4]
+
+    last = client.get(
+        '/users/',
+        headers=headers,
+        params={'limit': 2, 'cursor': second['next_cursor']},
+    ).json()
+    assert [u['id'] for u in last['users']] == [5]
+    assert 'next_cursor' not in last
+
+
+def test_read_users_offset_still_supported(client, users, token):
+    response = client.get(
+        '/users/?offset=3&limit=10',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+    assert [u['id'] for u in response.json()['users']] == [4, 5]
+
+
+def test_read_users_invalid_cursor(client, token):
+    response = client.get(
+        '/users/?cursor=nao-e-um-cursor',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'cursor inválido'}
+
+
+@pytest_asyncio.fixture
+async def directory(db_session, user):
+    """Usuários com domínios e datas de cadastro variados (ids 2..6)."""
+    rows = [
+        ('ana', 'ana@Empresa.com', datetime(2025, 1, 10)),
+        ('anabela', 'anabela@gmail.com', datetime(2025, 2, 10)),
+        ('an', 'an@empresa.com', datetime(2025, 2, 10)),
+        ('bruno', 'bruno@empresa.com.br', datetime(2025, 3, 10)),
+        ('carla', 'carla@EMPRESA.COM', datetime(2025, 2, 10)),
+    ]
+    await db_session.execute(
+        insert(User),
+        [
+            {'username': u, 'email': e, 'password': 'x', 'created_at': c}
+            for u, e, c in rows
+        ],
+    )
+    await db_session.commit()
+
+
+def _usernames(client, token, **params):
+    response = client.get(
+        '/users/', headers={'Authorization': f'Bearer {token}'}, params=params
+    )
+    assert response.status_code == HTTPStatus.OK
+    body = response.json()
+    return [u['username'] for u in body['users']], body.get('next_cursor')
+
+
+def test_read_users_filters(client, directory, token):
+    assert _usernames(client, token, username_prefix='ana')[0] == [
+        'ana',
+        'anabela',
+    ]
+    assert _usernames(client, token, email_domain='@empresa.com')[0] == [
+        'ana',
+        'an',
+        'carla',
+    ]
+    assert _usernames(
+        client,
+        token,
+        created_after='2025-02-01T00:00:00Z',
+        created_before='2025-03-01T00:00:00Z',
+    )[0] == ['anabela', 'an', 'carla']
+    # os filtros se combinam
+    assert _usernames(
+        client, token, username_prefix='an', created_after='2025-02-01'
+    )[0] == ['anabela', 'an']
+
+
+def test_read_users_sorted_cursor_pagination(client, directory, token):
+    pages, cursor = [], None
+    while True:
+        params = {'sort': '-created_at', 'limit': 2}
+        if cursor:
+            params['cursor'] = cursor
+        names, cursor = _usernames(client, token, **params)
+        pages.append(names)
+        if cursor is None:
+            break
+
+    # empates na data de cadastro desempatados pelo id, sem repetir ninguém
+    assert pages == [
+        ['teste', 'bruno'],
+        ['carla', 'an'],
+        ['anabela', 'ana'],
+        [],
+    ]
+    assert _usernames(client, token, sort='username')[0] == [
+        'an',
+        'ana',
+        'anabela',
+        'bruno',
+        'carla',
+        'teste',
+    ]
+
+
+@pytest.mark.parametrize(
+    ('first_sort', 'other_sort'),
+    [('id', 'username'), ('created_at', '-created_at'), ('-id', 'id')],
+)
+def test_read_users_cursor_from_other_sort(
+    client, users, token, first_sort, other_sort
+):
+    _, cursor = _usernames(client, token, limit=2, sort=first_sort)
+
+    response = client.get(
+        '/users/',
+        headers={'Authorization': f'Bearer {token}'},
+        params={'sort': other_sort, 'cursor': cursor},
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'cursor inválido'}
+
+
+def test_read_users_if_none_match_skips_the_query(
+    client, users, token, monkeypatch
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    first = client.get('/users/', headers=headers)
+
+    async def fail(*args, **kwargs):
+        raise AssertionError('não deveria consultar a página')
+
+    monkeypatch.setattr(repository, 'list_users', fail)
+    response = client.get(
+        '/users/', headers={**headers, 'If-None-Match': first.headers['etag']}
+    )
+
+    assert first.headers['etag'].startswith('W/"')
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers['etag'] == first.headers['etag']
+    assert not response.content
+    # sem If-None-Match, a página vem do cache de corpos serializados
+    cached = client.get('/users/', headers=headers)
+    assert cached.status_code == HTTPStatus.OK
+    assert cached.content == first.content
+
+
+def test_read_users_etag_changes_with_writes_and_filters(client, user, token):
+    headers = {'Authorization': f'Bearer {token}'}
+
+    def etag(**params):
+        return client.get('/users/', headers=headers, params=params).headers[
+            'etag'
+        ]
+
+    initial = etag()
+    assert etag(limit=5) != initial
+    client.post(
+        '/users/',
+        json={
+            'username': 'bob',
+            'email': 'bob@example.com',
+            'password': '123412341234',
+        },
+    )
+    after_create = etag()
+    client.put(
+        f'/users/{user.id}',
+        headers=headers,
+        json={
+            'username': 'teste',
+            'email': 'teste@example.com',
+            'password': 'nova-senha-123',
+        },
+    )
+    after_update = etag()
+    client.delete('/users/2')
+    after_delete = etag()
+
+    etags = [initial, after_create, after_update, after_delete]
+    assert len(set(etags)) == len(etags)
+    response = client.get(
+        '/users/', headers={**headers, 'If-None-Match': initial}
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert [u['username'] for u in response.json()['users']] == ['teste']
+
+
+def test_read_users_limit_above_max_page_size(client, token, test_settings):
+    response = client.get(
+        '/users/',
+        headers={'Authorization': f'Bearer {token}'},
+        params={'limit': test_settings.MAX_PAGE_SIZE + 1},
+    )
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_export_users_ndjson(client, users, token):
+    response = client.get(
+        '/users/export', headers={'Authorization': f'Bearer {token}'}
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'application/x-ndjson'
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row['id'] for row in rows] == [u.id for u in users]
+    assert rows[0] == {
+        'id': users[0].id,
+        'username': users[0].username,
+        'email': users[0].email,
+        'created_at': users[0].created_at.isoformat(),
+    }
+
+
+def test_export_users_csv(client, users, token):
+    response = client.get(
+        '/users/export?format=csv',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/csv')
+
+    lines = response.text.splitlines()
+    assert lines[0] == 'id,username,email,created_at'
+    assert len(lines) == len(users) + 1
+    assert lines[1].startswith('1,teste,teste@example.com,')
+
+
+def test_export_users_requires_auth(client):
+    response = client.get('/users/export')
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_create_users_bulk(client, user, token, test_settings, monkeypatch):
+    monkeypatch.setattr(test_settings, 'BULK_INSERT_BATCH_SIZE', 2)
+    payload = {
+        'users': [
+            {'username': 'ana', 'email': 'ana@example.com', 'password': 'x'},
+            {
+                'username': 'teste',
+                'email': 'novo@example.com',
+                'password': 'x',
+            },
+            {'username': 'beto', 'email': 'beto@example.com', 'password': 'x'},
+            {'username': 'ana', 'email': 'ana2@example.com', 'password': 'x'},
+            {'username': 'caio', 'email': user.email, 'password': 'x'},
+            {'username': 'davi', 'email': 'davi@example.com', 'password': 'x'},
+        ]
+    }
+
+    response = client.post(
+        '/users/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        json=payload,
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    body = response.json()
+    assert (body['created'], body['conflicts']) == (3, 3)
+    assert body['results'] == [
+        {
+            'index': 0,
+            'status': 'created',
+            'user': {'id': 2, 'username': 'ana', 'email': 'ana@example.com'},
+        },
+        {
+            'index': 1,
+            'status': 'conflict',
+            'detail': 'nome de usuário já existe',
+        },
+        {
+            'index': 2,
+            'status': 'created',
+            'user': {'id': 3, 'username': 'beto', 'email': 'beto@example.com'},
+        },
+        {
+            'index': 3,
+            'status': 'conflict',
+            'detail': 'nome de usuário já existe',
+        },
+        {'index': 4, 'status': 'conflict', 'detail': 'email já existe'},
+        {
+            'index': 5,
+            'status': 'created',
+            'user': {'id': 4, 'username': 'davi', 'email': 'davi@example.com'},
+        },
+    ]
+
+    login = client.post(
+        '/auth/token', data={'username': 'davi', 'password': 'x'}
+    )
+    assert login.status_code == HTTPStatus.OK
+
+
+def test_create_users_bulk_rejected_row_does_not_reserve_email(
+    client, user, token
+):
+    payload = {
+        'users': [
+            {
+                'username': user.username,
+                'email': 'novo@example.com',
+                'password': 'x',
+            },
+            {
+                'username': 'outro',
+                'email': 'novo@example.com',
+                'password': 'x',
+            },
+        ]
+    }
+
+    response = client.post(
+        '/users/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        json=payload,
+    )
+
+    body = response.json()
+    assert (body['created'], body['conflicts']) == (1, 1)
+    assert body['results'][0] == {
+        'index': 0,
+        'status': 'conflict',
+        'detail': 'nome de usuário já existe',
+    }
+    assert body['results'][1]['status'] == 'created'
+    assert body['results'][1]['user']['email'] == 'novo@example.com'
+
+
+def test_create_users_bulk_requires_auth(client):
+    response = client.post('/users/bulk', json={'users': []})
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_create_user_concurrent_signups(tmp_path):
+    """Cadastros simultâneos com o mesmo email: o banco garante que só um
+    vence, e cada cadastro custa um único comando SQL (sem SELECT prévio)."""
+    engine = build_engine(f'sqlite+aiosqlite:///{tmp_path / "race.db"}')
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+
+    statements = []
+    event.listen(
+        engine.sync_engine,
+        'before_cursor_execute',
+        lambda conn, cursor, statement, *_: statements.append(statement),
+    )
+
+    async def session_override():
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = session_override
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url='http://test'
+        ) as async_client:
+            responses = await asyncio.gather(
+                *(
+                    async_client.post(
+                        '/users/',
+                        json={
+                            'username': f'user{i}',
+                            'email': 'mesmo@example.com',
+                            'password': '123412341234',
+                        },
+                    )
+                    for i in range(5)
+                )
+            )
+    finally:
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+    statuses = sorted(response.status_code for response in responses)
+    assert statuses == [HTTPStatus.CREATED] + [HTTPStatus.CONFLICT] * 4
+    assert {
+        response.json()['detail']
+        for response in responses
+        if response.status_code == HTTPStatus.CONFLICT
+    } == {'email já existe'}
+    # um INSERT por cadastro, sem SELECT de checagem; só o cadastro aceito
+    # incrementa a versão da tabela (ETag de GET /users/)
+    inserts = [s for s in statements if s.startswith('INSERT')]
+    assert len(inserts) == len(responses)
+    assert [s for s in statements if not s.startswith('INSERT')] == [
+        'UPDATE table_versions SET version=(table_versions.version + ?) '
+        'WHERE table_versions.name = ?'
+    ]